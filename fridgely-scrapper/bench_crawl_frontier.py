@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: crawl frontier memory on a simulated link-dense WordPress site.
+
+Runs the same BFS (no network) over a synthetic site whose pages carry the
+usual WP link noise – category/tag archives with /page/N/ pagination,
+?replytocom= comment links, utm-tagged share links – and compares:
+
+  old : raw URLs, Python `visited` set, duplicates allowed in the deque
+        (what crawl_for_recipes used to do)
+  new : canonical URLs + CrawlFrontier (Bloom "seen" filter, each URL
+        queued at most once)
+
+Each mode runs in its own subprocess so peak RSS numbers are comparable.
+
+Example:
+  python bench_crawl_frontier.py --posts 200000 --pages 20000
+"""
+
+import argparse
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections import deque
+from typing import List
+from urllib.parse import urljoin
+
+from crawl_state import CrawlFrontier
+from crawl_wp_recipes import canonicalize_url, normalize_url
+
+SITE = "https://recipes.example.com"
+
+
+def page_links(url: str, num_posts: int) -> List[str]:
+    """Raw hrefs found on a simulated WP page (deterministic per URL)."""
+    rng = random.Random(url)
+    links = ["/", "/recipes/", "#comments", "mailto:hi@example.com"]
+    for _ in range(10):
+        cat = rng.randrange(40)
+        links.append(f"/category/cat-{cat}/")
+        links.append(f"/category/cat-{cat}/page/{rng.randrange(2, 30)}/")
+    for _ in range(20):
+        links.append(f"/tag/tag-{rng.randrange(2000)}")
+    for _ in range(12):
+        post = rng.randrange(num_posts)
+        links.append(f"/post-{post}/")
+        links.append(f"/post-{post}/?replytocom={rng.randrange(10 ** 6)}#respond")
+        links.append(f"/post-{post}/?utm_source=pin&utm_medium=social")
+    return links
+
+
+def run_old(num_posts: int, max_pages: int) -> dict:
+    queue = deque([SITE + "/"])
+    visited = set()
+    max_queue = 0
+    while queue and len(visited) < max_pages:
+        url = queue.popleft()
+        if url in visited:
+            continue
+        visited.add(url)
+        for link in page_links(url, num_posts):
+            if link.startswith("mailto:"):
+                continue
+            next_url = normalize_url(url, link)
+            if next_url not in visited:
+                queue.append(next_url)
+        max_queue = max(max_queue, len(queue))
+    return {"pages": len(visited), "max_queue": max_queue}
+
+
+def run_new(num_posts: int, max_pages: int) -> dict:
+    frontier = CrawlFrontier(canonicalize_url(SITE + "/"))
+    max_queue = 0
+    while frontier and frontier.pages_processed < max_pages:
+        seq, url = frontier.pop()
+        for link in page_links(url, num_posts):
+            if link.startswith("mailto:"):
+                continue
+            frontier.push(canonicalize_url(urljoin(url, link)))
+        frontier.page_done(seq, url)
+        max_queue = max(max_queue, len(frontier.queue))
+    return {"pages": frontier.pages_processed, "max_queue": max_queue}
+
+
+def run_mode(mode: str, num_posts: int, max_pages: int) -> None:
+    start = time.perf_counter()
+    result = (run_old if mode == "old" else run_new)(num_posts, max_pages)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{mode}\t{result['pages']}\t{result['max_queue']}\t"
+        f"{rss_mb:.1f}\t{elapsed:.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--pages", type=int, default=20_000)
+    parser.add_argument("--mode", choices=["old", "new"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.posts, args.pages)
+        return
+
+    print(f"Simulated site: {args.posts} posts, crawling {args.pages} pages\n")
+    print(f"{'mode':<6}{'pages':>8}{'max queue':>12}{'peak RSS MB':>14}{'secs':>8}")
+    for mode in ("old", "new"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode,
+             "--posts", str(args.posts), "--pages", str(args.pages)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        print(f"{out[0]:<6}{out[1]:>8}{out[2]:>12}{out[3]:>14}{out[4]:>8}")
+
+
+if __name__ == "__main__":
+    main()
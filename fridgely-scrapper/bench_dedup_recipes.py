@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: near-duplicate detection (dedup_recipes.py) on a synthetic corpus.
+
+Generates distinct recipes from a cooking vocabulary, then adds near
+duplicates of some of them (a few words changed, lines dropped, a shorter
+"ingredients" field – like a repost or the same WP recipe under another
+URL). Reports the time per stage and how many injected duplicates were
+found (recall) and how many records were wrongly merged.
+
+Example:
+  python bench_dedup_recipes.py --recipes 100000 --dup_rate 0.1
+"""
+
+import argparse
+import random
+import time
+
+from dedup_recipes import (
+    DEFAULT_BANDS,
+    DEFAULT_NUM_PERM,
+    DEFAULT_THRESHOLD,
+    candidate_pairs,
+    estimated_similarity,
+    find_clusters,
+    minhash_signatures,
+    recipe_text,
+)
+
+WORDS = (
+    "cup cups tbsp tsp g kg ml onion onions tomato tomatoes garlic ginger chilli "
+    "green red chana dal toor moong rice basmati water salt turmeric cumin "
+    "coriander garam masala ghee oil mustard seeds curry leaves paneer potato "
+    "peas cauliflower spinach cream milk yogurt lemon juice sugar jaggery "
+    "heat pan add stir cook minutes until soft golden boil simmer cover lid "
+    "serve hot garnish chopped sliced diced fresh dry roast grind paste mix "
+    "well pressure cooker whistles soak overnight drain rinse knead dough roll"
+).split()
+
+
+def make_recipe(rng: random.Random, i: int):
+    lines = [" ".join(rng.choices(WORDS, k=rng.randint(4, 12))) for _ in range(rng.randint(6, 25))]
+    ingredients = "\n".join(lines[: len(lines) // 3])
+    return {
+        "title": f"Recipe {i}",
+        "recipe_text": "\n".join(lines),
+        "ingredients": ingredients,
+        "upvotes": rng.randint(0, 500),
+    }
+
+
+def near_copy(rng: random.Random, recipe, edit_rate: float):
+    lines = recipe["recipe_text"].split("\n")
+    if len(lines) > 8 and rng.random() < 0.5:
+        del lines[rng.randrange(len(lines))]
+    edited = []
+    for line in lines:
+        words = line.split()
+        for w in range(len(words)):
+            if rng.random() < edit_rate:
+                words[w] = rng.choice(WORDS)
+        edited.append(" ".join(words))
+    return dict(
+        recipe,
+        title=recipe["title"] + " (repost)",
+        recipe_text="\n".join(edited),
+        upvotes=rng.randint(0, 500),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--dup_rate", type=float, default=0.1,
+                        help="Share of the corpus that are near copies.")
+    parser.add_argument("--edit_rate", type=float, default=0.03,
+                        help="Share of words changed in a near copy.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    n_dups = int(args.recipes * args.dup_rate)
+    originals = [make_recipe(rng, i) for i in range(args.recipes - n_dups)]
+    recipes = list(originals)
+    origin = list(range(len(originals)))  # which original each record copies
+    for _ in range(n_dups):
+        source = rng.randrange(len(originals))
+        recipes.append(near_copy(rng, originals[source], args.edit_rate))
+        origin.append(source)
+    order = list(range(len(recipes)))
+    rng.shuffle(order)
+    recipes = [recipes[i] for i in order]
+    origin = [origin[i] for i in order]
+    print(f"Corpus: {len(recipes)} recipes, {n_dups} near copies "
+          f"({args.edit_rate:.0%} of words edited)\n")
+
+    timings = []
+    start = time.perf_counter()
+    sig, active = minhash_signatures([recipe_text(r) for r in recipes], DEFAULT_NUM_PERM)
+    timings.append(("signatures", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    pairs = candidate_pairs(sig, DEFAULT_BANDS, active)
+    timings.append(("lsh", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    similar = pairs[estimated_similarity(sig, pairs) >= DEFAULT_THRESHOLD]
+    clusters = find_clusters(similar.tolist(), len(recipes))
+    timings.append(("verify+cluster", time.perf_counter() - start))
+
+    total = sum(secs for _, secs in timings)
+    for name, secs in timings:
+        print(f"  {name:<16}{secs:>7.2f}s")
+    print(f"  {'total':<16}{total:>7.2f}s  ({len(recipes) / total:,.0f} recipes/sec)")
+
+    # Expected: every record copying the same original lands in one cluster
+    found = sum(len(c) - 1 for c in clusters)
+    wrong = sum(len(c) - len({origin[i] for i in c}) < len(c) - 1 for c in clusters)
+    expected = len(recipes) - len(set(origin))
+    merged_ok = sum(len(c) - len({origin[i] for i in c}) for c in clusters)
+    print(f"\nCandidate pairs: {len(pairs)}, similar: {len(similar)}")
+    print(f"Duplicates dropped: {found} (expected {expected}), "
+          f"recall {merged_ok / max(expected, 1):.1%}, clusters mixing originals: {wrong}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Firestore import, sequential batches vs BulkWriter upserts,
+and a nightly sync against a manifest.
+
+Starts a local server speaking the Firestore RPCs the importers use
+(Commit for db.batch(), BatchWrite for the BulkWriter, BatchGetDocuments
+for sync lookups) with a latency of --latency per RPC plus
+--write_latency per write in it. BatchWrite also rejects a share of
+writes with ABORTED (contention) and throttles writes above --capacity
+per second with RESOURCE_EXHAUSTED, so retries get exercised. Then
+imports the same synthetic recipes twice with
+
+  - the previous importer: one 400-write batch committed at a time, with
+    auto-generated document IDs
+  - firebase_import_recipes.import_recipes (BulkWriter, ID from the URL)
+
+and reports docs/sec and how many documents the collection holds after
+the second run (the previous importer duplicates every recipe).
+
+Finally it syncs the recipes with --manifest, "likes" some documents the
+way the app would, re-scrapes (every created_at changes, --change_rate of
+the recipes are edited, some removed and some added) and syncs again,
+reporting the writes each sync made and whether the likes survived.
+
+Pass --emulator HOST:PORT to run against the Firestore emulator instead
+of the fake server (no errors injected then).
+
+Example:
+  python bench_firestore_import.py --recipes 20000 --ops_per_second 2000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import grpc
+from google.cloud.firestore_v1.types import document as document_types
+from google.cloud.firestore_v1.types import firestore as firestore_types
+from google.cloud.firestore_v1.types import write as write_types
+from google.rpc import status_pb2
+
+import firebase_import_recipes
+
+SERVICE = "google.firestore.v1.Firestore"
+# What the "app" sets user_likes to in the sync scenario
+APP_LIKES = 7
+# Side channel for the benchmark itself: collection sizes and error counts
+STATS_METHOD = "/bench.FakeFirestore/Stats"
+
+
+class FakeFirestore:
+    """Documents by name, plus injected latency, contention and throttling."""
+
+    def __init__(self, latency: float, write_latency: float, abort_rate: float,
+                 capacity: int, seed: int = 1):
+        self.latency = latency
+        self.write_latency = write_latency
+        self.abort_rate = abort_rate
+        self.capacity = capacity
+        self.docs = {}
+        self.rpcs = 0
+        self.aborted = 0
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._second = 0
+        self._writes_this_second = 0
+        self._lock = threading.Lock()
+
+    def stats(self, request: bytes, context) -> bytes:
+        collection = json.loads(request)["collection"]
+        with self._lock:
+            docs = [fields for name, fields in self.docs.items()
+                    if f"/documents/{collection}/" in name]
+            liked = sum("user_likes" in fields
+                        and fields["user_likes"].integer_value == APP_LIKES
+                        for fields in docs)
+            return json.dumps({"size": len(docs), "liked": liked, "aborted": self.aborted,
+                               "throttled": self.throttled}).encode()
+
+    def _apply(self, w) -> None:
+        """Apply one Write: delete, set, or merge by its update mask."""
+        if w.delete:
+            self.docs.pop(w.delete, None)
+            return
+        fields = dict(w.update.fields)
+        mask = list(w.update_mask.field_paths)
+        if not mask:
+            self.docs[w.update.name] = fields
+            return
+        doc = dict(self.docs.get(w.update.name, {}))
+        for path in mask:
+            if path in fields:
+                doc[path] = fields[path]
+            else:
+                doc.pop(path, None)
+        self.docs[w.update.name] = doc
+
+    def _status(self) -> int:
+        """gRPC code for the next write: 0, ABORTED (10) or RESOURCE_EXHAUSTED (8)."""
+        second = int(time.monotonic())
+        if second != self._second:
+            self._second, self._writes_this_second = second, 0
+        self._writes_this_second += 1
+        if self._writes_this_second > self.capacity:
+            self.throttled += 1
+            return 8
+        if self._rng.random() < self.abort_rate:
+            self.aborted += 1
+            return 10
+        return 0
+
+    def batch_write(self, request, context):
+        time.sleep(self.latency + self.write_latency * len(request.writes))
+        now = datetime.now(timezone.utc)
+        statuses, results = [], []
+        with self._lock:
+            self.rpcs += 1
+            for w in request.writes:
+                code = self._status()
+                if code == 0:
+                    self._apply(w)
+                statuses.append(status_pb2.Status(code=code, message="" if code == 0
+                                                  else "injected error"))
+                results.append(write_types.WriteResult(update_time=now) if code == 0
+                               else write_types.WriteResult())
+        return firestore_types.BatchWriteResponse(write_results=results, status=statuses)
+
+    def commit(self, request, context):
+        time.sleep(self.latency + self.write_latency * len(request.writes))
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            self.rpcs += 1
+            for w in request.writes:
+                self._apply(w)
+        return firestore_types.CommitResponse(
+            write_results=[write_types.WriteResult(update_time=now) for _ in request.writes],
+            commit_time=now,
+        )
+
+
+    def batch_get_documents(self, request, context):
+        time.sleep(self.latency)
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            self.rpcs += 1
+            found = {name: name in self.docs for name in request.documents}
+        for name, exists in found.items():
+            if exists:
+                yield firestore_types.BatchGetDocumentsResponse(
+                    found=document_types.Document(name=name), read_time=now)
+            else:
+                yield firestore_types.BatchGetDocumentsResponse(missing=name, read_time=now)
+
+
+def serve(fake: FakeFirestore, port, ready) -> None:
+    """Run the fake in its own process, so it doesn't compete for the client's GIL."""
+    handlers = {
+        "BatchWrite": grpc.unary_unary_rpc_method_handler(
+            fake.batch_write,
+            request_deserializer=firestore_types.BatchWriteRequest.deserialize,
+            response_serializer=firestore_types.BatchWriteResponse.serialize,
+        ),
+        "Commit": grpc.unary_unary_rpc_method_handler(
+            fake.commit,
+            request_deserializer=firestore_types.CommitRequest.deserialize,
+            response_serializer=firestore_types.CommitResponse.serialize,
+        ),
+        "BatchGetDocuments": grpc.unary_stream_rpc_method_handler(
+            fake.batch_get_documents,
+            request_deserializer=firestore_types.BatchGetDocumentsRequest.deserialize,
+            response_serializer=firestore_types.BatchGetDocumentsResponse.serialize,
+        ),
+    }
+    server = grpc.server(ThreadPoolExecutor(max_workers=64))
+    server.add_generic_rpc_handlers([
+        grpc.method_handlers_generic_handler(SERVICE, handlers),
+        grpc.method_handlers_generic_handler("bench.FakeFirestore", {
+            "Stats": grpc.unary_unary_rpc_method_handler(fake.stats),
+        }),
+    ])
+    port.value = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    ready.set()
+    server.wait_for_termination()
+
+
+def make_recipe(i: int, scraped_at: str = "2026-01-01T00:00:00Z"):
+    return {
+        "title": f"Recipe {i}",
+        "recipe_text": f"Step {i}: cook the dal until soft. " * 8,
+        "ingredients": "1 cup toor dal\n2 tomatoes\n1 tsp cumin",
+        "upvotes": i % 500,
+        "source_url": f"https://example-recipes.test/recipe-{i}/",
+        "created_at": scraped_at,
+        "user_likes": 0,
+        "user_rating": 0.0,
+        "user_comments": [],
+    }
+
+
+def previous_import(db, recipes, collection_name, batch_size=400):
+    """The importer before BulkWriter: sequential commits, auto-generated IDs."""
+    batch = db.batch()
+    pending = 0
+    for recipe in recipes:
+        batch.set(db.collection(collection_name).document(), recipe)
+        pending += 1
+        if pending == batch_size:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--recipes", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.1,
+                        help="Seconds the fake server takes per RPC...")
+    parser.add_argument("--write_latency", type=float, default=0.001,
+                        help="...plus this much per write in it.")
+    parser.add_argument("--abort_rate", type=float, default=0.02,
+                        help="Share of BatchWrite writes failing with ABORTED.")
+    parser.add_argument("--capacity", type=int, default=4000,
+                        help="Writes per second before RESOURCE_EXHAUSTED.")
+    parser.add_argument("--ops_per_second", type=int, default=2000,
+                        help="BulkWriter initial ops/sec.")
+    parser.add_argument("--change_rate", type=float, default=0.005,
+                        help="Share of recipes edited (and removed, and added) "
+                             "between syncs.")
+    parser.add_argument("--likes", type=int, default=100,
+                        help="Documents the app likes between syncs.")
+    parser.add_argument("--emulator", metavar="HOST:PORT",
+                        help="Use a running Firestore emulator instead of the fake.")
+    args = parser.parse_args()
+
+    stats = None
+    host = args.emulator
+    if host is None:
+        fake = FakeFirestore(args.latency, args.write_latency, args.abort_rate,
+                             args.capacity)
+        port, ready = multiprocessing.Value("i", 0), multiprocessing.Event()
+        server = multiprocessing.Process(target=serve, args=(fake, port, ready), daemon=True)
+        server.start()
+        ready.wait()
+        host = f"127.0.0.1:{port.value}"
+        stats = grpc.insecure_channel(host).unary_unary(STATS_METHOD)
+        print(f"Fake Firestore at {host}: {args.latency * 1000:.0f} ms/RPC + "
+              f"{args.write_latency * 1000:.1f} ms/write, "
+              f"{args.abort_rate:.0%} of BatchWrite writes aborted, "
+              f"throttled above {args.capacity} writes/sec\n")
+    db = firebase_import_recipes.init_firestore(None, emulator=host)
+    recipes = [make_recipe(i) for i in range(args.recipes)]
+    run_id = os.urandom(4).hex()
+
+    def fake_stats(collection=""):
+        return json.loads(stats(json.dumps({"collection": collection}).encode()))
+
+    def count(collection):
+        if stats is not None:
+            return fake_stats(collection)["size"]
+        return db.collection(collection).count().get()[0][0].value
+
+    def count_liked(collection):
+        if stats is not None:
+            return fake_stats(collection)["liked"]
+        query = db.collection(collection).where("user_likes", "==", APP_LIKES)
+        return query.count().get()[0][0].value
+
+    print(f"{'importer':<26}{'run':>4}{'docs/sec':>10}{'retries':>9}{'docs in collection':>20}")
+    for label, collection in (("sequential batches", f"previous_{run_id}"),
+                              ("BulkWriter upserts", f"bulk_{run_id}")):
+        for run in (1, 2):
+            out = io.StringIO()
+            start = time.perf_counter()
+            retries = 0
+            with contextlib.redirect_stdout(out):
+                if label.startswith("sequential"):
+                    previous_import(db, recipes, collection)
+                else:
+                    progress = firebase_import_recipes.import_recipes(
+                        db, recipes, collection,
+                        initial_ops_per_second=args.ops_per_second,
+                    )
+                    retries = progress.retries
+            secs = time.perf_counter() - start
+            if "[!]" in out.getvalue():
+                print(out.getvalue())
+            print(f"{label:<26}{run:>4}{len(recipes) / secs:>10.0f}{retries:>9}"
+                  f"{count(collection):>20}")
+
+    # Nightly sync: only changed recipes are written, app likes survive
+    collection = f"sync_{run_id}"
+    rng = random.Random(1)
+    n_changes = int(len(recipes) * args.change_rate)
+    rescraped = [make_recipe(i, scraped_at="2026-01-02T00:00:00Z")
+                 for i in range(len(recipes) + n_changes)]
+    for i in rng.sample(range(len(recipes)), n_changes):
+        rescraped[i]["recipe_text"] += " Updated by the author."
+    removed = set(rng.sample(range(len(recipes)), n_changes))
+    rescraped = [r for i, r in enumerate(rescraped) if i not in removed]
+    liked = [i for i in rng.sample(range(len(recipes)), args.likes + n_changes)
+             if i not in removed][:args.likes]
+
+    print(f"\n{'sync':<20}{'created':>9}{'updated':>9}{'deleted':>9}{'unchanged':>11}"
+          f"{'secs':>7}{'docs':>8}{'likes kept':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = os.path.join(tmp, "manifest.json")
+        for label, batch in (("first sync", recipes), ("nightly re-scrape", rescraped),
+                             ("nothing changed", rescraped)):
+            out = io.StringIO()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(out):
+                progress = firebase_import_recipes.sync_recipes(
+                    db, batch, collection, manifest,
+                    initial_ops_per_second=args.ops_per_second,
+                )
+            secs = time.perf_counter() - start
+            if "[!]" in out.getvalue():
+                print(out.getvalue())
+            print(f"{label:<20}{progress.created:>9}{progress.updated:>9}"
+                  f"{progress.deleted:>9}{progress.unchanged:>11}{secs:>7.1f}"
+                  f"{count(collection):>8}{count_liked(collection):>12}")
+            if label == "first sync":
+                # The app records feedback between scrapes
+                for i in liked:
+                    doc_id = firebase_import_recipes.recipe_doc_id(recipes[i])
+                    db.collection(collection).document(doc_id).update(
+                        {"user_likes": APP_LIKES})
+                print(f"{'(app likes ' + str(len(liked)) + ' recipes)':<76}"
+                      f"{count_liked(collection):>12}")
+
+    if stats is not None:
+        injected = fake_stats()
+        print(f"\nInjected: {injected['aborted']} aborted, "
+              f"{injected['throttled']} throttled writes")
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ingredient name matching with a large synonym table.
+
+Compares, on the same synthetic ingredient lines:
+
+  loop : `for key in table: if key in line` – what get_nutrition_for_ingredient
+         used to do over MANUAL_NUTRITION
+  ac   : IngredientMatcher (word-level Aho-Corasick, one pass per line)
+
+The table is the real nutrition_helper names padded with generated
+synonyms (one to three made-up words each) up to --synonyms entries. The
+matcher's answers are also checked against a brute-force
+word-boundary / longest-match reference on a sample of lines.
+
+Example:
+  python bench_ingredient_matcher.py --synonyms 10000 --lines 20000
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional
+
+from ingredient_matcher import IngredientMatcher, tokenize
+from nutrition_helper import INGREDIENT_MAP, INGREDIENT_SYNONYMS, MANUAL_NUTRITION
+
+SYLLABLES = ["ka", "ra", "mi", "chu", "pa", "lo", "ne", "ti", "go", "su",
+             "va", "dha", "ru", "ba", "kke", "lli", "ja", "ma", "shi", "te"]
+FILLER = ["cup", "cups", "tbsp", "tsp", "chopped", "finely", "fresh", "grated",
+          "to", "taste", "g", "soaked", "overnight", "a", "pinch", "of", "large"]
+
+
+def make_table(size: int, rng: random.Random) -> Dict[str, str]:
+    table = {name: name for name in list(MANUAL_NUTRITION) + list(INGREDIENT_MAP)}
+    table.update(INGREDIENT_SYNONYMS)
+    keys = list(MANUAL_NUTRITION)
+    while len(table) < size:
+        words = [
+            "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(rng.choice((1, 1, 2, 3)))
+        ]
+        table[" ".join(words)] = rng.choice(keys)
+    return table
+
+
+def make_lines(table: Dict[str, str], count: int, rng: random.Random) -> List[str]:
+    names = list(table)
+    lines = []
+    for _ in range(count):
+        words = [f"{rng.randint(1, 3)}"] + rng.sample(FILLER, 3)
+        if rng.random() < 0.8:
+            words.insert(rng.randrange(1, len(words)), rng.choice(names))
+        lines.append(" ".join(words))
+    return lines
+
+
+def loop_find(table: Dict[str, str], line: str) -> Optional[str]:
+    for key, value in table.items():
+        if key in line:
+            return value
+    return None
+
+
+def reference_find(table: Dict[str, str], line: str) -> Optional[str]:
+    """Brute force: longest whole-word match, leftmost on ties."""
+    words = tokenize(line)
+    best = None
+    for start in range(len(words)):
+        for end in range(start + 1, len(words) + 1):
+            name = " ".join(words[start:end])
+            if name in table and (best is None or end - start > best[0]):
+                best = (end - start, table[name])
+    return best[1] if best else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--synonyms", type=int, default=10_000)
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    table = make_table(args.synonyms, rng)
+    lines = make_lines(table, args.lines, rng)
+    # Lookup keys as the reference sees them (tokenised, single-spaced)
+    normalized = {" ".join(tokenize(k)): v for k, v in table.items()}
+
+    start = time.perf_counter()
+    matcher = IngredientMatcher(table)
+    matcher.find("")  # force the automaton build
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Table: {len(table)} names, {len(lines)} lines "
+          f"(automaton build {build_ms:.0f} ms)\n")
+    print(f"{'method':<8}{'lines/sec':>12}{'matched':>10}")
+
+    results = {}
+    for name, find in (("loop", lambda line: loop_find(table, line)),
+                       ("ac", matcher.find)):
+        start = time.perf_counter()
+        found = [find(line) for line in lines]
+        rate = len(lines) / (time.perf_counter() - start)
+        results[name] = found
+        matched = sum(1 for f in found if f is not None)
+        print(f"{name:<8}{rate:>12.0f}{matched:>10}")
+
+    sample = lines[:2000]
+    same = sum(
+        1 for line, got in zip(sample, results["ac"])
+        if got == reference_find(normalized, line)
+    )
+    print(f"\nac agrees with brute-force reference: {same}/{len(sample)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ingredient line parsing throughput.
+
+Parses synthetic ingredient lines in the shapes our scrapers produce (WPRM
+"▢" lines, Unicode fractions, ranges, can sizes, Indian units, markdown
+bullets from Reddit, "salt to taste" …) and reports lines/sec. The target
+is 100k+ lines/sec so parsing never becomes the bottleneck of
+nutrition_helper.py. Also checks the grams of a few hand-picked lines,
+capitalised ones included, since scraped lines usually start with one.
+
+Example:
+  python bench_ingredient_parser.py --lines 500000
+"""
+
+import argparse
+import random
+import time
+
+from ingredient_parser import parse_ingredient_line
+
+AMOUNTS = ["1", "2", "1½", "1 ½", "¾", "1/2", "1 1/2", "2-3", "2 – 3", "1 to 2",
+           "200", "0.5", "a", "2 (15 oz)", "2 – 15"]
+UNITS = ["cup", "cups", "tbsp", "tsp", "g", "kg", "ml", "katori", "oz", "can",
+         "pinch", "cloves", "inch", ""]
+NAMES = ["onions", "tomatoes", "toor dal", "basmati rice", "water", "ghee",
+         "green chillies", "turmeric powder", "garam masala", "paneer",
+         "chickpeas", "coconut milk", "curry leaves", "atta", "olive oil"]
+NOTES = ["", ", finely chopped", ", soaked overnight", " (optional)",
+         ", washed and drained", " (or 1 cup puree)"]
+PREFIXES = ["", "▢ ", "* ", "- ", "• "]
+OTHER = ["Salt to taste", "Oil for frying", "For the tempering:", "",
+         "Fresh coriander leaves for garnish", "A pinch of hing",
+         "A handful of coriander leaves", "An onion, sliced"]
+
+# line -> expected grams
+CHECKS = {
+    "a pinch of hing": 0.3,
+    "A pinch of hing": 0.3,
+    "A handful of coriander leaves": 30.0,
+    "An onion": 110.0,
+    "2 cans (400g) tomatoes": 800.0,
+    "1 (400G) can tomatoes": 400.0,
+    "1 cup (200 G) rice": 200.0,
+}
+
+
+def make_lines(count: int, rng: random.Random):
+    lines = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            lines.append(rng.choice(OTHER))
+            continue
+        unit = rng.choice(UNITS)
+        lines.append(
+            f"{rng.choice(PREFIXES)}{rng.choice(AMOUNTS)} {unit + ' ' if unit else ''}"
+            f"{rng.choice(NAMES)}{rng.choice(NOTES)}"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines, random.Random(args.seed))
+    start = time.perf_counter()
+    parsed = [parse_ingredient_line(line) for line in lines]
+    secs = time.perf_counter() - start
+
+    with_qty = sum(1 for p in parsed if p is not None and p.quantity is not None)
+    skipped = sum(1 for p in parsed if p is None)
+    print(f"Parsed {len(lines)} lines in {secs:.2f}s: {len(lines) / secs:,.0f} lines/sec")
+    print(f"  with a quantity: {with_qty}, headings/blank: {skipped}")
+    for line, p in list(zip(lines, parsed))[:8]:
+        print(f"  {line!r:<48} -> {p}")
+
+    wrong = [(line, grams, parse_ingredient_line(line)) for line, grams in CHECKS.items()
+             if abs(parse_ingredient_line(line).grams - grams) > 1e-6]
+    print(f"Checked lines: {len(CHECKS) - len(wrong)}/{len(CHECKS)} as expected")
+    for line, grams, p in wrong:
+        print(f"  [!] {line!r}: expected {grams} g, got {p}")
+
+
+if __name__ == "__main__":
+    main()
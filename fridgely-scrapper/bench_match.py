@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: top-K recipe matching for batches of fridge inventories.
+
+For each corpus size, builds a recipe_index.RecipeIndex over synthetic
+recipes (ingredients drawn from a Zipf-like popularity curve, so a few
+are in most recipes and most are rare) and matches the same synthetic
+inventories with:
+
+  - a full scan: every recipe's ingredient set intersected with the
+    inventory in Python (on a sample of the inventories)
+  - RecipeIndex.rank(), one inventory at a time over the posting lists
+  - match.RecipeMatcher.top_k(), all inventories in sparse-matrix blocks,
+    by coverage and by weighted score
+
+and reports inventories/sec for each, checking that the coverage results
+agree.
+
+Example:
+  python bench_match.py
+  python bench_match.py --sizes 10000 100000 --inventories 5000
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from match import RecipeMatcher
+from recipe_index import RecipeIndex, canonical_name
+
+SYLLABLES = "ka ro mi zu te la vo ni da pe gu shi mo ra ye bu".split()
+
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    """Distinct made-up ingredient names that canonicalise to themselves."""
+    names = set()
+    while len(names) < size:
+        name = " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+                        for _ in range(rng.randint(1, 2)))
+        if canonical_name(name) == name:
+            names.add(name)
+    return sorted(names)
+
+
+def popularity(size: int, exponent: float) -> np.ndarray:
+    weights = 1 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def make_recipes(count: int, vocabulary: List[str], p: np.ndarray,
+                 seed: int) -> Iterator[Dict[str, str]]:
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(4, 15, count)
+    picks = rng.choice(len(vocabulary), size=int(sizes.sum()), p=p)
+    pos = 0
+    for i, size in enumerate(sizes):
+        names = [vocabulary[j] for j in picks[pos:pos + size]]
+        pos += size
+        yield {"source_url": f"https://example.com/recipes/{i}",
+               "ingredients": "\n".join(f"1 cup {name}" for name in names)}
+
+
+def make_inventories(count: int, vocabulary: List[str], p: np.ndarray,
+                     seed: int) -> List[List[str]]:
+    rng = np.random.default_rng(seed + 1)
+    return [[vocabulary[j] for j in rng.choice(len(vocabulary), size=rng.integers(10, 31), p=p)]
+            for _ in range(count)]
+
+
+def full_scan(recipe_sets: List[frozenset], needed: np.ndarray, recipe_ids: List[str],
+              items: List[str], k: int) -> List[str]:
+    inventory = {canonical_name(item) for item in items}
+    scored = []
+    for recipe, names in enumerate(recipe_sets):
+        available = len(names & inventory)
+        if available:
+            scored.append((-available / max(needed[recipe], 1), -available, recipe))
+    scored.sort()
+    return [recipe_ids[recipe] for _, _, recipe in scored[:k]]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="Corpus sizes (recipes).")
+    parser.add_argument("--vocabulary", type=int, default=1500,
+                        help="Distinct synthetic ingredients.")
+    parser.add_argument("--zipf", type=float, default=1.0,
+                        help="Popularity exponent: ingredient r is used in proportion to 1/r**zipf.")
+    parser.add_argument("--inventories", type=int, default=1000)
+    parser.add_argument("--scan_sample", type=int, default=10,
+                        help="Inventories timed with the full scan.")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    p = popularity(len(vocabulary), args.zipf)
+    inventories = make_inventories(args.inventories, vocabulary, p, args.seed)
+
+    print(f"{'recipes':>9}{'build s':>9}{'index MB':>10}{'full scan/s':>13}"
+          f"{'rank()/s':>10}{'batch/s':>10}{'weighted/s':>12}  agree")
+    for size in args.sizes:
+        index, build = timed(RecipeIndex.build, make_recipes(size, vocabulary, p, args.seed))
+        index_mb = (index.postings.nbytes + index.bitsets.nbytes + index.totals.nbytes
+                    + 20 * len(index)) / 1e6
+        matcher = RecipeMatcher(index)
+
+        # Full scan over the indexed ingredient sets, on a sample
+        recipe_sets = [frozenset(index.ingredients_of(r)) for r in range(len(index))]
+        sample = inventories[:args.scan_sample]
+        scanned, scan_time = timed(lambda: [full_scan(recipe_sets, matcher.needed, index.recipe_ids,
+                                                      items, args.k) for items in sample])
+        ranked, rank_time = timed(lambda: [[m[0] for m in index.rank(items, args.k)]
+                                           for items in inventories])
+        batch, batch_time = timed(matcher.top_k, inventories, args.k, "coverage")
+        _, weighted_time = timed(matcher.top_k, inventories, args.k, "weighted")
+
+        batch_ids = [[m.recipe_id for m in matches] for matches in batch]
+        agree = batch_ids == ranked and batch_ids[:len(sample)] == scanned
+        n = len(inventories)
+        print(f"{size:>9,}{build:>9.1f}{index_mb:>10.1f}{len(sample) / scan_time:>13.1f}"
+              f"{n / rank_time:>10.0f}{n / batch_time:>10.0f}{n / weighted_time:>12.0f}  {agree}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-recipe vs batch (sparse matrix) nutrition estimation.
+
+Builds a synthetic corpus whose ingredient lines all resolve through the
+manual nutrition table and synonyms (so no USDA lookups happen), then runs
+
+  scalar : estimate_recipe_nutrition() recipe by recipe
+  batch  : estimate_nutrition_batch() over the whole corpus
+
+and checks that both give identical per-serving values.
+
+Example:
+  python bench_nutrition_batch.py --recipes 50000
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from nutrition_helper import (
+    INGREDIENT_SYNONYMS,
+    MANUAL_NUTRITION,
+    estimate_nutrition_batch,
+    estimate_recipe_nutrition,
+)
+
+PREFIXES = ["1 cup", "2 tbsp", "200 g", "1/2 tsp", "3", "1 large", "a handful of"]
+
+
+def make_recipes(count: int, rng: random.Random):
+    names = list(MANUAL_NUTRITION) + [
+        s for s, key in INGREDIENT_SYNONYMS.items() if key in MANUAL_NUTRITION
+    ]
+    recipes = []
+    for i in range(count):
+        lines = [
+            f"{rng.choice(PREFIXES)} chopped {rng.choice(names)}"
+            for _ in range(rng.randint(3, 20))
+        ]
+        recipes.append({"title": f"Recipe {i}", "ingredients": "\n".join(lines)})
+    return recipes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--recipes", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    recipes = make_recipes(args.recipes, random.Random(args.seed))
+    print(f"Corpus: {len(recipes)} recipes\n")
+
+    # Silence the per-recipe progress prints of the scalar path
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        scalar = [estimate_recipe_nutrition(r) for r in recipes]
+        scalar_secs = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = estimate_nutrition_batch(recipes)
+        batch_secs = time.perf_counter() - start
+
+    print(f"{'path':<8}{'recipes/sec':>14}{'secs':>8}")
+    print(f"{'scalar':<8}{len(recipes) / scalar_secs:>14.0f}{scalar_secs:>8.2f}")
+    print(f"{'batch':<8}{len(recipes) / batch_secs:>14.0f}{batch_secs:>8.2f}")
+    same = sum(1 for a, b in zip(scalar, batch) if a == b)
+    print(f"\nIdentical results: {same}/{len(recipes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HTML parser backends for wp_recipe_scraper.
+
+Parses a corpus of recipe pages with every backend in PARSER_BACKENDS,
+checks that title / ingredients / instructions match the html.parser
+output exactly, and reports pages/sec per backend.
+
+The corpus is either a directory of saved pages (*.html, e.g. from
+`curl -o`) or, by default, synthetic WP pages of realistic size (~300 KB of
+menus, sidebars, scripts and comments around a WPRM card or a plain
+"Ingredients" heading section).
+
+Example:
+  python bench_parsers.py --html_dir saved_pages/
+  python bench_parsers.py --pages 40
+"""
+
+import argparse
+import glob
+import random
+import time
+from typing import Dict, List
+
+from wp_recipe_scraper import (
+    PARSER_BACKENDS,
+    extract_ingredients_and_instructions,
+    extract_title,
+    make_document,
+)
+
+
+def synthetic_page(seed: int) -> str:
+    """One fake WordPress recipe page (WPRM card or heading-based layout)."""
+    rng = random.Random(seed)
+    words = ["onion", "tomato", "masala", "ghee", "jeera", "dal", "rice",
+             "stir", "simmer", "until", "golden", "add", "the", "and"]
+
+    def sentence(n: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(n))
+
+    menu = "".join(
+        f'<li class="menu-item"><a href="/category/c{i}/">{sentence(2)}</a></li>'
+        for i in range(800)
+    )
+    sidebar = "".join(
+        f'<div class="widget"><h3>{sentence(3)}</h3><p>{sentence(40)}</p></div>'
+        for i in range(150)
+    )
+    comments = "".join(
+        f'<li class="comment"><p>{sentence(30)}</p><!-- c{i} --></li>'
+        for i in range(600)
+    )
+    ingredients = [
+        f"<li>▢ <span>{rng.randint(1, 4)}½</span> <span>cups</span> "
+        f"<span>{sentence(2)}</span> <em>({sentence(3)})</em>&nbsp;</li>"
+        for _ in range(rng.randint(6, 15))
+    ]
+    steps = [f"<li><p>▢ {sentence(25)} &amp; {sentence(5)}</p></li>"
+             for _ in range(rng.randint(4, 10))]
+
+    if seed % 3:
+        card = (
+            '<div class="wprm-recipe-container">'
+            f'<div class="wprm-recipe-ingredients"><ul>{"".join(ingredients)}</ul></div>'
+            f'<div class="wprm-recipe-instructions"><ol>{"".join(steps)}</ol></div>'
+            "</div>"
+        )
+    else:
+        card = (
+            f"<h2>Why you'll love it</h2><p>{sentence(60)}</p>"
+            f"<h2>Ingredients</h2>\n<ul>{''.join(ingredients)}</ul>"
+            f"<h3>Method</h3><p>{sentence(30)}</p><ol>{''.join(steps)}</ol>"
+        )
+
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>{sentence(4)} Recipe &amp; Tips</title>"
+        f"<script>var wp = {{'nonce': '{seed}'}};</script>"
+        f"<style>.a{{color:red}}</style></head><body>"
+        f"<nav><ul>{menu}</ul></nav><main><article>"
+        f"<h1>{sentence(3)} <span>Recipe</span></h1>"
+        f"{''.join(f'<p>{sentence(80)}</p>' for _ in range(200))}"
+        f"{card}"
+        f"</article><ol class=\"comments\">{comments}</ol></main>"
+        f"<aside>{sidebar}</aside></body></html>"
+    )
+
+
+def extract(html: str, parser: str) -> Dict[str, str]:
+    doc = make_document(html, parser)
+    result = extract_ingredients_and_instructions(doc)
+    result["title"] = extract_title(doc, "")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--html_dir", help="Directory of saved *.html pages.")
+    parser.add_argument("--pages", type=int, default=30,
+                        help="Synthetic pages to generate (without --html_dir).")
+    args = parser.parse_args()
+
+    if args.html_dir:
+        pages: List[str] = []
+        for path in sorted(glob.glob(f"{args.html_dir}/*.html")):
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+    else:
+        pages = [synthetic_page(i) for i in range(args.pages)]
+
+    if not pages:
+        print("[!] No pages to benchmark.")
+        return
+
+    avg_kb = sum(len(p) for p in pages) / len(pages) / 1024
+    print(f"Corpus: {len(pages)} pages, avg {avg_kb:.0f} KB\n")
+
+    baseline = [extract(html, "html.parser") for html in pages]
+
+    print(f"{'backend':<12}{'pages/sec':>10}{'speedup':>9}{'identical':>11}")
+    base_rate = None
+    for backend in PARSER_BACKENDS:
+        try:
+            make_document("", backend)
+        except Exception as e:
+            print(f"{backend:<12}  skipped ({e})")
+            continue
+
+        start = time.perf_counter()
+        results = [extract(html, backend) for html in pages]
+        rate = len(pages) / (time.perf_counter() - start)
+        base_rate = base_rate or rate
+        same = sum(1 for a, b in zip(baseline, results) if a == b)
+        print(f"{backend:<12}{rate:>10.1f}{rate / base_rate:>8.1f}x"
+              f"{same:>6}/{len(pages)}")
+
+
+if __name__ == "__main__":
+    main()
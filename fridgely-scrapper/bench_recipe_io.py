@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: reading a large JSON-array recipe file, whole vs streamed.
+
+Writes a synthetic recipe dump (a .json array, and the same gzipped),
+then reads every record from it with the previous json.load() reader
+and with read_records(), which now parses the array incrementally.
+Checks both give the same records and reports records/sec and peak
+traced memory (tracemalloc) for each.
+
+Example:
+  python bench_recipe_io.py --recipes 50000
+  python bench_recipe_io.py --input wp_recipes.json
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator
+
+from recipe_io import RecordWriter, open_text, read_records
+
+WORDS = ("onion tomato garlic ginger paneer chana dal rice ghee cumin masala "
+         "stir simmer until golden add the and with").split()
+
+
+def previous_read_records(path: str) -> Iterator[Dict[str, Any]]:
+    with open_text(path, "r") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError("Input JSON must be a list of recipe objects.")
+    yield from data
+
+
+def make_recipe(rng: random.Random, i: int) -> Dict[str, Any]:
+    def text(n: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    return {
+        "title": f"Recipe {i}: {text(4)}",
+        "source_url": f"https://example.com/recipes/{i}",
+        "ingredients": [f"{rng.randint(1, 4)} cups {rng.choice(WORDS)}"
+                        for _ in range(rng.randint(4, 14))],
+        "instructions": text(rng.randint(60, 200)),
+        "nutrition": {"calories": rng.randint(100, 900), "protein": rng.random() * 40},
+        "upvotes": rng.randint(0, 5000),
+    }
+
+
+def measure(reader: Callable, path: str):
+    """(records, fingerprint, seconds, peak bytes) for one full read."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = 0
+    titles = 0
+    for record in reader(path):
+        count += 1
+        titles = hash((titles, record.get("title")))
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, titles, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--input", nargs="*", default=[],
+                        help="JSON-array files to read instead of a synthetic dump.")
+    parser.add_argument("--recipes", type=int, default=50000,
+                        help="Recipes in the synthetic dump.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.input
+        if not paths:
+            rng = random.Random(args.seed)
+            paths = [os.path.join(tmp, "recipes.json"), os.path.join(tmp, "recipes.json.gz")]
+            for path in paths:
+                rng.seed(args.seed)
+                with RecordWriter(path) as writer:
+                    for i in range(args.recipes):
+                        writer.write(make_recipe(rng, i))
+
+        print(f"{'file':<22}{'MB':>8}{'reader':>10}{'records/s':>12}{'peak MB':>10}  identical")
+        for path in paths:
+            size = os.path.getsize(path) / 1e6
+            before = measure(previous_read_records, path)
+            after = measure(read_records, path)
+            same = before[:2] == after[:2]
+            name = os.path.basename(path)
+            for label, (count, _, seconds, peak) in (("json.load", before), ("stream", after)):
+                print(f"{name:<22}{size:>8.1f}{label:>10}{count / seconds:>12,.0f}"
+                      f"{peak / 1e6:>10.1f}  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial vs concurrent Reddit scraping against a fake Reddit API.
+
+Starts a local server speaking just enough of the Reddit API for PRAW
+(access token, /r/<sub>/top and /new listings, /api/info, /comments/<id>/
+trees), with a fixed latency per request and an X-Ratelimit budget per
+window that answers 429 once exhausted. Then runs reddit_recipe_scraper
+serially and with --workers N and checks that
+
+  - both write identical recipes
+  - neither run was ever rate limited (429)
+
+Finally it measures incremental mode (--state_file): a first run, a run
+after --new_posts posts per subreddit, and a run with nothing new.
+
+Example:
+  python bench_reddit_scraper.py --posts 200 --workers 8 --latency 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import reddit_recipe_scraper
+
+
+class ListWriter:
+    """Stands in for recipe_io.RecordWriter, keeping the records in memory."""
+
+    path = "<memory>"
+
+    def __init__(self):
+        self.records = []
+
+    @property
+    def count(self):
+        return len(self.records)
+
+    def write(self, record):
+        self.records.append(record)
+
+
+class FakeReddit:
+    """Deterministic subreddits, posts and comments plus a rate-limit window."""
+
+    def __init__(self, posts: int, latency: float, budget: int, window: float):
+        self.posts = posts
+        self.initial_posts = posts
+        self.latency = latency
+        self.budget = budget
+        self.window = window
+        self.requests = 0
+        self.rate_limited = 0
+        self._start = time.time()
+        self._window_start = time.monotonic()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Count a request; (allowed, remaining, used, seconds to reset)."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start, self._used = now, 0
+            self.requests += 1
+            self._used += 1
+            allowed = self._used <= self.budget
+            self.rate_limited += not allowed
+            reset = self.window - (now - self._window_start)
+            return allowed, max(0, self.budget - self._used), self._used, reset
+
+    def post(self, k: int, i: int, score_bonus: int = 0):
+        sub = reddit_recipe_scraper.SUBREDDITS[k]
+        post_id = f"s{k}p{i}"
+        return {
+            "kind": "t3",
+            "data": {
+                "id": post_id,
+                "name": f"t3_{post_id}",
+                # Every 10th title repeats across subreddits (dedup by title)
+                "title": f"Easy dinner recipe #{i}" if i % 10 == 0 else f"{sub} recipe {i}",
+                "selftext": f"Ingredients:\n{i % 5 + 1} cups rice\n2 onions\n"
+                            f"Instructions: cook it {i} minutes.",
+                "score": 1000 - i + score_bonus,
+                "stickied": i == 0,
+                "is_self": True,
+                "permalink": f"/r/{sub}/comments/{post_id}/",
+                # One post a day; posts added later arrive a second apart
+                "created_utc": self._start - (self.initial_posts - i) * 86400
+                               if i < self.initial_posts
+                               else self._start + i - self.initial_posts,
+                "author": f"user{i % 17}",
+                "subreddit": sub,
+                "num_comments": 3,
+            },
+        }
+
+    def _by_id(self, post_id: str):
+        k, i = post_id[1:].split("p")
+        return int(k), int(i)
+
+    def listing(self, sub: str, order: str, query):
+        k = reddit_recipe_scraper.SUBREDDITS.index(sub)
+        indices = list(range(self.posts))
+        if order == "new":
+            indices.reverse()
+        after = query.get("after", [None])[0]
+        limit = int(query.get("limit", ["25"])[0])
+        start = indices.index(self._by_id(after[3:])[1]) + 1 if after else 0
+        children = [self.post(k, i) for i in indices[start:start + limit]]
+        more = start + limit < len(indices)
+        return {
+            "kind": "Listing",
+            "data": {
+                "children": children,
+                "after": children[-1]["data"]["name"] if more else None,
+                "before": None,
+            },
+        }
+
+    def info(self, fullnames):
+        children = [self.post(*self._by_id(name[3:]), score_bonus=50)
+                    for name in fullnames]
+        return {"kind": "Listing", "data": {"children": children, "after": None}}
+
+    def comments(self, post_id: str):
+        post = self.post(*self._by_id(post_id))
+        comments = [
+            {
+                "kind": "t1",
+                "data": {
+                    "id": f"{post_id}c{j}",
+                    "name": f"t1_{post_id}c{j}",
+                    "body": f"Tip {j}: add more garlic to {post_id}, trust me.",
+                    "score": 40 * (j + 1),
+                    "author": f"commenter{j}",
+                    "link_id": f"t3_{post_id}",
+                    "parent_id": f"t3_{post_id}",
+                    "replies": "",
+                },
+            }
+            for j in range(3)
+        ]
+        return [
+            {"kind": "Listing", "data": {"children": [post], "after": None}},
+            {"kind": "Listing", "data": {"children": comments, "after": None}},
+        ]
+
+
+def make_handler(fake: FakeReddit):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body=None, headers=()):
+            payload = json.dumps(body).encode() if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._send(200, {"access_token": "fake", "token_type": "bearer",
+                             "expires_in": 86400, "scope": "*"})
+
+        def do_GET(self):
+            time.sleep(fake.latency)
+            allowed, remaining, used, reset = fake.take()
+            headers = [("x-ratelimit-remaining", f"{remaining:.1f}"),
+                       ("x-ratelimit-used", str(used)),
+                       ("x-ratelimit-reset", str(int(reset) + 1))]
+            if not allowed:
+                self._send(429, {"message": "Too Many Requests"}, headers)
+                return
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            match = re.fullmatch(r"/r/([^/]+)/(top|new)/?", url.path)
+            if match:
+                self._send(200, fake.listing(match.group(1), match.group(2), query),
+                           headers)
+                return
+            if re.fullmatch(r"/api/info/?", url.path):
+                self._send(200, fake.info(query["id"][0].split(",")), headers)
+                return
+            match = re.fullmatch(r"/comments/([^/]+)/?", url.path)
+            if match:
+                self._send(200, fake.comments(match.group(1)), headers)
+                return
+            self._send(404, {"message": "Not Found"}, headers)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def run(workers: int, base_url: str, **kwargs):
+    out = io.StringIO()
+    writer = ListWriter()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        reddit_recipe_scraper.scrape_to_writer(
+            writer, workers=workers, oauth_url=base_url, reddit_url=base_url, **kwargs
+        )
+    return writer.records, time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--posts", type=int, default=200, help="Posts per subreddit.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Seconds the fake API takes per request.")
+    parser.add_argument("--budget", type=int, default=600,
+                        help="Requests allowed per rate-limit window.")
+    parser.add_argument("--window", type=float, default=10.0,
+                        help="Rate-limit window in seconds.")
+    parser.add_argument("--new_posts", type=int, default=5,
+                        help="Posts per subreddit arriving between incremental runs.")
+    args = parser.parse_args()
+
+    fake = FakeReddit(args.posts, args.latency, args.budget, args.window)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Fake Reddit API at {base_url}: {len(reddit_recipe_scraper.SUBREDDITS)} "
+          f"subreddits x {args.posts} posts, {args.latency * 1000:.0f} ms/request, "
+          f"{args.budget} requests per {args.window:.0f}s\n")
+
+    print(f"{'workers':<9}{'recipes':>9}{'requests':>10}{'429s':>6}{'secs':>8}")
+    results = []
+    for workers in (1, args.workers):
+        requests_before, limited_before = fake.requests, fake.rate_limited
+        records, secs, log = run(workers, base_url)
+        if "[!]" in log:
+            print(log)
+        results.append(records)
+        print(f"{workers:<9}{len(records):>9}{fake.requests - requests_before:>10}"
+              f"{fake.rate_limited - limited_before:>6}{secs:>8.2f}")
+
+    same = [json.dumps(r, sort_keys=True) for r in results[0]] == \
+        [json.dumps(r, sort_keys=True) for r in results[1]]
+    print(f"\nIdentical output: {same}")
+
+    print(f"\n{'incremental run':<22}{'recipes':>9}{'requests':>10}{'secs':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = os.path.join(tmp, "reddit_state.json")
+        for label, new_posts in (
+            ("first run", 0),
+            (f"+{args.new_posts} posts/subreddit", args.new_posts),
+            ("nothing new", 0),
+        ):
+            fake.posts += new_posts
+            requests_before = fake.requests
+            records, secs, log = run(args.workers, base_url, state_file=state_file)
+            if "[!]" in log:
+                print(log)
+            print(f"{label:<22}{len(records):>9}{fake.requests - requests_before:>10}"
+                  f"{secs:>8.2f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
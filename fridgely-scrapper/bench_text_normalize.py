@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Reddit post text cleanup, before and after text_normalize.py.
+
+Runs the previous per-call-regex versions of clean_recipe_text,
+extract_ingredients and is_recipe_post (copied below) and the
+text_normalize ones over a corpus of post bodies, checks that they give
+identical results, and reports microseconds per post for each.
+
+The corpus is either real post bodies from earlier scraper output (the
+"recipe_text" or "selftext" field of every record, any format recipe_io
+reads) or, by default, synthetic Reddit posts: markdown recipes of typical
+length plus a share of long story-style posts (10-40k characters, few or no
+section markers).
+
+Example:
+  python bench_text_normalize.py --input reddit_recipes.json
+  python bench_text_normalize.py --posts 5000 --long_rate 0.1
+"""
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, List
+
+from recipe_io import read_records
+from reddit_recipe_scraper import RECIPE_KEYWORDS, is_recipe_post
+from text_normalize import clean_recipe_text, extract_ingredients
+
+
+# --- Previous implementations ----------------------------------------------
+
+def old_is_recipe_post(title):
+    title_lower = title.lower()
+    return any(keyword in title_lower for keyword in RECIPE_KEYWORDS)
+
+
+def old_extract_ingredients(text):
+    ingredients_match = re.search(
+        r'ingredients?:?\s*([\s\S]*?)(?:instructions?:|preparation|directions|steps:|$)',
+        text,
+        re.IGNORECASE
+    )
+    if ingredients_match:
+        return ingredients_match.group(1).strip()
+    return text[:500] if len(text) > 500 else text
+
+
+def old_clean_recipe_text(text):
+    text = re.sub(r'\n\s*\n', '\n', text)
+    return text[:3000]
+
+
+# --- Corpus ----------------------------------------------------------------
+
+WORDS = ("onion tomato garlic ginger paneer chana dal rice ghee cumin masala "
+         "stir simmer until golden add the and with my family loves this "
+         "weeknight easy protein healthy budget").split()
+TITLES = ["My go-to chana masala", "Weekly meal prep: 5 lunches under $20",
+          "Homemade paneer tikka", "What I eat in a day", "Quick dinner idea",
+          "Finally nailed my grandmother's dal", "Breakfast burritos for the week",
+          "Is this a good deal?", "Cast iron appreciation post"]
+
+
+def synthetic_post(rng: random.Random, long: bool) -> str:
+    def sentence(n: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    if long:
+        # Story posts: many paragraphs, blank-line runs, rarely any markers
+        paragraphs = [" ".join(sentence(rng.randint(8, 20)) for _ in range(rng.randint(3, 8)))
+                      for _ in range(rng.randint(20, 60))]
+        if rng.random() < 0.3:
+            paragraphs.insert(rng.randrange(len(paragraphs)), "**Ingredients**")
+        return "\n\n  \n".join(paragraphs)
+
+    lines = [sentence(rng.randint(10, 30)), "", "**Ingredients:**", ""]
+    lines += [f"* {rng.randint(1, 4)} cups {rng.choice(WORDS)}" for _ in range(rng.randint(4, 14))]
+    lines += ["", rng.choice(["**Instructions:**", "Directions", "Steps:", "Preparation"]), ""]
+    lines += [f"{i}. {sentence(rng.randint(6, 18))}" for i in range(1, rng.randint(3, 10))]
+    if rng.random() < 0.2:
+        lines = lines[4:]  # no ingredients marker
+    return "\n".join(lines)
+
+
+def load_bodies(paths: List[str]) -> List[str]:
+    bodies = []
+    for path in paths:
+        for record in read_records(path):
+            body = record.get("recipe_text") or record.get("selftext")
+            if body:
+                bodies.append(body)
+    return bodies
+
+
+def time_per_item(func: Callable, items: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--input", nargs="*", default=[],
+                        help="Scraper output files to take post bodies from.")
+    parser.add_argument("--posts", type=int, default=2000,
+                        help="Synthetic posts when no --input is given.")
+    parser.add_argument("--long_rate", type=float, default=0.05,
+                        help="Share of synthetic posts that are long stories.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.input:
+        bodies = load_bodies(args.input)
+        titles = bodies  # first-line keyword scan over real text
+        source = ", ".join(args.input)
+    else:
+        bodies = [synthetic_post(rng, rng.random() < args.long_rate)
+                  for _ in range(args.posts)]
+        titles = [rng.choice(TITLES) for _ in range(args.posts)]
+        source = "synthetic"
+    titles = [t.split("\n", 1)[0][:300] for t in titles]
+    print(f"Corpus: {len(bodies)} posts ({source}), "
+          f"mean {sum(map(len, bodies)) / max(len(bodies), 1):,.0f} chars, "
+          f"longest {max(map(len, bodies), default=0):,}\n")
+
+    cleaned = [clean_recipe_text(b) for b in bodies]
+    checks = [
+        ("clean_recipe_text", old_clean_recipe_text, clean_recipe_text, bodies),
+        ("extract_ingredients", old_extract_ingredients, extract_ingredients, cleaned),
+        ("extract_ingredients (raw)", old_extract_ingredients, extract_ingredients, bodies),
+        ("is_recipe_post", old_is_recipe_post, is_recipe_post, titles),
+    ]
+    print(f"{'function':<28}{'before us':>11}{'after us':>10}{'speedup':>9}  identical")
+    for name, old, new, items in checks:
+        same = all(old(item) == new(item) for item in items)
+        before = time_per_item(old, items, args.repeat)
+        after = time_per_item(new, items, args.repeat)
+        print(f"{name:<28}{before:>11.1f}{after:>10.1f}{before / after:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Crawl frontier for crawl_wp_recipes.py, optionally checkpointed to SQLite.
+
+The frontier holds the BFS queue, a "seen" filter and the recipe URLs found
+so far. A URL is marked seen when it is first queued, so each URL enters the
+queue at most once. The seen filter is a fixed-size Bloom filter: memory
+stays flat however many URLs a crawl touches, at the cost of a small,
+configurable chance (0.1% by default) of skipping a URL never actually seen.
+That chance only holds up to the filter's capacity (--seen_capacity URLs);
+past it the frontier warns once, as skipped URLs would otherwise go unnoticed.
+
+Every queued URL gets an increasing sequence number; when a page has been
+fully processed its number becomes the "head" of the crawl. A checkpoint
+therefore only needs:
+
+  - frontier : queued URLs with seq > head (processed rows are pruned)
+  - visited  : URLs already processed (reloaded into the seen filter)
+  - recipes  : recipe URLs found
+  - meta     : head, pages_processed
+
+Writes are buffered in memory and committed in one transaction every
+`flush_every` pages (and on close), so checkpointing adds almost nothing to
+the crawl. Only completed pages are ever flushed, so a resumed crawl picks
+up exactly after the last checkpointed page.
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+from collections import deque
+from typing import List, Optional, Set, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (seq INTEGER PRIMARY KEY, url TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS recipes (url TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class SeenFilter:
+    """Fixed-size Bloom filter of strings."""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.count = 0  # items added (probably) for the first time
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_bits = num_bits
+        self.num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self._bits = bytearray((num_bits + 7) // 8)
+
+    def _positions(self, item: str) -> List[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add item; return True if it was not (probably) present before."""
+        bits = self._bits
+        added = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+
+class CrawlFrontier:
+    """BFS queue + seen filter + recipe URLs, with optional on-disk checkpoints."""
+
+    def __init__(
+        self,
+        start_url: str,
+        checkpoint_path: Optional[str] = None,
+        resume: bool = False,
+        flush_every: int = 100,
+        seen_capacity: int = 1_000_000,
+    ):
+        self.queue: deque = deque()  # (seq, url)
+        self.seen = SeenFilter(seen_capacity)
+        self.recipe_urls: Set[str] = set()
+        self.pages_processed = 0
+        self.flush_every = flush_every
+
+        self._next_seq = 0
+        self._head = -1
+        self._db: Optional[sqlite3.Connection] = None
+        # Links pushed by the page currently being processed
+        self._page_links: List[Tuple[int, str]] = []
+        # Completed-page state waiting for the next flush
+        self._pending_links: List[Tuple[int, str]] = []
+        self._pending_visited: List[str] = []
+        self._pending_recipes: List[str] = []
+        self._pages_since_flush = 0
+        self._warned_capacity = False
+
+        if checkpoint_path:
+            if resume and not os.path.exists(checkpoint_path):
+                raise FileNotFoundError(f"No checkpoint to resume: {checkpoint_path}")
+            self._db = sqlite3.connect(checkpoint_path)
+            self._db.executescript(SCHEMA)
+            if resume:
+                self._load()
+                print(
+                    f"[*] Resumed crawl: {self.pages_processed} pages done, "
+                    f"{len(self.queue)} queued, {len(self.recipe_urls)} recipes"
+                )
+                return
+            self._db.executescript(
+                "DELETE FROM frontier; DELETE FROM visited; "
+                "DELETE FROM recipes; DELETE FROM meta;"
+            )
+            self._db.commit()
+
+        self.push(start_url)
+        # The start URL is not tied to a page, so make sure it is persisted
+        self._pending_links.extend(self._page_links)
+        self._page_links = []
+
+    def __bool__(self) -> bool:
+        return bool(self.queue)
+
+    def push(self, url: str) -> bool:
+        """Append a URL to the BFS queue unless it was queued before."""
+        if not self.seen.add(url):
+            return False
+        if self.seen.count > self.seen.capacity and not self._warned_capacity:
+            self._warn_capacity()
+        entry = (self._next_seq, url)
+        self._next_seq += 1
+        self.queue.append(entry)
+        if self._db is not None:
+            self._page_links.append(entry)
+        return True
+
+    def _warn_capacity(self) -> None:
+        self._warned_capacity = True
+        print(
+            f"[!] More than {self.seen.capacity:,} URLs seen: the seen filter is past its "
+            f"capacity, so more than {self.seen.error_rate:.1%} of new URLs may now be "
+            f"skipped as already seen. Re-run with a larger --seen_capacity."
+        )
+
+    def pop(self) -> Tuple[int, str]:
+        """Take the next (seq, url) off the BFS queue."""
+        return self.queue.popleft()
+
+    def page_done(self, seq: int, url: str, is_recipe: bool = False) -> None:
+        """Record that the page popped as `seq` has been fully processed."""
+        self.pages_processed += 1
+        if is_recipe:
+            self.recipe_urls.add(url)
+        if self._db is None:
+            return
+
+        self._head = seq
+        self._pending_links.extend(self._page_links)
+        self._page_links = []
+        self._pending_visited.append(url)
+        if is_recipe:
+            self._pending_recipes.append(url)
+        self._pages_since_flush += 1
+        if self._pages_since_flush >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit buffered state of completed pages in a single transaction."""
+        if self._db is None:
+            return
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO frontier (seq, url) VALUES (?, ?)",
+                self._pending_links,
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO visited (url) VALUES (?)",
+                [(u,) for u in self._pending_visited],
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO recipes (url) VALUES (?)",
+                [(u,) for u in self._pending_recipes],
+            )
+            self._db.execute("DELETE FROM frontier WHERE seq <= ?", (self._head,))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [
+                    ("head", str(self._head)),
+                    ("pages_processed", str(self.pages_processed)),
+                ],
+            )
+        self._pending_links = []
+        self._pending_visited = []
+        self._pending_recipes = []
+        self._pages_since_flush = 0
+
+    def close(self) -> None:
+        """Flush remaining state and close the checkpoint database."""
+        if self._db is None:
+            return
+        self.flush()
+        self._db.close()
+        self._db = None
+
+    def _load(self) -> None:
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        self._head = int(meta.get("head", -1))
+        self.pages_processed = int(meta.get("pages_processed", 0))
+        for (url,) in self._db.execute("SELECT url FROM visited"):
+            self.seen.add(url)
+        self.recipe_urls = {
+            row[0] for row in self._db.execute("SELECT url FROM recipes")
+        }
+        self.queue = deque(
+            self._db.execute(
+                "SELECT seq, url FROM frontier WHERE seq > ? ORDER BY seq",
+                (self._head,),
+            )
+        )
+        for _, url in self.queue:
+            self.seen.add(url)
+        if self.seen.count > self.seen.capacity:
+            self._warn_capacity()
+        row = self._db.execute("SELECT MAX(seq) FROM frontier").fetchone()
+        self._next_seq = max(self._head, row[0] if row[0] is not None else -1) + 1
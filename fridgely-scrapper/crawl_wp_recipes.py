@@ -7,10 +7,15 @@ generic enough to work for other WP-based recipe sites too.
 
 It:
   - Crawls pages within a single domain (BFS, small polite delay)
+  - Optionally keeps several requests in flight (--concurrency N) while a
+    per-host token bucket still enforces the --delay politeness budget
+  - Or, with --discovery sitemap, lists post URLs straight from the site's
+    sitemap index (see wp_sitemap.py) and only crawls if there is none
   - Detects "recipe pages" by presence of common WP recipe markup
     (e.g. .wprm-recipe-ingredients)
   - Stops once it finds N recipe URLs
-  - Writes them to a text file (one URL per line)
+  - Writes them to a text file (one URL per line, followed by a tab and the
+    sitemap lastmod date when known)
 
 You then feed that URLs file into wp_recipe_scraper.py.
 
@@ -19,16 +24,79 @@ Example:
     --start_url https://www.indianhealthyrecipes.com/ \\
     --max_recipes 520 \\
     --output_urls indianhealthyrecipes_urls_auto.txt
+
+  # Same crawl with up to 8 requests in flight (same recipe URLs as above)
+  python crawl_wp_recipes.py \\
+    --start_url https://www.indianhealthyrecipes.com/ \\
+    --domain indianhealthyrecipes.com \\
+    --max_recipes 520 \\
+    --concurrency 8
+
+  # Read candidates from /wp-sitemap.xml or sitemap_index.xml (no HTML fetched)
+  python crawl_wp_recipes.py \\
+    --start_url https://www.indianhealthyrecipes.com/ \\
+    --domain indianhealthyrecipes.com \\
+    --max_recipes 520 \\
+    --discovery sitemap
+
+  # Interruptible crawl: checkpoint as you go, re-run with --resume after a stop
+  python crawl_wp_recipes.py \\
+    --start_url https://www.indianhealthyrecipes.com/ \\
+    --domain indianhealthyrecipes.com \\
+    --checkpoint indianhealthyrecipes_crawl.sqlite \\
+    --resume
 """
 
 import argparse
+import asyncio
+import re
 import time
 from collections import deque
-from typing import Set
-from urllib.parse import urljoin, urlparse, urldefrag
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import (
+    parse_qsl,
+    urldefrag,
+    urlencode,
+    urljoin,
+    urlparse,
+    urlsplit,
+    urlunsplit,
+)
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+import http_cache
+from crawl_state import CrawlFrontier
+from rate_limit import HostRateLimiter
+from wp_sitemap import discover_sitemap_urls
+
+HEADERS = {
+    "User-Agent": "RashanRecipeCrawler/1.0 (+https://example.com/contact)"
+}
+
+# Query params that never change page content (analytics, comment replies, AMP)
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_ga",
+    "ref",
+    "share",
+    "replytocom",
+    "amp",
+}
+
+# WP archive pagination: /category/curry/page/3/ -> /category/curry/
+PAGINATION_RE = re.compile(r"/page/\d+/?$")
 
 
 def is_same_domain(url: str, domain: str) -> bool:
@@ -47,6 +115,41 @@ def normalize_url(base: str, link: str) -> str:
     return abs_url
 
 
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce URL variants of the same page to one form.
+
+      - lowercase scheme/host, drop default ports and fragments
+      - drop tracking params (utm_*, fbclid, replytocom, ...), sort the rest
+      - collapse /page/N/ archive pagination onto the archive itself
+      - add the trailing slash WP permalinks use (except for files)
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (
+        scheme == "https" and netloc.endswith(":443")
+    ):
+        netloc = netloc.rsplit(":", 1)[0]
+
+    path = PAGINATION_RE.sub("/", parts.path or "/")
+    last_segment = path.rsplit("/", 1)[-1]
+    if last_segment and "." not in last_segment:
+        path += "/"
+
+    query = ""
+    if parts.query:
+        query = urlencode(
+            sorted(
+                (k, v)
+                for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                if k.lower() not in TRACKING_PARAMS
+                and not k.lower().startswith("utm_")
+            )
+        )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
 def is_likely_recipe_page(soup: BeautifulSoup) -> bool:
     """
     Heuristic to decide if a page is a recipe page.
@@ -67,64 +170,201 @@ def is_likely_recipe_page(soup: BeautifulSoup) -> bool:
     return False
 
 
+def extract_links(soup: BeautifulSoup, base_url: str, domain: str) -> List[str]:
+    """Return canonical in-domain links on a page, in document order."""
+    links: List[str] = []
+    for a in soup.find_all("a", href=True):
+        link = a["href"]
+        if link.startswith("mailto:") or link.startswith("tel:"):
+            continue
+        # canonicalize_url also drops the fragment, so plain urljoin is enough
+        next_url = canonicalize_url(urljoin(base_url, link))
+        if not is_same_domain(next_url, domain):
+            continue
+        links.append(next_url)
+    return links
+
+
 def crawl_for_recipes(
     start_url: str,
     domain: str,
     max_recipes: int,
     max_pages: int = 2000,
     delay_seconds: float = 0.3,
+    concurrency: int = 1,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = False,
+    seen_capacity: int = 1_000_000,
 ) -> Set[str]:
-    """Breadth-first crawl within domain, collecting recipe URLs."""
-    headers = {
-        "User-Agent": "RashanRecipeCrawler/1.0 (+https://example.com/contact)"
-    }
+    """
+    Breadth-first crawl within domain, collecting recipe URLs.
 
-    queue = deque([start_url])
-    visited: Set[str] = set()
-    recipe_urls: Set[str] = set()
+    With concurrency > 1 the async engine is used instead; it visits pages
+    in the same BFS order, so it returns the same recipe URLs.
 
-    pages_processed = 0
+    With checkpoint_path the frontier is checkpointed to SQLite as the crawl
+    goes (see crawl_state.py); resume=True continues from that checkpoint.
+    seen_capacity sizes the frontier's Bloom "seen" filter (see SeenFilter).
+    """
+    if concurrency > 1:
+        return asyncio.run(
+            _crawl_for_recipes_async(
+                start_url,
+                domain,
+                max_recipes,
+                max_pages=max_pages,
+                delay_seconds=delay_seconds,
+                concurrency=concurrency,
+                checkpoint_path=checkpoint_path,
+                resume=resume,
+                seen_capacity=seen_capacity,
+            )
+        )
+
+    frontier = CrawlFrontier(
+        canonicalize_url(start_url), checkpoint_path, resume, seen_capacity=seen_capacity
+    )
+    recipe_urls = frontier.recipe_urls
 
-    while queue and len(recipe_urls) < max_recipes and pages_processed < max_pages:
-        url = queue.popleft()
-        if url in visited:
-            continue
-        visited.add(url)
-        pages_processed += 1
+    try:
+        while (
+            frontier
+            and len(recipe_urls) < max_recipes
+            and frontier.pages_processed < max_pages
+        ):
+            seq, url = frontier.pop()
+
+            print(f"[{frontier.pages_processed + 1}] Fetching: {url}")
+
+            try:
+                resp = http_cache.http_get(url, headers=HEADERS, timeout=15)
+                if resp.status_code != 200:
+                    print(f"  [!] Status {resp.status_code}")
+                    frontier.page_done(seq, url)
+                    continue
+            except Exception as e:
+                print(f"  [!] Error fetching page: {e}")
+                frontier.page_done(seq, url)
+                continue
 
-        print(f"[{pages_processed}] Fetching: {url}")
+            soup = BeautifulSoup(resp.text, "html.parser")
 
+            # Detect recipe pages
+            is_recipe = is_likely_recipe_page(soup)
+            if is_recipe and url not in recipe_urls:
+                print(f"  [+] Found recipe page ({len(recipe_urls) + 1}): {url}")
+
+            # Discover more links within domain
+            for next_url in extract_links(soup, url, domain):
+                frontier.push(next_url)
+
+            frontier.page_done(seq, url, is_recipe)
+            if len(recipe_urls) >= max_recipes:
+                break
+
+            # Pages served from the local HTTP cache cost the site nothing
+            if not getattr(resp, "from_cache", False):
+                time.sleep(delay_seconds)
+    finally:
+        frontier.close()
+
+    return recipe_urls
+
+
+async def _crawl_for_recipes_async(
+    start_url: str,
+    domain: str,
+    max_recipes: int,
+    max_pages: int = 2000,
+    delay_seconds: float = 0.3,
+    concurrency: int = 8,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = False,
+    seen_capacity: int = 1_000_000,
+) -> Set[str]:
+    """
+    Concurrent variant of crawl_for_recipes.
+
+    URLs are taken off the BFS queue in the usual order and fetched up to
+    `concurrency` at a time, but responses are *processed* strictly in that
+    order. Because the queue is FIFO, prefetching never changes which URLs
+    get visited, so the result matches the serial crawl; pages fetched past
+    max_recipes are simply dropped.
+
+    Politeness: each host gets a token bucket refilled once per
+    `delay_seconds`, so the request rate never exceeds the serial crawl's.
+    Connections are reused through a shared keep-alive requests.Session
+    (wrapped by the HTTP cache when one is configured).
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    raw_session = requests.Session()
+    raw_session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    raw_session.mount("http://", adapter)
+    raw_session.mount("https://", adapter)
+    session = http_cache.cached_session(raw_session)
+    limiter = HostRateLimiter(1.0 / delay_seconds if delay_seconds > 0 else 0)
+
+    async def fetch(url: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return (html, None) on success or (None, error message)."""
+        await limiter.acquire(url)
         try:
-            resp = requests.get(url, headers=headers, timeout=15)
-            if resp.status_code != 200:
-                print(f"  [!] Status {resp.status_code}")
-                continue
+            resp = await loop.run_in_executor(
+                executor, partial(session.get, url, timeout=15)
+            )
         except Exception as e:
-            print(f"  [!] Error fetching page: {e}")
-            continue
-
-        soup = BeautifulSoup(resp.text, "html.parser")
+            return None, f"Error fetching page: {e}"
+        if resp.status_code != 200:
+            return None, f"Status {resp.status_code}"
+        return resp.text, None
 
-        # Detect recipe pages
-        if is_likely_recipe_page(soup):
-            if url not in recipe_urls:
-                recipe_urls.add(url)
-                print(f"  [+] Found recipe page ({len(recipe_urls)}): {url}")
-                if len(recipe_urls) >= max_recipes:
-                    break
+    frontier = CrawlFrontier(
+        canonicalize_url(start_url), checkpoint_path, resume, seen_capacity=seen_capacity
+    )
+    recipe_urls = frontier.recipe_urls
+    in_flight: deque = deque()  # (seq, url, task) in BFS order
 
-        # Discover more links within domain
-        for a in soup.find_all("a", href=True):
-            link = a["href"]
-            if link.startswith("mailto:") or link.startswith("tel:"):
-                continue
-            next_url = normalize_url(url, link)
-            if not is_same_domain(next_url, domain):
+    try:
+        while len(recipe_urls) < max_recipes and frontier.pages_processed < max_pages:
+            # Top up the window of in-flight requests
+            while (
+                frontier
+                and len(in_flight) < concurrency
+                and frontier.pages_processed + len(in_flight) < max_pages
+            ):
+                seq, url = frontier.pop()
+                in_flight.append((seq, url, asyncio.ensure_future(fetch(url))))
+
+            if not in_flight:
+                break
+
+            seq, url, task = in_flight.popleft()
+            html, error = await task
+
+            print(f"[{frontier.pages_processed + 1}] Fetched: {url}")
+
+            if error:
+                print(f"  [!] {error}")
+                frontier.page_done(seq, url)
                 continue
-            if next_url not in visited:
-                queue.append(next_url)
 
-        time.sleep(delay_seconds)
+            soup = BeautifulSoup(html, "html.parser")
+
+            is_recipe = is_likely_recipe_page(soup)
+            if is_recipe and url not in recipe_urls:
+                print(f"  [+] Found recipe page ({len(recipe_urls) + 1}): {url}")
+
+            for next_url in extract_links(soup, url, domain):
+                frontier.push(next_url)
+
+            frontier.page_done(seq, url, is_recipe)
+    finally:
+        for _, _, task in in_flight:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        session.close()
+        frontier.close()
 
     return recipe_urls
 
@@ -160,8 +400,54 @@ def main():
         default=0.3,
         help="Delay between requests in seconds (be polite!).",
     )
+    parser.add_argument(
+        "--max_pages",
+        type=int,
+        default=2000,
+        help="Maximum number of pages to fetch before giving up.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Requests kept in flight at once (1 = classic serial crawl). "
+        "The --delay budget is still enforced per host.",
+    )
+    parser.add_argument(
+        "--discovery",
+        choices=["bfs", "sitemap"],
+        default="bfs",
+        help="'bfs' crawls links page by page; 'sitemap' lists post URLs from "
+        "the sitemap index and only falls back to BFS if the site has none.",
+    )
+    parser.add_argument(
+        "--http_cache",
+        default=None,
+        help="SQLite file for the shared HTTP cache (default: $RASHAN_HTTP_CACHE, "
+        "or no caching).",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="SQLite file to checkpoint the BFS frontier into while crawling.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the crawl saved in --checkpoint instead of starting over.",
+    )
+    parser.add_argument(
+        "--seen_capacity",
+        type=int,
+        default=1_000_000,
+        help="URLs the BFS 'seen' filter is sized for (about 1.8 MB per million). "
+        "Past it, new URLs are increasingly skipped as already seen.",
+    )
 
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint pointing at a previous crawl")
+    http_cache.configure(args.http_cache)
 
     print("============================================================")
     print("RASHAN WORDPRESS RECIPE CRAWLER")
@@ -170,14 +456,36 @@ def main():
     print(f"Domain      : {args.domain}")
     print(f"Max recipes : {args.max_recipes}")
     print(f"Delay (s)   : {args.delay}")
+    print(f"Concurrency : {args.concurrency}")
+    print(f"Discovery   : {args.discovery}")
     print("============================================================\n")
 
-    recipe_urls = crawl_for_recipes(
-        start_url=args.start_url,
-        domain=args.domain,
-        max_recipes=args.max_recipes,
-        delay_seconds=args.delay,
-    )
+    recipe_urls: Set[str] = set()
+    lastmods: Dict[str, Optional[str]] = {}
+    if args.discovery == "sitemap":
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        lastmods = discover_sitemap_urls(
+            args.start_url, args.domain, args.max_recipes, session=session
+        )
+        recipe_urls = set(lastmods)
+        if recipe_urls:
+            print(f"[+] Sitemap listed {len(recipe_urls)} candidate recipe URLs")
+        else:
+            print("[!] No sitemap found, falling back to BFS crawl")
+
+    if not recipe_urls:
+        recipe_urls = crawl_for_recipes(
+            start_url=args.start_url,
+            domain=args.domain,
+            max_recipes=args.max_recipes,
+            max_pages=args.max_pages,
+            delay_seconds=args.delay,
+            concurrency=args.concurrency,
+            checkpoint_path=args.checkpoint,
+            resume=args.resume,
+            seen_capacity=args.seen_capacity,
+        )
 
     if not recipe_urls:
         print("[!] No recipe URLs discovered.")
@@ -185,12 +493,18 @@ def main():
 
     with open(args.output_urls, "w", encoding="utf-8") as f:
         for url in sorted(recipe_urls):
-            f.write(url + "\n")
+            # Sitemap lastmod rides along after a tab; wp_recipe_scraper.py
+            # uses it to skip unchanged pages on incremental runs
+            if lastmods.get(url):
+                f.write(f"{url}\t{lastmods[url]}\n")
+            else:
+                f.write(url + "\n")
 
     print("\n============================================================")
     print("[✓] CRAWL COMPLETE")
     print(f"Recipe URLs found : {len(recipe_urls)}")
     print(f"Output URLs file  : {args.output_urls}")
+    http_cache.print_stats()
     print("============================================================")
 
 
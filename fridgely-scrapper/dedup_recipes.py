@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate recipe detection for Rashan, across all scraper outputs.
+
+Reposts, cross-posts and the same WordPress recipe reached through several
+URLs differ in a word here and there, so exact title matching misses them.
+This stage compares what the recipes actually say:
+
+  1. recipe_text + ingredients of each record become a set of word
+     3-shingles ("1 cup chana", "cup chana dried", ...)
+  2. each set gets a 128-value MinHash signature (one-permutation hashing:
+     one hash per shingle, binned, with empty bins densified), all in numpy
+  3. LSH banding buckets records whose signatures agree on a whole band,
+     so only records that share a bucket are ever compared – no all-pairs
+  4. candidate pairs whose signatures agree on >= --threshold of their
+     values (an estimate of Jaccard similarity) are joined into clusters
+
+From every cluster one record is kept: the most complete one (most
+filled-in fields), then the most upvoted, then the longest text. Records
+keep their input order. Needs numpy.
+
+Example:
+  python dedup_recipes.py reddit_recipes.json wp_recipes.ndjson -o recipes_dedup.ndjson
+  python dedup_recipes.py recipes.json --report duplicates.ndjson
+"""
+
+import argparse
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from recipe_io import RecordWriter, derive_path, progress_to_stderr, read_records, same_file
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 32
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_CHUNK_SIZE = 8192
+
+# Fields whose text is compared
+TEXT_FIELDS = ('recipe_text', 'ingredients')
+
+_EMPTY = np.uint64(0xFFFFFFFF)  # bin value of a bin no shingle fell into
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser: a well-spread 64-bit hash of each uint64"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _rotl(x: np.ndarray, bits: int) -> np.ndarray:
+    if bits == 0:
+        return x
+    return (x << np.uint64(bits)) | (x >> np.uint64(64 - bits))
+
+
+def recipe_text(recipe: Dict) -> str:
+    """The compared text of a recipe"""
+    return "\n".join(str(recipe.get(f) or '') for f in TEXT_FIELDS)
+
+
+_HASH_BASE = 0x100000001B3
+_power_cache: List[np.ndarray] = []
+
+
+def _power_tables(n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """R^j and R^-j (mod 2^64) for j < n, grown once and reused across chunks."""
+    if not _power_cache or len(_power_cache[0]) < n:
+        size = max(n, 2 * len(_power_cache[0]) if _power_cache else 1 << 16)
+        inv = pow(_HASH_BASE, -1, 1 << 64)
+        powers = np.cumprod(np.full(size, _HASH_BASE, dtype=np.uint64)) * np.uint64(inv)
+        inverse = np.cumprod(np.full(size, inv, dtype=np.uint64)) * np.uint64(_HASH_BASE)
+        _power_cache[:] = [powers, inverse]
+    return _power_cache[0][:n], _power_cache[1][:n + 1]
+
+
+def word_hashes(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (doc index, 64-bit hash) of every word of every text, in order.
+
+    Works on the UTF-8 bytes in numpy rather than with a regex, which would
+    cost a Python string per word: words are runs of ASCII letters and
+    non-ASCII characters, except that Latin-1 symbols (U+0080-U+00BF, e.g.
+    ½ °) and the U+2000-U+2FFF punctuation / symbol blocks (e.g. – ▢ •)
+    separate words, like ASCII punctuation, digits and spaces. ASCII is
+    lower-cased. Each word is hashed with a polynomial hash over its bytes,
+    computed for all words at once from prefix sums.
+    """
+    encoded = [t.encode('utf-8') for t in texts]
+    lengths = np.fromiter((len(b) + 1 for b in encoded), dtype=np.int64, count=len(encoded))
+    buf = np.frombuffer(b"\n".join(encoded) + b"\n", dtype=np.uint8)
+    doc_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+    upper = (buf >= 0x41) & (buf <= 0x5A)
+    is_word = upper | ((buf >= 0x61) & (buf <= 0x7A)) | (buf >= 0x80)
+    for lead, width in ((0xC2, 2), (0xE2, 3)):
+        at = np.flatnonzero(buf == lead)
+        for k in range(width):
+            is_word[np.minimum(at + k, len(buf) - 1)] = False
+    edges = np.diff(np.concatenate([[False], is_word, [False]]).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    word_len = np.flatnonzero(edges == -1) - starts
+
+    # hash(word) = sum(byte_j * R^(j - start)) mod 2^64, from prefix sums over
+    # the word bytes alone (separators add nothing)
+    word_bytes = np.where(upper, buf | 0x20, buf)[is_word]
+    powers, inverse = _power_tables(len(word_bytes))
+    prefix = np.zeros(len(word_bytes) + 1, dtype=np.uint64)
+    np.cumsum(word_bytes * powers, dtype=np.uint64, out=prefix[1:])
+    packed_ends = np.cumsum(word_len)
+    packed_starts = packed_ends - word_len
+    hashes = (prefix[packed_ends] - prefix[packed_starts]) * inverse[packed_starts]
+
+    doc_of_word = np.searchsorted(doc_starts, starts, side='right') - 1
+    return doc_of_word, _mix64(hashes ^ word_len.astype(np.uint64))
+
+
+def shingle_hashes(
+    doc_of_word: np.ndarray, word_hash: np.ndarray, n_docs: int,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    64-bit hashes of every word shingle of every doc, as (doc index, hash).
+
+    Docs shorter than shingle_size count as one shingle of all their words;
+    empty docs have none.
+    """
+    lengths = np.bincount(doc_of_word, minlength=n_docs)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    k = shingle_size
+    total = len(word_hash)
+
+    # Full shingles: every window of k words that stays inside its doc
+    n_windows = max(total - k + 1, 0)
+    combined = np.zeros(n_windows, dtype=np.uint64)
+    for offset in range(k):
+        combined ^= _rotl(word_hash[offset:offset + n_windows], (offset * 21) % 64)
+    window_doc = doc_of_word[:n_windows]
+    inside = np.arange(n_windows) + k <= ends[window_doc]
+    doc_idx = [window_doc[inside]]
+    hashes = [combined[inside]]
+
+    # Short docs: one shingle of all their words
+    for d in np.flatnonzero((lengths > 0) & (lengths < k)):
+        h = np.uint64(0)
+        for offset in range(lengths[d]):
+            h ^= _rotl(word_hash[starts[d] + offset:starts[d] + offset + 1],
+                       (offset * 21) % 64)[0]
+        doc_idx.append(np.array([d]))
+        hashes.append(np.array([h], dtype=np.uint64))
+
+    return np.concatenate(doc_idx), _mix64(np.concatenate(hashes))
+
+
+def oph_signatures(
+    doc_idx: np.ndarray, hashes: np.ndarray, n_docs: int, num_perm: int = DEFAULT_NUM_PERM
+) -> np.ndarray:
+    """
+    (n_docs x num_perm) MinHash signatures by one-permutation hashing.
+
+    The top bits of a shingle hash pick one of num_perm bins, the low 32
+    bits are its value, and each bin keeps its minimum. A bin no shingle
+    fell into borrows the value of the next non-empty bin to its right
+    (wrapping around), offset by the distance so borrowed values never
+    equal real ones. Docs without shingles get all-empty rows.
+    """
+    bin_bits = num_perm.bit_length() - 1
+    if 1 << bin_bits != num_perm:
+        raise ValueError("num_perm must be a power of two")
+    bins = (hashes >> np.uint64(64 - bin_bits)).astype(np.int64)
+    values = hashes & _EMPTY
+
+    sig = np.full(n_docs * num_perm, _EMPTY, dtype=np.uint64)
+    np.minimum.at(sig, doc_idx * num_perm + bins, values)
+    sig = sig.reshape(n_docs, num_perm)
+
+    # Densify: index of the next non-empty bin, looking at the row twice
+    filled = np.concatenate([sig, sig], axis=1) != _EMPTY
+    cols = np.arange(2 * num_perm)
+    next_filled = np.where(filled, cols, 2 * num_perm)
+    next_filled = np.minimum.accumulate(next_filled[:, ::-1], axis=1)[:, ::-1][:, :num_perm]
+    has_any = filled[:, :num_perm].any(axis=1)
+    rows = np.flatnonzero(has_any)
+    source = next_filled[rows]
+    distance = (source - cols[:num_perm]).astype(np.uint64)
+    sig[rows] = sig[rows[:, None], source % num_perm] + (distance << np.uint64(32))
+    return sig
+
+
+def minhash_signatures(
+    texts: Sequence[str],
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (signatures, has-words mask) for many texts, chunk_size texts at a time
+    so the per-byte arrays stay small
+    """
+    sigs = []
+    active = []
+    for start in range(0, len(texts), chunk_size):
+        chunk = texts[start:start + chunk_size]
+        doc_of_word, word_hash = word_hashes(chunk)
+        doc_idx, hashes = shingle_hashes(doc_of_word, word_hash, len(chunk), shingle_size)
+        sigs.append(oph_signatures(doc_idx, hashes, len(chunk), num_perm))
+        active.append(np.bincount(doc_of_word, minlength=len(chunk)) > 0)
+    if not sigs:
+        return np.empty((0, num_perm), dtype=np.uint64), np.empty(0, dtype=bool)
+    return np.concatenate(sigs), np.concatenate(active)
+
+
+def candidate_pairs(sig: np.ndarray, bands: int, active: np.ndarray) -> np.ndarray:
+    """
+    (i, j) pairs with i < j whose signatures agree on at least one band.
+
+    Within a bucket every member is paired with the bucket's first member
+    only, which keeps huge buckets (e.g. many copies of one post) linear;
+    clustering chains them together anyway.
+    """
+    n_docs, num_perm = sig.shape
+    if num_perm % bands:
+        raise ValueError("bands must divide num_perm")
+    rows = num_perm // bands
+    docs = np.flatnonzero(active)
+    pairs = []
+    for band in range(bands):
+        key = np.zeros(len(docs), dtype=np.uint64)
+        for col in range(band * rows, (band + 1) * rows):
+            key = _mix64(key ^ sig[docs, col])
+        order = np.argsort(key, kind='stable')
+        key = key[order]
+        new_bucket = np.ones(len(key), dtype=bool)
+        new_bucket[1:] = key[1:] != key[:-1]
+        first = np.maximum.accumulate(np.where(new_bucket, np.arange(len(key)), 0))
+        member = np.flatnonzero(~new_bucket)
+        if len(member):
+            pairs.append(np.stack([docs[order[first[member]]], docs[order[member]]], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def estimated_similarity(sig: np.ndarray, pairs: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    """Fraction of equal signature values per pair (estimates Jaccard)"""
+    out = np.empty(len(pairs))
+    for start in range(0, len(pairs), chunk):
+        i, j = pairs[start:start + chunk].T
+        out[start:start + chunk] = (sig[i] == sig[j]).mean(axis=1)
+    return out
+
+
+def find_clusters(pairs: Iterable[Tuple[int, int]], n_docs: int) -> List[List[int]]:
+    """Connected components (size >= 2) of the pair graph, by union-find"""
+    parent = list(range(n_docs))
+
+    def root(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in pairs:
+        ri, rj = root(i), root(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    groups: Dict[int, List[int]] = {}
+    for x in range(n_docs):
+        if parent[x] != x:
+            groups.setdefault(root(x), [root(x)]).append(x)
+    return list(groups.values())
+
+
+def _as_number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def record_quality(recipe: Dict) -> Tuple[int, float, int]:
+    """Which record of a cluster to keep: most filled-in fields, most upvotes, longest text"""
+    filled = sum(1 for v in recipe.values() if v not in (None, '', 'None', [], {}))
+    text = sum(len(str(recipe.get(f) or '')) for f in TEXT_FIELDS)
+    return filled, _as_number(recipe.get('upvotes')), text
+
+
+def near_duplicate_clusters(
+    recipes: Sequence[Dict],
+    threshold: float = DEFAULT_THRESHOLD,
+    num_perm: int = DEFAULT_NUM_PERM,
+    bands: int = DEFAULT_BANDS,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+) -> List[List[int]]:
+    """Clusters of near-duplicate recipes, as lists of indices into `recipes`"""
+    sig, active = minhash_signatures(
+        [recipe_text(r) for r in recipes], num_perm, shingle_size
+    )
+    pairs = candidate_pairs(sig, bands, active)
+    similar = pairs[estimated_similarity(sig, pairs) >= threshold]
+    return find_clusters(similar.tolist(), len(recipes))
+
+
+def dedup_recipes(recipes: Sequence[Dict], **kwargs) -> Tuple[List[Dict], List[Dict]]:
+    """
+    (kept recipes in input order, one report entry per cluster)
+
+    kwargs go to near_duplicate_clusters().
+    """
+    dropped = set()
+    report = []
+    for cluster in near_duplicate_clusters(recipes, **kwargs):
+        best = max(cluster, key=lambda i: (record_quality(recipes[i]), -i))
+        others = [i for i in cluster if i != best]
+        dropped.update(others)
+        report.append({
+            'kept': _record_label(recipes[best]),
+            'dropped': [_record_label(recipes[i]) for i in others],
+        })
+    return [r for i, r in enumerate(recipes) if i not in dropped], report
+
+
+def _record_label(recipe: Dict) -> str:
+    return recipe.get('source_url') or recipe.get('reddit_url') or recipe.get('title', '')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drop near-duplicate recipes (MinHash / LSH) across scraper outputs."
+    )
+    parser.add_argument(
+        'inputs', nargs='+',
+        help="Recipe files (.json, .ndjson / .jsonl, optionally .gz; '-' for stdin).",
+    )
+    parser.add_argument(
+        '--output', '-o',
+        help="Output file, same formats ('-' for NDJSON on stdout; "
+             "default: <first input>_dedup.<ext>).",
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help="Estimated Jaccard similarity of word shingles at which two recipes "
+             "count as duplicates (default: %(default)s).",
+    )
+    parser.add_argument('--num_perm', type=int, default=DEFAULT_NUM_PERM,
+                        help="MinHash signature length, a power of two (default: %(default)s).")
+    parser.add_argument('--bands', type=int, default=DEFAULT_BANDS,
+                        help="LSH bands; must divide --num_perm. More bands find more "
+                             "candidates at lower similarity (default: %(default)s).")
+    parser.add_argument('--shingle_size', type=int, default=DEFAULT_SHINGLE_SIZE,
+                        help="Words per shingle (default: %(default)s).")
+    parser.add_argument('--report', help="Write the clusters found (kept / dropped) as NDJSON.")
+    args = parser.parse_args()
+
+    output_file = args.output or derive_path(args.inputs[0], '_dedup')
+    replace = any(same_file(path, output_file) for path in args.inputs)
+    with RecordWriter(output_file, replace) as writer, progress_to_stderr(output_file):
+        print("=" * 60)
+        print("RASHAN RECIPE DEDUP")
+        print("=" * 60)
+        recipes = [r for path in args.inputs for r in read_records(path)]
+        print(f"\nRecipes read: {len(recipes)} from {', '.join(args.inputs)}")
+
+        start = time.perf_counter()
+        kept, report = dedup_recipes(
+            recipes,
+            threshold=args.threshold,
+            num_perm=args.num_perm,
+            bands=args.bands,
+            shingle_size=args.shingle_size,
+        )
+        secs = time.perf_counter() - start
+        for recipe in kept:
+            writer.write(recipe)
+
+        if args.report:
+            with RecordWriter(args.report) as report_writer:
+                for entry in report:
+                    report_writer.write(entry)
+
+        print(f"Clusters of near-duplicates: {len(report)} ({secs:.1f}s)")
+        print(f"Dropped: {len(recipes) - len(kept)}")
+        print("\n" + "=" * 60)
+        print(f"[✓] Kept {writer.count} recipes")
+        print(f"Output file: {output_file}")
+        if args.report:
+            print(f"Report: {args.report}")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,9 +3,11 @@
 Bulk import Rashan recipes JSON into Firebase Firestore.
 
 This script:
-  - Reads a JSON file of recipes (e.g. indianhealthyrecipes_recipes.json)
-  - Connects to Firebase using a service account JSON
-  - Writes each recipe into a Firestore collection, in batches
+  - Reads a JSON or NDJSON file of recipes (e.g. indianhealthyrecipes_recipes.json),
+    one record at a time
+  - Connects to Firebase using a service account JSON (or to the local
+    Firestore emulator with --emulator)
+  - Writes each recipe into a Firestore collection through a BulkWriter
 
 USAGE (from project root after activating your venv):
 
@@ -20,72 +22,430 @@ USAGE (from project root after activating your venv):
   #        --input indianhealthyrecipes_recipes.json \
   #        --collection recipes
 
+  # Or straight from the pipeline ('-' reads NDJSON from stdin):
+  #    (venv) python nutrition_helper.py recipes.ndjson - | python firebase_import_recipes.py \
+  #        --service-account ... --input -
+
+  # Against the local emulator (firebase emulators:start --only firestore):
+  #    (venv) python firebase_import_recipes.py --emulator localhost:8080 \
+  #        --input recipes.ndjson
+
+Re-imports are upserts:
+  Every recipe's document ID is a hash of its source_url (WordPress) or
+  reddit_url (Reddit), so importing the same recipes again overwrites the
+  same documents instead of adding a second copy of the collection.
+
+Sync mode (--manifest recipes_manifest.json):
+  A plain import rewrites every field of every recipe, including the
+  app-owned user_* feedback fields, which the scrapers reset to zero. With
+  --manifest the import keeps a local file of each document's content hash
+  from the last run and only writes what changed:
+
+    - recipes the manifest doesn't know are looked up first (one read per
+      recipe): new documents get the full record, existing ones a merge
+    - changed recipes get a merge masked on the scraped top-level fields,
+      each replaced whole (maps such as nutrition included); user_* /
+      total_ratings are never written, created_at (the scrape time for WP
+      pages) only on new documents, and fields the recipe no longer has
+      are deleted
+    - unchanged recipes cost nothing
+    - documents in the manifest but missing from the input are deleted,
+      unless that is more than --max-delete-share of them (a partial or
+      delta input file); --no-delete skips deletes altogether
+
+  The input must be the full dataset. The manifest only records writes
+  Firestore confirmed, so failed writes are retried on the next sync.
+
+        python firebase_import_recipes.py --service-account ... \
+            --input all_recipes.ndjson --manifest recipes_manifest.json
+
+Throughput:
+  Firestore's BulkWriter sends batches of 20 writes from a thread pool. It
+  starts at --initial-ops-per-second (500, Firestore's recommended starting
+  rate for a new collection) and raises the rate by 50% every 5 minutes,
+  up to --max-ops-per-second if given. At most --concurrency batches are
+  in flight at once (and never more writes than the current rate); the
+  stock BulkWriter sizes its pool by CPU count, which starves a high
+  latency connection on a small machine. Writes rejected for contention or
+  throttling (ABORTED, RESOURCE_EXHAUSTED, UNAVAILABLE, ...) are retried
+  up to --max-retries times; anything else is reported and skipped. The
+  run ends with the docs/sec achieved.
+
 NOTE:
   - This uses Firestore (recommended for app data).
   - Each recipe is stored as a single document with all fields from JSON.
 """
 
 import argparse
+import hashlib
 import json
-from typing import Any, Dict, List
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.bulk_writer import BulkWriter, BulkWriterOptions
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from recipe_io import read_records, recipe_doc_id
+
+DEFAULT_INITIAL_OPS_PER_SECOND = 500
+DEFAULT_MAX_RETRIES = 10
+# Batches of 20 writes in flight at once
+DEFAULT_CONCURRENCY = 32
+
+# gRPC status codes worth another attempt: DEADLINE_EXCEEDED,
+# RESOURCE_EXHAUSTED (throttled), ABORTED (contention), INTERNAL, UNAVAILABLE
+RETRYABLE_CODES = {4, 8, 10, 13, 14}
+
+EMULATOR_PROJECT = "demo-rashan"
+
+# Fields the app owns (feedback); sync never writes them to an existing document
+APP_FIELD_PREFIX = "user_"
+APP_FIELDS = {"total_ratings"}
+# Written when a document is created, then left alone (and not hashed)
+WRITE_ONCE_FIELDS = {"created_at"}
+
+MANIFEST_VERSION = 1
+# Unknown recipes are looked up this many at a time
+LOOKUP_BATCH_SIZE = 300
+DEFAULT_MAX_DELETE_SHARE = 0.2
+
+# Manifest entry: (content hash, scraped field names)
+ManifestEntry = Tuple[str, List[str]]
+
+
+def load_recipes(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield recipes from a JSON array or NDJSON file (optionally .gz, '-' = stdin)."""
+    return read_records(path)
+
+
+def is_app_field(name: str) -> bool:
+    return name.startswith(APP_FIELD_PREFIX) or name in APP_FIELDS
+
+
+def scraped_fields(recipe: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields sync writes to an existing document."""
+    return {k: v for k, v in recipe.items()
+            if not is_app_field(k) and k not in WRITE_ONCE_FIELDS}
+
 
+def content_hash(fields: Dict[str, Any]) -> str:
+    """Hash of the scraped fields, independent of key order."""
+    encoded = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
 
-def load_recipes(path: str) -> List[Dict[str, Any]]:
+
+def load_manifest(path: str, collection_name: str) -> Dict[str, ManifestEntry]:
+    """Content hashes by document ID from the last sync ({} if none)."""
+    if not os.path.exists(path):
+        return {}
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
-        if not isinstance(data, list):
-            raise ValueError("Input JSON must be a list of recipe objects.")
-        return data
+    if data.get("collection") != collection_name:
+        raise ValueError(f"{path} is the manifest of collection "
+                         f"'{data.get('collection')}', not '{collection_name}'")
+    return {doc_id: (entry[0], entry[1]) for doc_id, entry in data["documents"].items()}
+
+
+def save_manifest(path: str, collection_name: str, manifest: Dict[str, ManifestEntry]) -> None:
+    """Write the manifest atomically, so an interrupted sync keeps the old file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "collection": collection_name,
+                   "documents": manifest}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
 
 
-def init_firestore(service_account_path: str):
+def init_firestore(service_account_path: Optional[str], emulator: Optional[str] = None,
+                   project: Optional[str] = None):
+    if emulator:
+        # The client talks to the emulator, without credentials, when this is set
+        os.environ["FIRESTORE_EMULATOR_HOST"] = emulator
+        return firestore.Client(project=project or EMULATOR_PROJECT)
     cred = credentials.Certificate(service_account_path)
     # Only initialize once per process
     if not firebase_admin._apps:
-        firebase_admin.initialize_app(cred)
+        options = {"projectId": project} if project else None
+        firebase_admin.initialize_app(cred, options)
     return firestore.client()
 
 
+class RecipeBulkWriter(BulkWriter):
+    """
+    BulkWriter sending up to `concurrency` batches at once.
+
+    BulkWriter has no public setting for this, so the private
+    _instantiate_executor() hook is overridden. Tested with
+    google-cloud-firestore 2.34.1; construction fails if another version
+    has dropped the hook, instead of silently ignoring `concurrency`.
+    """
+
+    def __init__(self, client, options: BulkWriterOptions, concurrency: int):
+        if not callable(getattr(BulkWriter, "_instantiate_executor", None)):
+            raise RuntimeError(
+                "This google-cloud-firestore BulkWriter has no _instantiate_executor() "
+                "hook; --concurrency needs the version tested (2.34.1)."
+            )
+        self.concurrency = concurrency
+        super().__init__(client, options)
+        executor = getattr(self, "_executor", None)
+        if getattr(executor, "_max_workers", concurrency) != concurrency:
+            raise RuntimeError(
+                "BulkWriter did not use the _instantiate_executor() hook; "
+                "--concurrency needs the google-cloud-firestore version tested (2.34.1)."
+            )
+
+    def _instantiate_executor(self):
+        return ThreadPoolExecutor(max_workers=self.concurrency)
+
+
+class ImportProgress:
+    """Counts BulkWriter results (called from its worker threads)."""
+
+    def __init__(self, max_retries: int, report_every: int = 1000):
+        self.max_retries = max_retries
+        self.report_every = report_every
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.submitted = 0
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def on_result(self, reference, result, bulk_writer) -> None:
+        with self._lock:
+            self.written += 1
+            if self.written % self.report_every == 0:
+                print(f"  {self.written} written ({self.docs_per_second():.0f} docs/sec)")
+
+    def on_error(self, failure, bulk_writer) -> bool:
+        """Retry contention / throttling errors; give up on anything else."""
+        with self._lock:
+            if failure.code in RETRYABLE_CODES and failure.attempts < self.max_retries:
+                self.retries += 1
+                return True
+            self.failed += 1
+        path = failure.operation.reference.path
+        print(f"  [!] Write failed for {path} after {failure.attempts + 1} attempts: "
+              f"{failure.message} (code {failure.code})")
+        return False
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def docs_per_second(self) -> float:
+        return self.written / max(self.elapsed(), 1e-9)
+
+
+class SyncProgress(ImportProgress):
+    """ImportProgress that moves confirmed writes into the manifest."""
+
+    def __init__(self, manifest: Dict[str, ManifestEntry], max_retries: int,
+                 report_every: int = 1000):
+        super().__init__(max_retries, report_every)
+        self.manifest = manifest
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+        # doc ID -> manifest entry once written (None: being deleted)
+        self._pending: Dict[str, Optional[ManifestEntry]] = {}
+
+    def expect(self, doc_id: str, entry: Optional[ManifestEntry]) -> None:
+        with self._lock:
+            self._pending[doc_id] = entry
+
+    def on_result(self, reference, result, bulk_writer) -> None:
+        super().on_result(reference, result, bulk_writer)
+        with self._lock:
+            entry = self._pending.pop(reference.id)
+            if entry is None:
+                self.manifest.pop(reference.id, None)
+            else:
+                self.manifest[reference.id] = entry
+
+
+def open_bulk_writer(
+    db,
+    progress: ImportProgress,
+    initial_ops_per_second: int = DEFAULT_INITIAL_OPS_PER_SECOND,
+    max_ops_per_second: Optional[int] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> RecipeBulkWriter:
+    bulk_writer = RecipeBulkWriter(db, BulkWriterOptions(
+        initial_ops_per_second=initial_ops_per_second,
+        max_ops_per_second=max_ops_per_second,
+    ), concurrency)
+    bulk_writer.on_write_result(progress.on_result)
+    bulk_writer.on_write_error(progress.on_error)
+    return bulk_writer
+
+
+def close_bulk_writer(bulk_writer: RecipeBulkWriter) -> None:
+    # flush() waits for every write, including retries; close() alone
+    # marks the writer closed first and then rejects the retries
+    bulk_writer.flush()
+    bulk_writer.close()
+
+
+def report_failures(progress: ImportProgress) -> None:
+    unconfirmed = progress.submitted - progress.written - progress.failed
+    if progress.written < progress.submitted:
+        print(f"  [!] {progress.failed} writes failed, {unconfirmed} unconfirmed "
+              f"(batch errors); re-run the import to retry them.")
+
+
 def import_recipes(
     db,
-    recipes: List[Dict[str, Any]],
+    recipes: Iterable[Dict[str, Any]],
     collection_name: str,
-    batch_size: int = 400,
-):
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    **writer_options,
+) -> ImportProgress:
     """
-    Import recipes into Firestore in batches.
+    Upsert recipes into Firestore with a BulkWriter.
 
-    - Writes to collection_name
-    - Uses auto-generated document IDs
+    - Writes to collection_name, document ID from recipe_doc_id()
+    - A later record with the same ID as an earlier one is skipped, since
+      the BulkWriter does not keep the order of writes to one document
+    - Consumes `recipes` lazily; the BulkWriter's rate limit holds the
+      reader back while the current rate's worth of writes is in flight
+    - `writer_options` go to open_bulk_writer()
     """
-    total = len(recipes)
-    print(f"Total recipes to import: {total}")
-    if total == 0:
-        return
+    collection = db.collection(collection_name)
+    progress = ImportProgress(max_retries)
+    bulk_writer = open_bulk_writer(db, progress, **writer_options)
 
-    batch = db.batch()
-    written = 0
+    seen = set()
+    duplicates = 0
+    try:
+        for recipe in recipes:
+            doc_id = recipe_doc_id(recipe)
+            if doc_id in seen:
+                duplicates += 1
+                continue
+            seen.add(doc_id)
+            bulk_writer.set(collection.document(doc_id), recipe)
+            progress.submitted += 1
+    finally:
+        close_bulk_writer(bulk_writer)
 
-    for idx, recipe in enumerate(recipes, start=1):
-        doc_ref = db.collection(collection_name).document()
-        batch.set(doc_ref, recipe)
+    print(f"Imported {progress.written} of {progress.submitted} recipes into collection "
+          f"'{collection_name}' in {progress.elapsed():.1f}s "
+          f"({progress.docs_per_second():.0f} docs/sec, {progress.retries} retries).")
+    if duplicates:
+        print(f"  Skipped {duplicates} records repeating an earlier recipe's URL.")
+    report_failures(progress)
+    return progress
 
-        # Commit every batch_size documents
-        if idx % batch_size == 0:
-            print(f"Committing batch at {idx}/{total}...")
-            batch.commit()
-            batch = db.batch()
-            written = idx
 
-    # Commit remaining
-    if (total - written) > 0:
-        print(f"Committing final batch ({total - written} docs)...")
-        batch.commit()
+def sync_recipes(
+    db,
+    recipes: Iterable[Dict[str, Any]],
+    collection_name: str,
+    manifest_path: str,
+    delete_missing: bool = True,
+    max_delete_share: float = DEFAULT_MAX_DELETE_SHARE,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    **writer_options,
+) -> SyncProgress:
+    """
+    Write only the recipes that changed since the last sync (see --manifest).
 
-    print(f"Imported {total} recipes into collection '{collection_name}'.")
+    The manifest at manifest_path is updated with every confirmed write,
+    and saved even if the sync is interrupted.
+    """
+    collection = db.collection(collection_name)
+    manifest = load_manifest(manifest_path, collection_name)
+    known = set(manifest)
+    progress = SyncProgress(manifest, max_retries)
+    bulk_writer = open_bulk_writer(db, progress, **writer_options)
+
+    def write(doc_id: str, data: Dict[str, Any], entry: ManifestEntry,
+              merge: Union[bool, List[FieldPath]]) -> None:
+        progress.expect(doc_id, entry)
+        bulk_writer.set(collection.document(doc_id), data, merge=merge)
+        progress.submitted += 1
+
+    def update(doc_id: str, fields: Dict[str, Any], entry: ManifestEntry,
+               previous_fields: Iterable[str] = ()) -> None:
+        data = dict(fields)
+        for name in previous_fields:
+            if name not in data:
+                data[name] = firestore.DELETE_FIELD
+        # Mask on the top-level names: merge=True would mask the leaves and
+        # deep-merge maps such as nutrition, keeping keys the recipe dropped
+        write(doc_id, data, entry, merge=[FieldPath(name) for name in data])
+        progress.updated += 1
+
+    unknown: List[Tuple[str, Dict[str, Any], Dict[str, Any], ManifestEntry]] = []
+
+    def write_unknown() -> None:
+        refs = [collection.document(doc_id) for doc_id, _, _, _ in unknown]
+        existing = {snap.id for snap in db.get_all(refs, field_paths=[]) if snap.exists}
+        for doc_id, recipe, fields, entry in unknown:
+            if doc_id in existing:
+                update(doc_id, fields, entry)
+            else:
+                write(doc_id, recipe, entry, merge=False)
+                progress.created += 1
+        unknown.clear()
+
+    seen = set()
+    duplicates = 0
+    try:
+        for recipe in recipes:
+            doc_id = recipe_doc_id(recipe)
+            if doc_id in seen:
+                duplicates += 1
+                continue
+            seen.add(doc_id)
+
+            fields = scraped_fields(recipe)
+            entry = (content_hash(fields), sorted(fields))
+            previous = manifest.get(doc_id)
+            if previous is None:
+                unknown.append((doc_id, recipe, fields, entry))
+                if len(unknown) == LOOKUP_BATCH_SIZE:
+                    write_unknown()
+            elif previous[0] == entry[0]:
+                progress.unchanged += 1
+            else:
+                update(doc_id, fields, entry, previous[1])
+        if unknown:
+            write_unknown()
+
+        gone = known - seen
+        if gone and not delete_missing:
+            print(f"  {len(gone)} documents are no longer in the input (not deleted).")
+        elif gone and len(gone) > max_delete_share * len(known):
+            print(f"  [!] {len(gone)} of {len(known)} documents are no longer in the "
+                  f"input; not deleting more than {max_delete_share:.0%} of them. "
+                  f"Is --input the full dataset?")
+        else:
+            for doc_id in sorted(gone):
+                progress.expect(doc_id, None)
+                bulk_writer.delete(collection.document(doc_id))
+                progress.submitted += 1
+                progress.deleted += 1
+    finally:
+        try:
+            close_bulk_writer(bulk_writer)
+        finally:
+            save_manifest(manifest_path, collection_name, progress.manifest)
+
+    print(f"Synced collection '{collection_name}' in {progress.elapsed():.1f}s: "
+          f"{progress.created} created, {progress.updated} updated, "
+          f"{progress.deleted} deleted, {progress.unchanged} unchanged "
+          f"({progress.written} writes, {progress.retries} retries).")
+    if duplicates:
+        print(f"  Skipped {duplicates} records repeating an earlier recipe's URL.")
+    report_failures(progress)
+    return progress
 
 
 def main():
@@ -94,13 +454,13 @@ def main():
     )
     parser.add_argument(
         "--service-account",
-        required=True,
-        help="Path to Firebase service account JSON file.",
+        help="Path to Firebase service account JSON file (not needed with --emulator).",
     )
     parser.add_argument(
         "--input",
         required=True,
-        help="Path to input recipes JSON file (list of recipe objects).",
+        help="Path to input recipes: JSON list of recipe objects, or NDJSON "
+        "(.ndjson / .jsonl, optionally .gz); '-' reads NDJSON from stdin.",
     )
     parser.add_argument(
         "--collection",
@@ -108,30 +468,104 @@ def main():
         help="Firestore collection name to write into (default: recipes).",
     )
     parser.add_argument(
-        "--batch-size",
+        "--initial-ops-per-second",
         type=int,
-        default=400,
-        help="Number of documents per Firestore batch write (max 500).",
+        default=DEFAULT_INITIAL_OPS_PER_SECOND,
+        help="Starting write rate, ramped up 50%% every 5 minutes "
+        f"(default: {DEFAULT_INITIAL_OPS_PER_SECOND}).",
+    )
+    parser.add_argument(
+        "--max-ops-per-second",
+        type=int,
+        help="Cap on the write rate (default: no cap).",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help="Attempts per write after contention / throttling errors "
+        f"(default: {DEFAULT_MAX_RETRIES}).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Batches (of 20 writes) in flight at once (default: {DEFAULT_CONCURRENCY}).",
+    )
+    parser.add_argument(
+        "--emulator",
+        metavar="HOST:PORT",
+        help="Write to a local Firestore emulator instead (e.g. localhost:8080).",
+    )
+    parser.add_argument(
+        "--project",
+        help=f"Firebase project ID (default: the service account's, or "
+        f"'{EMULATOR_PROJECT}' with --emulator).",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="Sync mode: write only recipes changed since the import that "
+        "wrote this manifest file (created on first use).",
+    )
+    parser.add_argument(
+        "--no-delete",
+        action="store_true",
+        help="Sync mode: keep documents that are no longer in the input.",
+    )
+    parser.add_argument(
+        "--max-delete-share",
+        type=float,
+        default=DEFAULT_MAX_DELETE_SHARE,
+        help="Sync mode: skip deletes if more than this share of the manifest "
+        f"would go (default: {DEFAULT_MAX_DELETE_SHARE}).",
     )
 
     args = parser.parse_args()
+    if not args.service_account and not args.emulator:
+        parser.error("--service-account is required unless --emulator is given")
 
     print("============================================================")
     print("RASHAN FIREBASE RECIPES IMPORT")
     print("============================================================")
-    print(f"Service account : {args.service_account}")
+    if args.emulator:
+        print(f"Emulator        : {args.emulator}")
+    else:
+        print(f"Service account : {args.service_account}")
     print(f"Input JSON      : {args.input}")
     print(f"Collection      : {args.collection}")
-    print(f"Batch size      : {args.batch_size}")
+    if args.manifest:
+        print(f"Manifest        : {args.manifest}")
+    print(f"Ops/sec         : {args.initial_ops_per_second} initial, "
+          f"{args.max_ops_per_second or 'no'} max")
+    print(f"Concurrency     : {args.concurrency} batches")
     print("============================================================\n")
 
     recipes = load_recipes(args.input)
-    db = init_firestore(args.service_account)
-    import_recipes(db, recipes, args.collection, batch_size=args.batch_size)
+    db = init_firestore(args.service_account, args.emulator, args.project)
+    writer_options = dict(
+        initial_ops_per_second=args.initial_ops_per_second,
+        max_ops_per_second=args.max_ops_per_second,
+        max_retries=args.max_retries,
+        concurrency=args.concurrency,
+    )
+    if args.manifest:
+        progress = sync_recipes(
+            db,
+            recipes,
+            args.collection,
+            args.manifest,
+            delete_missing=not args.no_delete,
+            max_delete_share=args.max_delete_share,
+            **writer_options,
+        )
+    else:
+        progress = import_recipes(db, recipes, args.collection, **writer_options)
 
-    print("\n[✓] Import complete.")
+    if progress.written < progress.submitted:
+        print("\n[!] Import finished with errors.")
+    else:
+        print("\n[✓] Import complete.")
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+On-disk HTTP cache shared by the Rashan scrapers.
+
+Used by crawl_wp_recipes.py, wp_recipe_scraper.py and nutrition_helper.py
+so that re-running the pipeline over an unchanged site costs mostly local
+disk reads and 304 Not Modified responses.
+
+  - Bodies of 200 responses are stored zlib-compressed in one SQLite file,
+    keyed by the full request URL (an `api_key` query param is left out of
+    the key, and never stored)
+  - Within `ttl_seconds` a cached body is served without touching the
+    network; after that the request is revalidated with If-None-Match /
+    If-Modified-Since from the stored ETag / Last-Modified
+  - Once the cache grows past `max_bytes` the least recently used entries
+    are evicted
+
+Caching is off unless a cache file is configured, either with the scripts'
+--http_cache flag or the RASHAN_HTTP_CACHE environment variable:
+
+  export RASHAN_HTTP_CACHE=~/.cache/rashan_http.sqlite
+
+Any object with the same get/put/refresh methods as HttpCache can be passed
+to CachedSession instead (e.g. an in-memory cache in a notebook).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+CACHE_ENV_VAR = "RASHAN_HTTP_CACHE"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Response headers worth keeping with a cached body
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+# Query params that must not end up in cache keys
+SECRET_PARAMS = {"api_key"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+class HttpCache:
+    """SQLite-backed response cache with TTL and size-based LRU eviction."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = os.path.expanduser(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        row = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._total_bytes = row[0]
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached entry for key (body decompressed), or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, content_type, etag, last_modified, fetched_at "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._db.commit()
+        body, content_type, etag, last_modified, fetched_at = row
+        return {
+            "body": zlib.decompress(body),
+            "content-type": content_type,
+            "etag": etag,
+            "last-modified": last_modified,
+            "fetched_at": fetched_at,
+        }
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    def put(self, key: str, body: bytes, headers: Dict[str, Optional[str]]) -> None:
+        """Store a 200 response body, then evict LRU entries if over budget."""
+        blob = zlib.compress(body, 6)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, body, content_type, etag, last_modified, fetched_at, "
+                "last_access, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    blob,
+                    headers.get("content-type"),
+                    headers.get("etag"),
+                    headers.get("last-modified"),
+                    now,
+                    now,
+                    len(blob),
+                ),
+            )
+            self._total_bytes += len(blob) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def refresh(self, key: str) -> None:
+        """Mark an entry as just revalidated (after a 304)."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ?, last_access = ? WHERE key = ?",
+                (now, now, key),
+            )
+            self._db.commit()
+
+    def _evict(self) -> None:
+        # Drop least recently used entries until we are 10% under budget
+        target = self.max_bytes * 0.9
+        rows = self._db.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        )
+        doomed = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            doomed.append((key,))
+            self._total_bytes -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def cache_key(url: str, params: Optional[Dict] = None) -> str:
+    """Full request URL with sorted query params, minus secrets like api_key."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((k, str(v)) for k, v in params.items())
+    query = sorted((k, v) for k, v in query if k not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def _response_from_cache(entry: Dict, url: str) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = url
+    resp._content = entry["body"]
+    resp.headers = CaseInsensitiveDict(
+        {h: entry[h] for h in STORED_HEADERS if entry.get(h)}
+    )
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.from_cache = True
+    return resp
+
+
+class CachedSession:
+    """
+    Drop-in for requests.Session.get that goes through an HttpCache.
+
+    With cache=None every call is passed straight to the wrapped session.
+    Streaming requests (stream=True) are never cached.
+    """
+
+    def __init__(self, cache=None, session: Optional[requests.Session] = None):
+        self.cache = cache
+        self.session = session or requests.Session()
+
+    def get(self, url: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+        if self.cache is None or kwargs.get("stream"):
+            return self.session.get(url, params=params, **kwargs)
+
+        key = cache_key(url, params)
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(entry):
+            self.cache.hits += 1
+            return _response_from_cache(entry, url)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last-modified"):
+                headers["If-Modified-Since"] = entry["last-modified"]
+
+        resp = self.session.get(url, params=params, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and entry is not None:
+            self.cache.revalidated += 1
+            self.cache.refresh(key)
+            return _response_from_cache(entry, url)
+
+        self.cache.misses += 1
+        if resp.status_code == 200:
+            self.cache.put(
+                key, resp.content, {h: resp.headers.get(h) for h in STORED_HEADERS}
+            )
+        resp.from_cache = False
+        return resp
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_default_cache: Optional[HttpCache] = None
+_configured = False
+_default_session: Optional[CachedSession] = None
+
+
+def configure(
+    path: Optional[str] = None,
+    ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Optional[HttpCache]:
+    """
+    Set up the process-wide cache used by http_get / cached_session.
+
+    path=None falls back to $RASHAN_HTTP_CACHE; if that is unset too,
+    caching stays disabled.
+    """
+    global _default_cache, _configured, _default_session
+    path = path or os.environ.get(CACHE_ENV_VAR)
+    _default_cache = HttpCache(path, ttl_seconds, max_bytes) if path else None
+    _default_session = None
+    _configured = True
+    return _default_cache
+
+
+def default_cache() -> Optional[HttpCache]:
+    if not _configured:
+        configure()
+    return _default_cache
+
+
+def cached_session(session: Optional[requests.Session] = None) -> CachedSession:
+    """Wrap `session` (or a new one) with the process-wide cache."""
+    return CachedSession(default_cache(), session)
+
+
+def http_get(url: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+    """requests.get replacement that goes through the process-wide cache."""
+    global _default_session
+    if _default_session is None:
+        _default_session = cached_session()
+    return _default_session.get(url, params=params, **kwargs)
+
+
+def print_stats() -> None:
+    """Print hit/revalidation/miss counts of the process-wide cache, if any."""
+    cache = _default_cache
+    if cache is None:
+        return
+    print(
+        f"HTTP cache        : {cache.hits} fresh hits, "
+        f"{cache.revalidated} revalidated (304), {cache.misses} downloads"
+    )
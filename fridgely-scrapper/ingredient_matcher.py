@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Multi-pattern ingredient name matcher for nutrition_helper.py.
+
+An Aho-Corasick automaton over *words*: every pattern ("olive oil",
+"kabuli chana", "ಈರುಳ್ಳಿ") is split into word tokens and added to a trie
+whose failure links are computed once up front. Matching an ingredient line
+then takes a single left-to-right pass over its tokens, however many
+patterns are loaded, instead of one substring test per pattern.
+
+Rules:
+  - Word boundaries: patterns only match whole words, so "egg" does not
+    fire inside "eggplant" and "dal" not inside "sandalwood"
+  - Longest match wins (most words); on a tie the leftmost one
+  - Matching is case-insensitive; Indic scripts are tokenised with their
+    vowel signs / viramas so native-script names work too
+
+Example:
+  matcher = IngredientMatcher({"olive oil": "olive oil", "oil": "oil"})
+  matcher.find("2 tbsp extra virgin olive oil")  # -> "olive oil"
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Letters plus combining marks (Latin accents, Devanagari … Malayalam
+# blocks). Digits and punctuation separate words.
+WORD_RE = re.compile(r"(?:[^\W\d_]|[\u0300-\u036f\u0900-\u0dff])+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens of text."""
+    return WORD_RE.findall(text.lower())
+
+
+def plural_forms(name: str) -> List[str]:
+    """Simple English plurals of the last word: chilli -> chillies, berry -> berries."""
+    head, _, last = name.rpartition(" ")
+    prefix = head + " " if head else ""
+    if not last.isascii() or len(last) < 3:
+        return []
+    if last.endswith("y") and last[-2] not in "aeiou":
+        return [prefix + last[:-1] + "ies"]
+    forms = [prefix + last + "s"]
+    if last.endswith(("s", "x", "z", "ch", "sh", "o", "i")):
+        forms.append(prefix + last + "es")
+    return forms
+
+
+class IngredientMatcher:
+    """Word-level Aho-Corasick automaton mapping ingredient names to values."""
+
+    def __init__(self, patterns: Optional[Dict[str, Any]] = None):
+        # Node 0 is the root. _goto[n] maps a word to the child node and
+        # _out[n] is the pattern ending exactly at n as (num_words, value).
+        # _fail / _best are filled in by _build(): _best[n] is the longest
+        # pattern ending at n, following failure links.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[Optional[Tuple[int, Any]]] = [None]
+        self._fail: List[int] = []
+        self._best: List[Optional[Tuple[int, Any]]] = []
+        self.num_patterns = 0
+        if patterns:
+            self.add_all(patterns.items())
+
+    def __len__(self) -> int:
+        return self.num_patterns
+
+    def add(self, pattern: str, value: Any) -> None:
+        """Add a pattern; a later value for the same words replaces the earlier one."""
+        words = tokenize(pattern)
+        if not words:
+            return
+        node = 0
+        for word in words:
+            child = self._goto[node].get(word)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][word] = child
+                self._goto.append({})
+                self._out.append(None)
+            node = child
+        if self._out[node] is None:
+            self.num_patterns += 1
+        self._out[node] = (len(words), value)
+        self._fail = []  # rebuild on next find()
+
+    def add_all(self, items: Iterable[Tuple[str, Any]]) -> None:
+        for pattern, value in items:
+            self.add(pattern, value)
+
+    def _build(self) -> None:
+        goto = self._goto
+        fail = [0] * len(goto)
+        # A node's own pattern is always the longest one ending there
+        best = self._out[:]
+        # BFS from the root, so a node's failure target is final before
+        # its children are visited
+        queue = list(goto[0].values())
+        for node in queue:  # the list grows while we walk it
+            for word, child in goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and word not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(word, 0)
+                if best[child] is None:
+                    best[child] = best[fail[child]]
+        self._fail = fail
+        self._best = best
+
+    def find(self, text: str) -> Optional[Any]:
+        """Value of the longest (then leftmost) pattern in text, or None."""
+        if not self._fail:
+            self._build()
+        goto, fail, best = self._goto, self._fail, self._best
+        node = 0
+        found: Optional[Tuple[int, Any]] = None
+        for word in tokenize(text):
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            hit = best[node]
+            if hit is not None and (found is None or hit[0] > found[0]):
+                found = hit
+        return found[1] if found is not None else None
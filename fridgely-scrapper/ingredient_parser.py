@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Ingredient line parser: quantity, unit, name and an estimated gram weight.
+
+Turns scraped lines such as
+
+  "▢ 1½ cups water"           -> 1.5 cup water            ~ 360 g
+  "2 – 15 oz cans chickpeas"  -> 2 x 15 oz chickpeas      ~ 850 g
+  "1/2 katori toor dal"       -> 0.5 katori toor dal      ~ 60 g
+  "2-3 green chillies, slit"  -> 2.5 green chillies       ~ 10 g
+
+into numbers nutrition_helper.py can scale per-100 g values with.
+
+Handles:
+  - Unicode vulgar fractions (½, 1½, 1 ½), ASCII fractions (1/2, 1 1/2,
+    1-1/2) and decimals
+  - Ranges (2-3, 2 – 3, 2 to 3), counted as their midpoint; "N – M unit
+    can(s)" is read as N cans of M units each
+  - The "▢" checkbox WP Recipe Maker prints before each line, and
+    markdown / typographic bullets
+  - Metric, US/imperial and Indian household units (katori, glass, pinch …)
+  - Volume -> grams through a per-ingredient density table; whole items
+    ("2 onions") through typical piece weights
+
+The whole line prefix is one precompiled regex and name-based tables go
+through a single-pass IngredientMatcher, so parsing runs at well over 100k
+lines/sec (see bench_ingredient_parser.py).
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from ingredient_matcher import IngredientMatcher, plural_forms
+
+# Weight assumed when nothing better is known (what nutrition_helper used to
+# assume for every line)
+DEFAULT_GRAMS = 100.0
+
+VULGAR_FRACTIONS = "½⅓⅔¼¾⅕⅖⅗⅘⅙⅚⅐⅛⅜⅝⅞⅑⅒"
+
+# Unit alias -> (canonical unit, grams or millilitres per unit, is_volume)
+UNITS = {}
+for _aliases, _unit, _amount, _is_volume in [
+    # Mass
+    (("g", "gm", "gms", "gr", "gram", "grams", "gramme", "grammes"), "g", 1.0, False),
+    (("kg", "kgs", "kilo", "kilos", "kilogram", "kilograms"), "kg", 1000.0, False),
+    (("mg", "milligram", "milligrams"), "mg", 0.001, False),
+    (("oz", "ounce", "ounces"), "oz", 28.35, False),
+    (("lb", "lbs", "pound", "pounds"), "lb", 453.6, False),
+    (("pinch", "pinches"), "pinch", 0.3, False),
+    (("dash", "dashes"), "dash", 0.6, False),
+    # Volume
+    (("ml", "mls", "milliliter", "milliliters", "millilitre", "millilitres"), "ml", 1.0, True),
+    (("l", "liter", "liters", "litre", "litres", "ltr"), "l", 1000.0, True),
+    (("fl oz", "fluid ounce", "fluid ounces"), "fl oz", 29.57, True),
+    (("cup", "cups", "c"), "cup", 240.0, True),
+    (("tbsp", "tbsps", "tbs", "tbl", "tblsp", "tablespoon", "tablespoons", "T"), "tbsp", 15.0, True),
+    (("tsp", "tsps", "teaspoon", "teaspoons", "t"), "tsp", 5.0, True),
+    (("pint", "pints", "pt"), "pint", 473.0, True),
+    (("quart", "quarts", "qt"), "quart", 946.0, True),
+    (("katori", "katoris", "bowl", "bowls"), "katori", 150.0, True),
+    (("glass", "glasses"), "glass", 250.0, True),
+    # Countable household measures, as typical grams
+    (("clove", "cloves"), "clove", 5.0, False),
+    (("inch", "inches", "in"), "inch", 5.0, False),
+    (("sprig", "sprigs"), "sprig", 1.0, False),
+    (("handful", "handfuls", "fistful"), "handful", 30.0, False),
+    (("bunch", "bunches"), "bunch", 100.0, False),
+    (("slice", "slices"), "slice", 30.0, False),
+    # Containers, when no size is given
+    (("can", "cans", "tin", "tins"), "can", 400.0, False),
+    (("jar", "jars"), "jar", 350.0, False),
+    (("bottle", "bottles"), "bottle", 500.0, False),
+    (("packet", "packets", "pack", "packs", "pkt", "box", "boxes", "bag", "bags"),
+     "packet", 250.0, False),
+]:
+    for _alias in _aliases:
+        UNITS[_alias] = (_unit, _amount, _is_volume)
+
+# Container units: "2 (15 oz) cans", "2 – 15 oz cans" mean 2 x 15 oz
+CONTAINER_UNITS = ("can", "jar", "bottle", "packet")
+CONTAINER_WORDS = [alias for alias, unit in UNITS.items() if unit[0] in CONTAINER_UNITS]
+
+# Density in g/ml for volume -> weight (anything else counts as water, 1.0)
+DENSITIES = {
+    "oil": 0.92, "ghee": 0.91, "butter": 0.96, "honey": 1.42, "jaggery": 0.9,
+    "flour": 0.53, "atta": 0.53, "maida": 0.53, "besan": 0.45, "gram flour": 0.45,
+    "rava": 0.7, "sooji": 0.7, "semolina": 0.7, "rice": 0.85, "poha": 0.3,
+    "oats": 0.36, "sugar": 0.85, "brown sugar": 0.9, "salt": 1.2,
+    "dal": 0.8, "lentil": 0.8, "chickpea": 0.7, "chana": 0.7, "rajma": 0.75,
+    "coconut": 0.35, "grated coconut": 0.35, "coconut milk": 0.97,
+    "yogurt": 1.03, "curd": 1.03, "cream": 1.0, "milk": 1.03,
+    "paneer": 0.55, "cheese": 0.45, "peas": 0.6, "nuts": 0.55, "cashew": 0.55,
+    "peanut": 0.6, "almond": 0.55, "spinach": 0.13, "coriander": 0.1,
+    "chopped onion": 0.65, "onion": 0.65, "tomato": 0.75, "potato": 0.65,
+    "powder": 0.5, "chilli powder": 0.5, "turmeric": 0.6, "cumin": 0.45,
+    "seeds": 0.55, "spice": 0.5, "masala": 0.5,
+}
+
+# Typical weight in grams of one whole item
+PIECE_WEIGHTS = {
+    "onion": 110, "tomato": 120, "potato": 170, "carrot": 60, "egg": 50,
+    "green chilli": 4, "green chili": 4, "chilli": 4, "chili": 4,
+    "red chilli": 1, "dried red chilli": 1, "garlic": 5, "ginger": 15,
+    "lemon": 60, "lime": 45, "banana": 120, "apple": 180, "cucumber": 300,
+    "capsicum": 150, "bell pepper": 150, "brinjal": 250, "eggplant": 250,
+    "bay leaf": 0.2, "cardamom": 0.2, "clove": 0.1, "cinnamon": 2,
+    "curry leaves": 0.1, "chicken breast": 170, "chicken thigh": 110,
+    "bread": 30, "roti": 40, "chapati": 40, "tortilla": 45, "avocado": 170,
+}
+
+_NUM = (
+    r"\d+(?:"
+    rf"\s*[{VULGAR_FRACTIONS}]"          # 1½, 1 ½
+    r"|\s+\d+[/⁄]\d+"                  # 1 1/2
+    r"|[/⁄]\d+"                         # 1/2
+    r"|\.\d+"                           # 0.5
+    r")?"
+    rf"|[{VULGAR_FRACTIONS}]"           # ½
+    r"|(?i:an?)(?=\s)"                  # a pinch, An onion
+)
+_UNIT_ALT = "|".join(
+    re.escape(u) for u in sorted(UNITS, key=len, reverse=True)
+)
+# Any word where a unit could be; looked up in UNITS afterwards, which is
+# much faster than alternating over every alias inside LINE_RE
+_UNIT_WORD = r"fl\.?\s*oz|fluid\s+ounces?|[^\W\d_]+"
+_CONTAINER_ALT = "|".join(sorted(CONTAINER_WORDS, key=len, reverse=True))
+
+LINE_RE = re.compile(
+    rf"""
+    ^[\s▢☐□•·*\-–—]*                                  # bullets
+    (?:(?i:about|approx\.?|approximately|around)\s+|~\s*)?
+    (?:(?P<qty>{_NUM})
+       (?:\s*(?:-|–|—|to|or)\s*(?P<qty2>{_NUM}))?     # range
+    )?
+    \s*
+    (?:\((?P<paren>[^)]*)\)\s*)?                      # 2 (15 oz) cans
+    (?P<after>
+      (?:(?P<unit>{_UNIT_WORD})\.?\s*)?
+      (?:(?P<container>(?i:{_CONTAINER_ALT}))\b\s*)?  # 15 oz cans
+      (?:(?i:of)\s+)?
+      (?P<rest>.*)
+    )$
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+PAREN_SIZE_RE = re.compile(
+    rf"^\s*(?P<qty>{_NUM})\s*(?P<unit>{_UNIT_ALT})\.?\s*$", re.IGNORECASE
+)
+# "(200 g)" right after the unit: an explicit weight for the whole amount
+LEADING_PAREN_RE = re.compile(r"^\(([^)]*)\)\s*")
+PARENS_RE = re.compile(r"\([^)]*\)?")
+# Amount-free phrases, matched on the lower-cased name
+UNQUANTIFIED_RE = re.compile(
+    r"\b(?:to taste|as (?:needed|required|per taste)|"
+    r"for (?:garnish(?:ing)?|frying|deep frying)|optional)\b"
+)
+
+
+def _matcher_with_plurals(table) -> IngredientMatcher:
+    matcher = IngredientMatcher(table)
+    for name, value in table.items():
+        for plural in plural_forms(name):
+            if plural not in table:
+                matcher.add(plural, value)
+    return matcher
+
+
+_DENSITY_MATCHER = _matcher_with_plurals(DENSITIES)
+_PIECE_MATCHER = _matcher_with_plurals(PIECE_WEIGHTS)
+
+
+class ParsedIngredient(NamedTuple):
+    quantity: Optional[float]   # midpoint for ranges; None if not given
+    unit: Optional[str]         # canonical unit, e.g. "cup", "g", "katori"
+    name: str                   # ingredient text without amounts / notes
+    grams: float                # estimated weight of the whole line
+
+
+def parse_number(text: str) -> float:
+    """'1½' -> 1.5, '1 1/2' -> 1.5, '3/4' -> 0.75, '2.5' -> 2.5"""
+    if text.isdigit():
+        return float(text)
+    text = text.replace("⁄", "/")
+    total = 0.0
+    for part in text.split():
+        if part.lower() in ("a", "an"):
+            total += 1.0
+        elif "/" in part:
+            num, _, den = part.partition("/")
+            total += float(num) / float(den) if float(den) else 0.0
+        elif part[-1] in VULGAR_FRACTIONS:
+            whole = part[:-1]
+            total += (float(whole) if whole else 0.0) + unicodedata.numeric(part[-1])
+        else:
+            total += float(part)
+    return total
+
+
+def lookup_unit(word: str):
+    """UNITS entry for a unit as written ("cups", "Tbsp", "fl. oz"), or None"""
+    unit = UNITS.get(word)
+    if unit is None:
+        unit = UNITS.get(" ".join(word.lower().replace(".", " ").split()))
+    return unit
+
+
+@lru_cache(maxsize=8192)
+def _name_info(name: str):
+    """(density g/ml, piece weight g or None) for an ingredient name"""
+    return _DENSITY_MATCHER.find(name) or 1.0, _PIECE_MATCHER.find(name)
+
+
+def parse_ingredient_line(line: str) -> Optional[ParsedIngredient]:
+    """
+    Parse one ingredient line; None for blank lines and group headings
+    ("For the masala:").
+    """
+    match = LINE_RE.match(line)
+    qty_text, qty2_text, paren, unit_word, container, rest = match.group(
+        "qty", "qty2", "paren", "unit", "container", "rest"
+    )
+    unit = None
+    if unit_word:
+        unit = UNITS.get(unit_word) or lookup_unit(unit_word)
+        if unit is None:
+            # Not a unit after all, just the first word of the name
+            rest = match.group("after")
+            container = None
+    rest = rest.strip()
+    if not qty_text and (not rest or rest.endswith(":")):
+        return None
+
+    quantity = parse_number(qty_text) if qty_text else None
+    count = 1.0
+
+    if qty2_text:
+        high = parse_number(qty2_text)
+        if container:
+            # "2 – 15 oz cans": two cans of 15 oz
+            count, quantity = quantity, high
+        elif high < 1 <= quantity and qty_text.isdigit() and "/" in qty2_text:
+            # "1-1/2 cups" is a mixed number, not a range
+            quantity += high
+        else:
+            quantity = (quantity + high) / 2
+
+    if paren and unit is not None and unit[0] in CONTAINER_UNITS:
+        size = PAREN_SIZE_RE.match(paren)
+        if size:
+            # "2 (15 oz) cans chickpeas"
+            count = quantity if quantity is not None else 1.0
+            quantity = parse_number(size.group("qty"))
+            unit = lookup_unit(size.group("unit"))
+
+    # An explicit weight in parentheses beats any conversion: "1 cup (200 g) rice".
+    # After a container it is the size of one container: "2 cans (400 g) tomatoes"
+    # reads like "2 (400 g) cans tomatoes"
+    explicit_grams = None
+    paren = LEADING_PAREN_RE.match(rest) if rest.startswith("(") else None
+    if paren:
+        size = PAREN_SIZE_RE.match(paren.group(1))
+        size_unit = lookup_unit(size.group("unit")) if size else None
+        if size_unit and unit is not None and unit[0] in CONTAINER_UNITS:
+            count = quantity if quantity is not None else 1.0
+            quantity = parse_number(size.group("qty"))
+            unit = size_unit
+        elif size_unit and not size_unit[2]:
+            explicit_grams = parse_number(size.group("qty")) * size_unit[1]
+
+    name, unquantified = UNQUANTIFIED_RE.subn("", rest.lower())
+    if "(" in name:
+        name = PARENS_RE.sub("", name)
+    # Everything from the first comma / semicolon on is preparation notes
+    name = name.partition(",")[0].partition(";")[0].strip()
+
+    if explicit_grams is not None:
+        grams = explicit_grams
+    elif unit is not None:
+        grams = (quantity if quantity is not None else 1.0) * unit[1]
+        if unit[2]:
+            grams *= _name_info(name)[0]
+    elif quantity is not None:
+        piece = _name_info(name)[1]
+        grams = quantity * (piece if piece is not None else DEFAULT_GRAMS)
+    elif unquantified:
+        grams = 0.0
+    else:
+        piece = _name_info(name)[1]
+        grams = piece if piece is not None else DEFAULT_GRAMS
+
+    return ParsedIngredient(quantity, unit[0] if unit else None, name, grams * count)
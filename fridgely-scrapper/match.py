@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Batch recipe matching for fridge inventories, on top of recipe_index.py.
+
+Given inventories (lists of item names, or the app's InventoryItem objects
+from the scanner / pantry), returns each one's top-K recipes. The whole
+corpus is scored with sparse matrix products, many inventories at a time:
+
+  - the index's posting lists are an (ingredient x recipe) CSR matrix
+  - a block of inventories is an (inventory x ingredient) 0/1 matrix
+  - their product holds, for every inventory, the number of its
+    ingredients each recipe uses – only the postings of the inventory's
+    own ingredients are read, and only recipes using at least one of
+    them get an entry
+  - each row's entries are scored in place, a partial sort (np.partition)
+    of the row finds its K-th best score, and only the entries scoring at
+    least that much are fully sorted; nothing is ever expanded to a dense
+    inventory x recipe matrix
+
+Scores:
+
+  - coverage: share of the recipe's ingredients the inventory has (the
+    app's matchPercent), ties broken by most ingredients available
+  - weighted: the same share with every ingredient weighted by its
+    inverse document frequency, log(1 + recipes / recipes using it), so
+    having the paneer counts for more than having the onion; ingredients
+    the index leaves out count as used by a single recipe
+
+Inventory names go through recipe_index.canonical_name(), so "Tomatoes",
+"Red Onion" and "kabuli chana" find tomato, onion and chickpea. Scanner
+items the user has not confirmed ("confirmed": false) are ignored.
+
+Input: records with an "items" list (other fields are copied to the
+output), one set of matches written per record. Needs numpy and scipy.
+
+Example:
+  python match.py --index recipe_index.bin inventories.ndjson -o matches.ndjson
+  python match.py --index recipe_index.bin --inventory "eggs, tomato, onion, paneer" --score weighted
+"""
+
+import argparse
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Union
+
+import numpy as np
+from scipy import sparse
+
+from recipe_index import DEFAULT_TOP_K, RecipeIndex
+from recipe_io import RecordWriter, progress_to_stderr, read_records
+
+SCORES = ("coverage", "weighted")
+INVENTORY_FIELD = "items"
+
+# Most (inventory, recipe) entries one block of inventories may produce (an
+# upper bound from the posting list lengths)
+MAX_BLOCK_ENTRIES = 1 << 23
+
+InventoryItem = Union[str, Dict[str, Any]]
+
+
+class Match(NamedTuple):
+    recipe_id: str
+    score: float      # 0-1, per the scoring used
+    available: int    # recipe ingredients in the inventory
+    needed: int       # recipe ingredients, pantry staples excluded
+
+    @property
+    def match_percent(self) -> int:
+        return int(round(100 * self.score))
+
+
+def inventory_names(items: Iterable[InventoryItem]) -> List[str]:
+    """Item names from names or InventoryItem dicts, unconfirmed scans left out."""
+    names = []
+    for item in items:
+        if isinstance(item, dict):
+            if item.get("confirmed") is False or not item.get("name"):
+                continue
+            item = item["name"]
+        names.append(item)
+    return names
+
+
+class RecipeMatcher:
+    """Top-K recipe scoring for batches of inventories over a RecipeIndex."""
+
+    def __init__(self, index: RecipeIndex):
+        self.index = index
+        num_recipes, num_names = len(index), len(index.names)
+        postings = [index.recipes_with(i) for i in range(num_names)]
+        self.recipes_using = np.array([len(p) for p in postings], dtype=np.int64)
+        indptr = np.concatenate(([0], np.cumsum(self.recipes_using)))
+        indices = np.concatenate(postings) if postings else np.zeros(0, dtype=np.int64)
+        self.counts = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr),
+            shape=(num_names, num_recipes),
+        )
+
+        self.weights = np.log1p(num_recipes / np.maximum(self.recipes_using, 1))
+        rare_weight = np.log1p(num_recipes)
+        self.weighted = sparse.csr_matrix(
+            (np.repeat(self.weights, self.recipes_using), indices, indptr),
+            shape=(num_names, num_recipes),
+        )
+        # Per recipe: ingredients and total weight needed, including the
+        # ingredients the index leaves out
+        self.needed = index.totals.astype(np.int64)
+        indexed = np.bincount(indices, minlength=num_recipes)
+        self.needed_weight = (
+            np.bincount(indices, weights=self.weighted.data, minlength=num_recipes)
+            + (self.needed - indexed) * rare_weight
+        )
+
+    def top_k(self, inventories: Sequence[Iterable[InventoryItem]], k: int = DEFAULT_TOP_K,
+              score: str = "coverage") -> List[List[Match]]:
+        """The best k recipes for each inventory, best first."""
+        if score not in SCORES:
+            raise ValueError(f"score must be one of {SCORES}, not {score!r}")
+        if k < 1:
+            raise ValueError(f"k must be at least 1, not {k}")
+        queries = [self.index.inventory_ids(inventory_names(items)) for items in inventories]
+        results: List[List[Match]] = []
+        for block in self._blocks(queries):
+            results.extend(self._top_k_block([queries[i] for i in block], k, score))
+        return results
+
+    def _blocks(self, queries: List[List[int]]) -> Iterable[range]:
+        """Ranges of queries whose product has at most MAX_BLOCK_ENTRIES entries."""
+        start, entries = 0, 0
+        for i, ids in enumerate(queries):
+            size = min(int(self.recipes_using[ids].sum()), len(self.index))
+            if i > start and entries + size > MAX_BLOCK_ENTRIES:
+                yield range(start, i)
+                start, entries = i, 0
+            entries += size
+        if start < len(queries):
+            yield range(start, len(queries))
+
+    def _top_k_block(self, queries: List[List[int]], k: int, score: str) -> List[List[Match]]:
+        indptr = np.concatenate(([0], np.cumsum([len(ids) for ids in queries])))
+        indices = np.fromiter((i for ids in queries for i in ids), dtype=np.int64,
+                              count=indptr[-1])
+        inventory = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr),
+            shape=(len(queries), len(self.index.names)),
+        )
+        available = inventory @ self.counts
+        recipes, row_starts = available.indices, available.indptr
+        if score == "coverage":
+            scores = available.data / np.maximum(self.needed[recipes], 1)
+        else:
+            # Same operands' structure, so the same entries in the same order
+            matched = inventory @ self.weighted
+            scores = matched.data / np.maximum(self.needed_weight[recipes], 1e-12)
+            # Sums taken in a different order differ in the last bits; without
+            # rounding, "all ingredients available" would not always tie at 1
+            scores = np.round(scores, 9)
+
+        # Per row, every entry scoring at least its K-th best score (ties
+        # included), then best first: score, then available, then recipe number
+        kth = np.zeros(len(queries))
+        for row in range(len(queries)):
+            row_scores = scores[row_starts[row]:row_starts[row + 1]]
+            if len(row_scores) > k:
+                kth[row] = np.partition(row_scores, len(row_scores) - k)[len(row_scores) - k]
+        keep = np.flatnonzero(scores >= np.repeat(kth, np.diff(row_starts)))
+        rows = np.searchsorted(row_starts, keep, side="right") - 1
+        recipes, row_scores = recipes[keep], scores[keep]
+        counts = np.rint(available.data[keep]).astype(np.int64)
+        order = np.lexsort((recipes, -counts, -row_scores, rows))
+        starts = np.searchsorted(rows[order], np.arange(len(queries)))
+
+        results: List[List[Match]] = []
+        recipe_ids, needed = self.index.recipe_ids, self.needed
+        for row, start in enumerate(starts):
+            matches = []
+            for i in order[start:start + k]:
+                if rows[i] != row:
+                    break
+                recipe = recipes[i]
+                matches.append(Match(recipe_ids[recipe], float(min(row_scores[i], 1.0)),
+                                     int(counts[i]), int(needed[recipe])))
+            results.append(matches)
+        return results
+
+
+def match_record(record: Dict[str, Any], matches: List[Match]) -> Dict[str, Any]:
+    """Output record: the input's fields plus its matches."""
+    out = {key: value for key, value in record.items() if key != INVENTORY_FIELD}
+    out["matches"] = [
+        {"recipe_id": m.recipe_id, "match_percent": m.match_percent,
+         "available": m.available, "needed": m.needed}
+        for m in matches
+    ]
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("inputs", nargs="*",
+                        help="Inventory files: records with an 'items' list ('-' = stdin).")
+    parser.add_argument("--index", required=True, help="Index built by recipe_index.py.")
+    parser.add_argument("-o", "--output", default="-", help="Matches file ('-' = stdout).")
+    parser.add_argument("--inventory", help="One comma-separated inventory to match instead.")
+    parser.add_argument("-k", type=int, default=DEFAULT_TOP_K, help="Recipes per inventory.")
+    parser.add_argument("--score", choices=SCORES, default="coverage")
+    args = parser.parse_args()
+    if not args.inputs and not args.inventory:
+        parser.error("give inventory files or --inventory")
+    if args.k < 1:
+        parser.error("-k must be at least 1")
+
+    if args.inventory:
+        records = [{INVENTORY_FIELD: [item.strip() for item in args.inventory.split(",")
+                                      if item.strip()]}]
+    else:
+        records = [record for path in args.inputs for record in read_records(path)]
+
+    with RecordWriter(args.output) as writer, progress_to_stderr(args.output):
+        print("=" * 60)
+        print("RASHAN RECIPE MATCHING")
+        print("=" * 60)
+        start = time.perf_counter()
+        index = RecipeIndex.load(args.index)
+        matcher = RecipeMatcher(index)
+        print(f"[*] {args.index}: {len(index)} recipes, {len(index.names)} ingredients "
+              f"({time.perf_counter() - start:.1f}s)")
+
+        start = time.perf_counter()
+        results = matcher.top_k([record.get(INVENTORY_FIELD) or [] for record in records],
+                                args.k, args.score)
+        elapsed = time.perf_counter() - start
+        for record, matches in zip(records, results):
+            writer.write(match_record(record, matches))
+
+        print(f"[✓] Matched {len(records)} inventories in {elapsed:.2f}s "
+              f"({len(records) / max(elapsed, 1e-9):.0f}/sec, {args.score})")
+        print(f"Output file: {args.output}")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
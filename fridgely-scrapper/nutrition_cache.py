@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Two-tier memo cache for nutrition_helper.py USDA lookups.
+
+The same few hundred ingredient names come up across thousands of recipes,
+so every USDA answer is remembered:
+
+  1. an in-process LRU (always on), then
+  2. an optional SQLite file that survives across runs.
+
+"No data found" answers are cached too (negative caching) with their own,
+shorter TTL, so a name USDA doesn't know is not asked about again every
+recipe – yet gets retried once in a while. Lookup failures (network errors,
+rate limiting) are never cached.
+
+Keys are normalised ingredient names (lower-cased words, punctuation and
+numbers dropped), so "Onion," and "onion" share an entry.
+
+The SQLite file carries CACHE_VERSION in its user_version; a file written
+by an older version is emptied when opened.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from ingredient_matcher import tokenize
+
+DEFAULT_TTL_SECONDS = 90 * 24 * 60 * 60
+DEFAULT_NEGATIVE_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 4096
+
+# Bumped when cached answers from earlier versions can be wrong.
+# 2: version 1 fetched some names by INGREDIENT_MAP FDC ids that belong to
+#    other foods (cucumber got carrot's macros, ghee paneer's, ...)
+CACHE_VERSION = 2
+
+# Returned by get() when nothing (fresh) is cached; None means "known miss"
+MISSING = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookups (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    stored_at REAL NOT NULL
+);
+"""
+
+
+def normalize_key(name: str) -> str:
+    """Cache key for an ingredient name: 'Red  Onion,' -> 'red onion'"""
+    return " ".join(tokenize(name))
+
+
+class NutritionCache:
+    """In-process LRU in front of an optional on-disk SQLite store."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        # key -> (value or None, stored_at)
+        self._lru: "OrderedDict[str, Tuple[Optional[Dict], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(os.path.expanduser(path), check_same_thread=False)
+            self._db.executescript(SCHEMA)
+            (version,) = self._db.execute("PRAGMA user_version").fetchone()
+            if version < CACHE_VERSION:
+                self._db.execute("DELETE FROM lookups")
+                self._db.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+                self._db.commit()
+
+    def _is_fresh(self, value: Optional[Dict], stored_at: float) -> bool:
+        ttl = self.ttl_seconds if value is not None else self.negative_ttl_seconds
+        return time.time() - stored_at < ttl
+
+    def _remember(self, key: str, value: Optional[Dict], stored_at: float) -> None:
+        self._lru[key] = (value, stored_at)
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, name: str):
+        """Cached value for name (None = known to have no data), or MISSING."""
+        key = normalize_key(name)
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None and self._is_fresh(*entry):
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                self.negative_hits += entry[0] is None
+                return entry[0]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, stored_at FROM lookups WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0]) if row[0] is not None else None
+                    if self._is_fresh(value, row[1]):
+                        self._remember(key, value, row[1])
+                        self.disk_hits += 1
+                        self.negative_hits += value is None
+                        return value
+
+            self.misses += 1
+            return MISSING
+
+    def put(self, name: str, value: Optional[Dict]) -> None:
+        """Remember a lookup result; value=None records "no data found"."""
+        key = normalize_key(name)
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO lookups (key, value, stored_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, json.dumps(value) if value is not None else None, now),
+                )
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats_line(self) -> str:
+        return (
+            f"Nutrition cache   : {self.memory_hits} memory hits, "
+            f"{self.disk_hits} disk hits ({self.negative_hits} of them 'no data'), "
+            f"{self.misses} lookups"
+        )
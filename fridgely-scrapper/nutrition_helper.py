@@ -3,16 +3,46 @@
 Nutrition Data Helper for Rashan
 Matches ingredients to USDA FoodData Central
 Adds macros (protein, carbs, fat) to recipes
+
+USDA lookups go to the live FoodData Central API by default. Before any
+recipe is estimated, a pre-pass collects every distinct name that needs the
+API and resolves them concurrently (see usda_client.py), so the per-recipe
+work runs from memory. Build an offline index once with usda_index.py and
+pass it with --usda_index (or $RASHAN_USDA_INDEX) to resolve everything
+locally, with no network at all.
 """
 
-import json
-import requests
-from typing import Dict, List, Optional
+import argparse
+import os
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import http_cache
+from ingredient_matcher import IngredientMatcher, plural_forms
+from ingredient_parser import parse_ingredient_line
+import usda_client
+from nutrition_cache import MISSING, NutritionCache, normalize_key
+from recipe_io import RecordWriter, derive_path, progress_to_stderr, read_records, same_file
+from usda_index import UsdaIndex
+
+# USDA FoodData Central API (free; DEMO_KEY unless $FDC_API_KEY is set)
+USDA_API_URL = usda_client.SEARCH_URL
+
+# Offline index built by usda_index.py; when set, the API is never called
+USDA_INDEX_ENV_VAR = "RASHAN_USDA_INDEX"
+_usda_index: Optional[UsdaIndex] = None
 
-# USDA FoodData Central API (free, no key needed for basic use)
-USDA_API_URL = "https://fdc.nal.usda.gov/api/foods/search"
+# Memo of live API answers; on disk too with --nutrition_cache
+NUTRITION_CACHE_ENV_VAR = "RASHAN_NUTRITION_CACHE"
+_nutrition_cache = NutritionCache()
 
-# Common Indian ingredients with USDA FDC IDs (pre-mapped for speed)
+# Answers of the USDA pre-pass by normalised query; once set, lookups never
+# go online (names the pre-pass could not resolve are absent)
+_prefetched: Optional[Dict[str, Optional[Dict]]] = None
+
+# Common Indian ingredients with USDA FDC IDs. Only the names are used (they
+# steer USDA searches); several IDs are placeholders copied from another food,
+# so foods are never fetched by these IDs.
 INGREDIENT_MAP = {
     # Legumes
     'chickpea': 174017,
@@ -81,49 +111,222 @@ MANUAL_NUTRITION = {
     'milk': {'protein': 3, 'carbs': 5, 'fat': 3, 'calories': 61},
 }
 
+# Servings assumed when a recipe doesn't say
+DEFAULT_SERVINGS = 4
+
+# Macros summed per recipe, in the order used by the batch path's table
+MACROS = ('protein', 'carbs', 'fat', 'calories')
+
+# Regional / alternative names -> key in MANUAL_NUTRITION or INGREDIENT_MAP
+# (Hindi, Kannada and common English variants; plurals are added automatically)
+INGREDIENT_SYNONYMS = {
+    # Legumes
+    'garbanzo': 'chickpea',
+    'kabuli chana': 'chickpea',
+    'chole': 'chickpea',
+    'chhole': 'chickpea',
+    'kadale': 'chickpea',
+    'toor dal': 'lentil',
+    'tur dal': 'lentil',
+    'arhar dal': 'lentil',
+    'togari bele': 'lentil',
+    'masoor dal': 'lentil',
+    'daal': 'dal',
+    'moong dal': 'moong',
+    'hesaru bele': 'moong',
+    'rajma': 'kidney bean',
+    # Vegetables
+    'tamatar': 'tomato',
+    'pyaz': 'onion',
+    'pyaaz': 'onion',
+    'kanda': 'onion',
+    'eerulli': 'onion',
+    'ಈರುಳ್ಳಿ': 'onion',
+    'प्याज': 'onion',
+    'palak': 'spinach',
+    'palya soppu': 'spinach',
+    'gobi': 'cauliflower',
+    'phool gobi': 'cauliflower',
+    'patta gobi': 'cabbage',
+    'gajar': 'carrot',
+    'aloo': 'potato',
+    'alu': 'potato',
+    'aalugadde': 'potato',
+    'kheera': 'cucumber',
+    'capsicum': 'bell pepper',
+    'shimla mirch': 'bell pepper',
+    'hari mirch': 'green chilli',
+    'green chili': 'green chilli',
+    # Grains
+    'chawal': 'rice',
+    'akki': 'rice',
+    'ಅಕ್ಕಿ': 'rice',
+    'चावल': 'rice',
+    'basmati': 'rice',
+    'atta': 'flour',
+    'maida': 'flour',
+    'gehun': 'wheat',
+    'chapati': 'roti',
+    # Dairy
+    'doodh': 'milk',
+    'haalu': 'milk',
+    'dahi': 'yogurt',
+    'curd': 'yogurt',
+    'mosaru': 'yogurt',
+    'makhan': 'butter',
+    'benne': 'butter',
+    'tuppa': 'ghee',
+    'cottage cheese': 'paneer',
+    # Spices
+    'haldi': 'turmeric',
+    'arishina': 'turmeric',
+    'jeera': 'cumin',
+    'jeerige': 'cumin',
+    'dhania': 'coriander',
+    'cilantro': 'coriander',
+    'kothambari': 'coriander',
+    'lal mirch': 'chilli powder',
+    'red chilli powder': 'chilli powder',
+    'namak': 'salt',
+    'uppu': 'salt',
+    # Proteins
+    'murgh': 'chicken',
+    'murg': 'chicken',
+    'koli': 'chicken',
+    'anda': 'egg',
+    'motte': 'egg',
+    'machli': 'fish',
+    'meen': 'fish',
+    'gosht': 'mutton',
+    'lamb': 'mutton',
+    # Fats
+    'extra virgin olive oil': 'olive oil',
+}
+
+
+def build_ingredient_matcher(synonyms: Optional[Dict[str, str]] = None) -> IngredientMatcher:
+    """
+    Compile every known ingredient name (plus plurals) into one matcher.
+
+    Matches resolve to a MANUAL_NUTRITION key where possible, otherwise to
+    an INGREDIENT_MAP key.
+    """
+    names: Dict[str, str] = {}
+    for key in INGREDIENT_MAP:
+        names[key] = key
+    for key in MANUAL_NUTRITION:
+        names[key] = key
+    for synonym, key in {**INGREDIENT_SYNONYMS, **(synonyms or {})}.items():
+        names[synonym] = names.get(key, key)
+
+    matcher = IngredientMatcher()
+    for name, key in names.items():
+        matcher.add(name, key)
+        for plural in plural_forms(name):
+            # Never let a generated plural shadow a real name
+            if plural not in names:
+                matcher.add(plural, key)
+    return matcher
+
+
+INGREDIENT_MATCHER = build_ingredient_matcher()
+
+
+def configure_nutrition_cache(path: Optional[str] = None) -> NutritionCache:
+    """
+    Keep USDA lookup results in a SQLite file across runs as well as in memory.
+
+    path=None falls back to $RASHAN_NUTRITION_CACHE; if that is unset too,
+    results are only cached for this process.
+    """
+    global _nutrition_cache
+    _nutrition_cache = NutritionCache(path or os.environ.get(NUTRITION_CACHE_ENV_VAR))
+    return _nutrition_cache
+
+
+def configure_usda_index(path: Optional[str] = None) -> Optional[UsdaIndex]:
+    """
+    Use a local USDA index for lookups instead of the live API.
+
+    path=None falls back to $RASHAN_USDA_INDEX; if that is unset too,
+    lookups stay online.
+    """
+    global _usda_index
+    path = path or os.environ.get(USDA_INDEX_ENV_VAR)
+    _usda_index = UsdaIndex(path) if path else None
+    return _usda_index
+
+
+def fetch_usda(ingredient_name: str) -> Optional[Dict]:
+    """
+    Search USDA FoodData Central for ingredient.
+
+    Returns None if USDA has no match; raises if the lookup itself fails
+    (network error, rate limit), so that failures are never cached.
+    """
+    params = usda_client.search_params(ingredient_name)
+    response = http_cache.http_get(USDA_API_URL, params=params, timeout=5)
+    response.raise_for_status()
+    return usda_client.nutrition_from_search(response.json())
+
 
 def search_usda(ingredient_name: str) -> Optional[Dict]:
-    """Search USDA FoodData Central for ingredient"""
+    """Search USDA FoodData Central for ingredient (None on no match or error)"""
     try:
-        params = {
-            'query': ingredient_name,
-            'pageSize': 1,
-            'api_key': 'DEMO_KEY'  # Free tier (limited but works)
-        }
-        
-        response = requests.get(USDA_API_URL, params=params, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('foods'):
-                food = data['foods'][0]
-                nutrients = {n['nutrientName']: n['value'] 
-                           for n in food.get('foodNutrients', [])}
-                
-                return {
-                    'name': food['description'],
-                    'protein': nutrients.get('Protein', 0),
-                    'carbs': nutrients.get('Carbohydrate, by difference', 0),
-                    'fat': nutrients.get('Total lipid (fat)', 0),
-                    'calories': nutrients.get('Energy', 0) / 4.184  # Convert kJ to kcal
-                }
+        return fetch_usda(ingredient_name)
     except Exception as e:
         print(f"  [!] USDA lookup failed for '{ingredient_name}': {e}")
-    
     return None
 
 
+def cached_search_usda(ingredient_name: str) -> Optional[Dict]:
+    """
+    search_usda() through the nutrition cache, including 'no data' answers
+
+    After prefetch_usda() only its results are used.
+    """
+    if _prefetched is not None:
+        return _prefetched.get(normalize_key(ingredient_name))
+    
+    cached = _nutrition_cache.get(ingredient_name)
+    if cached is not MISSING:
+        return cached
+    
+    print(f"  [?] Looking up '{ingredient_name}' in USDA...")
+    try:
+        usda_data = fetch_usda(ingredient_name)
+    except Exception as e:
+        print(f"  [!] USDA lookup failed for '{ingredient_name}': {e}")
+        return None
+    _nutrition_cache.put(ingredient_name, usda_data)
+    return usda_data
+
+
+def usda_query(key: Optional[str], ingredient_lower: str) -> str:
+    """
+    USDA search query for an ingredient the manual table lacks: a
+    recognised name makes a much better query than the raw text. The
+    offline index and the API are both asked this same query.
+    """
+    return key or ingredient_lower
+
+
 def get_nutrition_for_ingredient(ingredient: str) -> Optional[Dict]:
     """Get nutrition data for ingredient (fast lookup + fallback)"""
     ingredient_lower = ingredient.lower().strip()
     
-    # Check manual map first (fastest)
-    for key, nutrition in MANUAL_NUTRITION.items():
-        if key in ingredient_lower:
-            return nutrition
+    # Known ingredient name anywhere in the text (one pass over its words)
+    key = INGREDIENT_MATCHER.find(ingredient_lower)
+    if key in MANUAL_NUTRITION:
+        return MANUAL_NUTRITION[key]
     
-    # Try USDA API (slower, but comprehensive)
-    print(f"  [?] Looking up '{ingredient}' in USDA...")
-    usda_data = search_usda(ingredient_lower)
+    # Try USDA (comprehensive): local index if we have one, else the
+    # (cached) API
+    query = usda_query(key, ingredient_lower)
+    if _usda_index is not None:
+        usda_data = _usda_index.lookup(query)
+    else:
+        usda_data = cached_search_usda(query)
     if usda_data:
         return usda_data
     
@@ -132,101 +335,294 @@ def get_nutrition_for_ingredient(ingredient: str) -> Optional[Dict]:
     return {'protein': 0, 'carbs': 0, 'fat': 0, 'calories': 0}
 
 
-def estimate_recipe_nutrition(recipe: Dict, servings: int = 4) -> Dict:
+def recipe_ingredient_amounts(recipe: Dict) -> List[Tuple[str, float]]:
+    """(ingredient name, amount in units of 100 g) for each line of a recipe"""
+    amounts = []
+    for ingredient_line in recipe.get('ingredients', '').split('\n'):
+        parsed = parse_ingredient_line(ingredient_line)
+        if parsed is None or not parsed.name:
+            continue  # blank line or a group heading like "For the masala:"
+        amounts.append((parsed.name, parsed.grams / 100))
+    return amounts
+
+
+def recipe_servings(recipe: Dict, default: int = DEFAULT_SERVINGS) -> int:
+    """Servings from the recipe's own yield (WP JSON-LD recipeYield), else default"""
+    servings = recipe.get('servings')
+    if isinstance(servings, (int, float)) and servings > 0:
+        return servings
+    return default
+
+
+def nutrition_per_serving(totals: Sequence[float], servings: int) -> Dict:
+    """Recipe totals (protein, carbs, fat, calories) -> per-serving nutrition"""
+    protein, carbs, fat, calories = totals
+    return {
+        'protein_per_serving': round(protein / servings, 1),
+        'carbs_per_serving': round(carbs / servings, 1),
+        'fat_per_serving': round(fat / servings, 1),
+        'calories_per_serving': round(calories / servings, 1),
+        'note': 'Estimated from ingredients. Actual values may vary.'
+    }
+
+
+def estimate_recipe_nutrition(recipe: Dict, servings: Optional[int] = None) -> Dict:
     """
-    Estimate nutrition for entire recipe
-    Note: This is rough - ideally you'd have ingredient amounts
+    Estimate nutrition for entire recipe, per serving
+
+    servings=None uses the recipe's own servings (see recipe_servings).
     """
-    
-    # Parse ingredients (very basic - assumes format like "1 cup chickpeas")
-    ingredients_text = recipe.get('ingredients', '')
-    ingredient_list = [i.strip() for i in ingredients_text.split('\n') if i.strip()]
-    
-    total_protein = 0
-    total_carbs = 0
-    total_fat = 0
-    total_calories = 0
+    servings = servings or recipe_servings(recipe)
+    totals = [0.0] * len(MACROS)
     
     print(f"\n[*] Calculating nutrition for: {recipe['title'][:50]}...")
     
-    for ingredient_line in ingredient_list[:15]:  # Limit to first 15 ingredients
-        # Extract ingredient name (very basic parsing)
-        words = ingredient_line.split()
-        ingredient_name = ' '.join(words[-2:]) if len(words) > 1 else ingredient_line
-        
+    for ingredient_name, amount in recipe_ingredient_amounts(recipe):
         nutrition = get_nutrition_for_ingredient(ingredient_name)
         if nutrition:
-            # Rough estimate: assume ~100g per ingredient (very hand-wavy)
-            total_protein += nutrition.get('protein', 0)
-            total_carbs += nutrition.get('carbs', 0)
-            total_fat += nutrition.get('fat', 0)
-            total_calories += nutrition.get('calories', 0)
+            for m, macro in enumerate(MACROS):
+                totals[m] += nutrition.get(macro, 0) * amount
     
     # Divide by servings
-    return {
-        'protein_per_serving': round(total_protein / servings, 1),
-        'carbs_per_serving': round(total_carbs / servings, 1),
-        'fat_per_serving': round(total_fat / servings, 1),
-        'calories_per_serving': round(total_calories / servings, 1),
-        'note': 'Estimated from ingredients. Actual values may vary.'
-    }
+    return nutrition_per_serving(totals, servings)
 
 
-def add_nutrition_to_recipes(input_file: str, output_file: str):
-    """Add nutrition data to all recipes in JSON"""
-    
-    print("=" * 60)
-    print("RASHAN NUTRITION DATA HELPER")
-    print("=" * 60)
-    print(f"\nInput file: {input_file}")
-    
-    # Load recipes
+def estimate_nutrition_batch(
+    recipes: Sequence[Dict], servings: Optional[int] = None
+) -> List[Dict]:
+    """
+    Nutrition for many recipes at once, same results as estimate_recipe_nutrition.
+
+    Each distinct ingredient name is resolved once into a row of an
+    (ingredient x macro) table. Recipes become a sparse recipe x ingredient
+    matrix of amounts, and a single matrix product gives every recipe's
+    totals. Needs numpy and scipy.
+    """
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            recipes = json.load(f)
-    except FileNotFoundError:
-        print(f"[!] File not found: {input_file}")
-        return
-    
-    print(f"[✓] Loaded {len(recipes)} recipes")
+        import numpy as np
+        from scipy import sparse
+    except ImportError:
+        raise ImportError("Batch nutrition needs: pip install numpy scipy")
     
-    # Add nutrition to each recipe
-    for i, recipe in enumerate(recipes, 1):
-        print(f"\n[{i}/{len(recipes)}] Processing: {recipe['title'][:50]}...")
-        
-        # Estimate nutrition
-        nutrition = estimate_recipe_nutrition(recipe)
-        recipe['nutrition'] = nutrition
-        recipe['nutrition_calculated'] = True
+    # Map every ingredient line to a table row, resolving each name once.
+    # Entries stay in line order (duplicates are not merged), so each
+    # recipe's sum is accumulated in exactly the scalar path's order and
+    # rounds identically.
+    row_of: Dict[str, int] = {}
+    indptr = [0]
+    ingredient_idx: List[int] = []
+    amounts: List[float] = []
+    for recipe in recipes:
+        for ingredient_name, amount in recipe_ingredient_amounts(recipe):
+            ingredient_idx.append(row_of.setdefault(ingredient_name, len(row_of)))
+            amounts.append(amount)
+        indptr.append(len(amounts))
     
-    # Save augmented recipes
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(recipes, f, indent=2, ensure_ascii=False)
+    table = np.zeros((len(row_of), len(MACROS)))
+    for ingredient_name, row in row_of.items():
+        nutrition = get_nutrition_for_ingredient(ingredient_name)
+        if nutrition:
+            table[row] = [nutrition.get(macro, 0) for macro in MACROS]
     
-    print("\n" + "=" * 60)
-    print(f"[✓] NUTRITION DATA ADDED")
-    print(f"Output file: {output_file}")
-    print("=" * 60)
-    print("\nNext steps:")
-    print("1. Review the nutrition estimates (they're rough)")
-    print("2. For critical recipes, manually verify macros")
-    print("3. Import to your database")
+    quantities = sparse.csr_matrix(
+        (np.array(amounts), np.array(ingredient_idx, dtype=np.int64), np.array(indptr)),
+        shape=(len(recipes), len(row_of)),
+    )
+    totals = quantities @ table
+    return [
+        nutrition_per_serving(row.tolist(), servings or recipe_servings(recipe))
+        for recipe, row in zip(recipes, totals)
+    ]
+
+
+def prefetch_usda(
+    recipes: Iterable[Dict], concurrency: int = usda_client.DEFAULT_CONCURRENCY
+) -> Dict[str, Optional[Dict]]:
+    """
+    Resolve every USDA lookup the recipes will need, up front and concurrently
+
+    Collects the distinct queries that neither the manual table nor the
+    nutrition cache can answer, resolves them with usda_client, and caches
+    the answers. From then on get_nutrition_for_ingredient() never goes
+    online; names whose lookup failed fall back to generic values.
+    """
+    global _prefetched
+    results: Dict[str, Optional[Dict]] = {}
+    wanted: Dict[str, usda_client.Lookup] = {}
+    for recipe in recipes:
+        for ingredient_name, _ in recipe_ingredient_amounts(recipe):
+            ingredient_lower = ingredient_name.lower().strip()
+            key = INGREDIENT_MATCHER.find(ingredient_lower)
+            if key in MANUAL_NUTRITION:
+                continue
+            query = usda_query(key, ingredient_lower)
+            cache_key = normalize_key(query)
+            if cache_key in results or cache_key in wanted:
+                continue
+            cached = _nutrition_cache.get(query)
+            if cached is MISSING:
+                wanted[cache_key] = (query, None)
+            else:
+                results[cache_key] = cached
+
+    print(f"\n[*] USDA pre-pass: {len(results) + len(wanted)} distinct names, "
+          f"{len(results)} cached, {len(wanted)} to look up")
+    if wanted:
+        found = usda_client.resolve_all(wanted, concurrency=concurrency)
+        for cache_key, usda_data in found.items():
+            _nutrition_cache.put(wanted[cache_key][0], usda_data)
+        results.update(found)
+        print(f"  resolved {len(found)}/{len(wanted)}")
+    _prefetched = results
+    return results
+
+
+def add_nutrition_to_recipes(
+    input_file: str,
+    output_file: str,
+    batch_size: int = 0,
+    prefetch: bool = True,
+    concurrency: int = usda_client.DEFAULT_CONCURRENCY,
+):
+    """
+    Add nutrition data to every recipe, streaming them from input to output
+
+    With batch_size > 0, recipes are processed in chunks of that many through
+    estimate_nutrition_batch() (numpy/scipy) instead of one by one.
+
+    With prefetch, USDA lookups are first resolved for the whole file by
+    prefetch_usda() (skipped with an offline index, or when reading stdin,
+    which can only be read once).
+    """
+    if input_file != '-' and not os.path.exists(input_file):
+        print(f"[!] File not found: {input_file}")
+        return
+
+    # Rewriting the input in place: it is only replaced at the end
+    replace = same_file(input_file, output_file)
+    with RecordWriter(output_file, replace) as writer, progress_to_stderr(output_file):
+        print("=" * 60)
+        print("RASHAN NUTRITION DATA HELPER")
+        print("=" * 60)
+        print(f"\nInput file: {input_file}")
+
+        if prefetch and _usda_index is None and input_file != '-':
+            prefetch_usda(read_records(input_file), concurrency)
+
+        records = read_records(input_file)
+        if batch_size > 0:
+            # A chunk of recipes at a time: one matrix product per chunk
+            while True:
+                chunk = list(islice(records, batch_size))
+                if not chunk:
+                    break
+                first = writer.count + 1
+                print(f"\n[{first}-{first + len(chunk) - 1}] Processing batch...")
+                for recipe, nutrition in zip(chunk, estimate_nutrition_batch(chunk)):
+                    recipe['nutrition'] = nutrition
+                    recipe['nutrition_calculated'] = True
+                    writer.write(recipe)
+        else:
+            # Recipes are read, augmented and written one at a time
+            for i, recipe in enumerate(records, 1):
+                print(f"\n[{i}] Processing: {recipe['title'][:50]}...")
+
+                # Estimate nutrition
+                nutrition = estimate_recipe_nutrition(recipe)
+                recipe['nutrition'] = nutrition
+                recipe['nutrition_calculated'] = True
+                writer.write(recipe)
+
+        print("\n" + "=" * 60)
+        print(f"[✓] NUTRITION DATA ADDED")
+        print(f"Recipes: {writer.count}")
+        print(f"Output file: {output_file}")
+        print(_nutrition_cache.stats_line())
+        http_cache.print_stats()
+        print("=" * 60)
+        print("\nNext steps:")
+        print("1. Review the nutrition estimates (they're rough)")
+        print("2. For critical recipes, manually verify macros")
+        print("3. Import to your database")
 
 
 def main():
     """Main entry point"""
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("Usage: python nutrition_helper.py <input_file> [output_file]")
-        print("\nExample:")
-        print("  python nutrition_helper.py reddit_recipes_20240115_120000.json recipes_with_nutrition.json")
-        return
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else input_file.replace('.json', '_with_nutrition.json')
+    parser = argparse.ArgumentParser(
+        description='Add estimated nutrition (macros) to a recipes JSON file.',
+        epilog='Example: python nutrition_helper.py reddit_recipes_20240115_120000.json '
+               'recipes_with_nutrition.json',
+    )
+    parser.add_argument(
+        'input_file',
+        help="Recipes produced by one of the scrapers (.json, .ndjson / .jsonl, "
+             "optionally .gz; '-' reads NDJSON from stdin).",
+    )
+    parser.add_argument(
+        'output_file',
+        nargs='?',
+        help="Output file, same formats ('-' writes NDJSON to stdout; "
+             "default: <input>_with_nutrition.<ext>, or stdout when reading stdin).",
+    )
+    parser.add_argument(
+        '--http_cache',
+        default=None,
+        help='SQLite file for the shared HTTP cache used for USDA lookups '
+             '(default: $RASHAN_HTTP_CACHE, or no caching).',
+    )
+    parser.add_argument(
+        '--usda_index',
+        default=None,
+        help='Offline USDA index built with usda_index.py; no API calls are made '
+             '(default: $RASHAN_USDA_INDEX, or use the live API).',
+    )
+    parser.add_argument(
+        '--nutrition_cache',
+        default=None,
+        help='SQLite file remembering USDA lookup results (including "no data") '
+             'across runs (default: $RASHAN_NUTRITION_CACHE, or memory only).',
+    )
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=0,
+        help='Estimate nutrition this many recipes at a time with one sparse '
+             'matrix product (needs numpy + scipy; default: one by one).',
+    )
+    parser.add_argument(
+        '--usda_concurrency',
+        type=int,
+        default=usda_client.DEFAULT_CONCURRENCY,
+        help='USDA requests in flight during the pre-pass (default: %(default)s). '
+             'The rate follows the key tier: set $FDC_API_KEY for 1,000/hour '
+             'instead of DEMO_KEY\'s 30.',
+    )
+    parser.add_argument(
+        '--no_prefetch',
+        action='store_true',
+        help='Look USDA names up one at a time as recipes need them, instead '
+             'of in a concurrent pre-pass over the whole input.',
+    )
+    args = parser.parse_args()
+    http_cache.configure(args.http_cache)
+    configure_usda_index(args.usda_index)
+    configure_nutrition_cache(args.nutrition_cache)
+
+    input_file = args.input_file
+    if args.output_file:
+        output_file = args.output_file
+    elif input_file == '-':
+        output_file = '-'
+    else:
+        output_file = derive_path(input_file, '_with_nutrition')
     
-    add_nutrition_to_recipes(input_file, output_file)
+    add_nutrition_to_recipes(
+        input_file,
+        output_file,
+        batch_size=args.batch_size,
+        prefetch=not args.no_prefetch,
+        concurrency=args.usda_concurrency,
+    )
 
 
 if __name__ == '__main__':
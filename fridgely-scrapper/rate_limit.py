@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Small rate-limiting helpers shared by the Rashan scrapers.
+
+  - TokenBucket: asyncio token bucket (N requests/sec, small burst)
+  - HostRateLimiter: one TokenBucket per URL host, so a politeness delay
+    holds per site even when many requests are in flight at once
+  - HeaderRateBudget: thread-safe budget that follows the server's own
+    rate-limit headers (remaining requests / seconds to window reset)
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Async token bucket refilled at `rate` tokens/sec, holding up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until one token is available, then take it."""
+        if self.rate <= 0:
+            return
+        # The lock is FIFO, so waiters are served in the order they asked
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """Keeps a separate TokenBucket per host (rate <= 0 disables limiting)."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def acquire(self, url: str) -> None:
+        host = urlparse(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.capacity)
+            self._buckets[host] = bucket
+        await bucket.acquire()
+
+
+class HeaderRateBudget:
+    """
+    Request budget shared by threads, driven by the server's rate-limit headers.
+
+    Call acquire() before each request, then update() with the reported
+    remaining count and seconds to reset, or release() if the response had
+    no such headers. Requests go out back to back while the window has
+    budget left (minus the ones in flight and `reserve`), then wait for the
+    reset. Until the first report, and after each reset, a single request
+    goes out alone to learn the new budget.
+    """
+
+    def __init__(self, reserve: int = 1):
+        self.reserve = reserve
+        self.requests = 0
+        self.waited_seconds = 0.0
+        self._remaining: Optional[float] = None
+        self._reset_at = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent, then count it as in flight."""
+        with self._cond:
+            start = time.monotonic()
+            while True:
+                now = time.monotonic()
+                if self._remaining is not None and now >= self._reset_at:
+                    self._remaining = None  # new window, budget unknown
+                if self._remaining is None:
+                    if self._in_flight == 0:
+                        break
+                    timeout = None
+                elif self._remaining - self._in_flight > self.reserve:
+                    break
+                else:
+                    timeout = self._reset_at - now
+                self._cond.wait(timeout)
+            self.waited_seconds += time.monotonic() - start
+            self._in_flight += 1
+            self.requests += 1
+
+    def update(self, remaining: float, reset_seconds: float) -> None:
+        """A request finished; the server reports the window's state."""
+        with self._cond:
+            self._in_flight -= 1
+            reset_at = time.monotonic() + reset_seconds
+            if self._remaining is None or reset_at > self._reset_at + 1:
+                self._remaining = remaining
+                self._reset_at = reset_at
+            else:
+                # Responses can arrive out of order; trust the lowest count
+                self._remaining = min(self._remaining, remaining)
+            self._cond.notify_all()
+
+    def release(self) -> None:
+        """A request finished without rate-limit headers (or failed)."""
+        with self._cond:
+            self._in_flight -= 1
+            if self._remaining is not None:
+                self._remaining -= 1
+            self._cond.notify_all()
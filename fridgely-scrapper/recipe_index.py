@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Ingredient -> recipe inverted index for fridge matching in the app.
+
+Runs after scraping (and nutrition / dedup): every recipe's ingredient
+lines are parsed (ingredient_parser.py) and reduced to canonical
+ingredient names – the names nutrition_helper.py already recognises, with
+their regional synonyms and plurals, or else the parsed name without
+preparation words ("finely chopped fresh ginger" -> "ginger") and with a
+singular last word. Each name gets an integer ID, and the index stores:
+
+  - per ingredient, a posting list of the recipes that use it: ascending
+    recipe numbers, delta-encoded as LEB128 varints
+  - per recipe, a bitset of its ingredient IDs and its ingredient count
+
+Ranking a fridge inventory then only decodes the posting lists of the
+inventory's own ingredients, so it takes milliseconds however large the
+corpus; match percent = inventory ingredients used / ingredients needed.
+Water, salt and the like are treated as always available.
+
+IDs are assigned by how many recipes use the ingredient (most common
+first); names used by fewer than --min_recipes recipes, or beyond the
+--max_ingredients most common, are not indexed but still count towards
+a recipe's total.
+
+Binary format (little-endian), FORMAT_VERSION 1:
+
+  header    magic "FRIX", u16 version, u16 reserved, u32 recipes,
+            u32 ingredients, u32 bitset words per recipe
+  then length-prefixed (u32 byte count) sections:
+  names     ingredient names, UTF-8, "\\n"-separated, in ID order
+  recipes   20-byte SHA-1 document ID per recipe (firebase_import_recipes)
+  totals    u16 ingredient count per recipe
+  offsets   u32 start of each ingredient's postings (ingredients + 1 values)
+  postings  varint-encoded recipe number deltas
+  bitsets   u64 words, recipes x words per recipe
+
+Needs numpy.
+
+Example:
+  python recipe_index.py recipes.ndjson -o recipe_index.bin
+  python recipe_index.py --index recipe_index.bin --query "tomato, onion, paneer, rice"
+"""
+
+import argparse
+import struct
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ingredient_matcher import tokenize
+from ingredient_parser import lookup_unit, parse_ingredient_line
+from nutrition_helper import build_ingredient_matcher
+from recipe_io import read_records, recipe_doc_id
+
+MAGIC = b"FRIX"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHIII")
+_SECTION = struct.Struct("<I")
+
+DEFAULT_MIN_RECIPES = 2
+DEFAULT_MAX_INGREDIENTS = 1024
+DEFAULT_TOP_K = 10
+
+# Ingredients every kitchen is assumed to have; never indexed or counted
+PANTRY_STAPLES = frozenset({"water", "salt", "ice"})
+
+# Nutrition table keys that name the same ingredient
+INGREDIENT_ALIASES = {
+    "chana": "chickpea",
+    "dal": "lentil",
+    "masoor": "lentil",
+    "mung": "moong",
+}
+
+# Words describing how an ingredient is cut, cooked or sized, dropped from
+# names the nutrition tables don't know
+PREPARATION_WORDS = frozenset("""
+    fresh freshly chopped finely roughly thinly coarsely minced sliced diced
+    grated crushed ground peeled boiled cooked raw dried whole large medium
+    small big ripe frozen organic halved cubed shredded softened melted
+    beaten mashed toasted roasted optional florets
+""".split())
+
+# Amount words the parser can leave at the start of a name ("a few curry
+# leaves", "half a lemon"); dropped, along with any unit right after them
+AMOUNT_WORDS = frozenset("a an the one half few little some couple of".split())
+
+CANONICAL_MATCHER = build_ingredient_matcher(INGREDIENT_ALIASES)
+
+
+def singular(word: str) -> str:
+    """Undo the simple English plurals plural_forms() generates."""
+    if len(word) < 4 or not word.isascii():
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=1 << 16)
+def canonical_name(name: str) -> Optional[str]:
+    """Canonical ingredient name of an ingredient / inventory item name."""
+    key = CANONICAL_MATCHER.find(name.lower())
+    if key is not None:
+        return key
+    words = tokenize(name.partition(" or ")[0])
+    start = 0
+    while start < len(words) and (
+        words[start] in AMOUNT_WORDS or (start and lookup_unit(words[start]))
+    ):
+        start += 1
+    words = [w for w in words[start:] if w not in PREPARATION_WORDS]
+    if not words:
+        return None
+    words[-1] = singular(words[-1])
+    return " ".join(words)
+
+
+@lru_cache(maxsize=1 << 16)
+def canonical_line(line: str) -> Optional[str]:
+    """Canonical ingredient name of one ingredient line (None for headings)."""
+    parsed = parse_ingredient_line(line)
+    if parsed is None or not parsed.name:
+        return None
+    return canonical_name(parsed.name)
+
+
+def recipe_ingredients(recipe: Dict) -> List[str]:
+    """Distinct canonical ingredients of a recipe, pantry staples left out."""
+    lines = recipe.get("ingredients") or ""
+    if isinstance(lines, str):
+        lines = lines.split("\n")
+    names = []
+    for line in lines:
+        name = canonical_line(line)
+        if name and name not in PANTRY_STAPLES and name not in names:
+            names.append(name)
+    return names
+
+
+# --- Varints ---------------------------------------------------------------
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """LEB128 encoding of non-negative integers (< 2**35), 7 bits a byte."""
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.ones(len(values), dtype=np.int64)
+    for bits in (7, 14, 21, 28):
+        lengths += values >= np.uint64(1 << bits)
+    # Byte j of a value holds bits 7j..7j+6, with the high bit set on every
+    # byte but the last
+    owner = np.repeat(np.arange(len(values)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    position = np.arange(len(owner)) - starts[owner]
+    out = (values[owner] >> (np.uint64(7) * position.astype(np.uint64))) & np.uint64(0x7F)
+    out |= np.where(position < lengths[owner] - 1, 0x80, 0).astype(np.uint64)
+    return out.astype(np.uint8).tobytes()
+
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    """Inverse of encode_varints() for a uint8 array of whole varints."""
+    data = np.asarray(data, dtype=np.uint8)
+    if not len(data):
+        return np.zeros(0, dtype=np.int64)
+    last = (data & 0x80) == 0
+    owner = np.concatenate(([0], np.cumsum(last)[:-1]))
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    position = np.arange(len(data)) - starts[owner]
+    parts = (data & 0x7F).astype(np.int64) << (7 * position)
+    return np.add.reduceat(parts, starts)
+
+
+# --- Index -----------------------------------------------------------------
+
+class RecipeIndex:
+    """Posting lists, ingredient bitsets and totals for a recipe corpus."""
+
+    def __init__(self, names: Sequence[str], recipe_ids: Sequence[str],
+                 totals: np.ndarray, offsets: np.ndarray, postings: np.ndarray,
+                 bitsets: np.ndarray):
+        self.names = list(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.recipe_ids = list(recipe_ids)
+        self.totals = totals
+        self.offsets = offsets
+        self.postings = postings
+        self.bitsets = bitsets
+        self._decoded: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.recipe_ids)
+
+    @classmethod
+    def build(cls, recipes: Iterable[Dict], min_recipes: int = DEFAULT_MIN_RECIPES,
+              max_ingredients: int = DEFAULT_MAX_INGREDIENTS) -> "RecipeIndex":
+        """Index recipes (any iterable of records, read once)."""
+        seen_names: Dict[str, int] = {}
+        recipe_ids: List[str] = []
+        members: List[int] = []
+        lengths: List[int] = []
+        seen_ids = set()
+        for recipe in recipes:
+            doc_id = recipe_doc_id(recipe)
+            if doc_id in seen_ids:
+                continue  # the import keeps only the first record per ID too
+            seen_ids.add(doc_id)
+            recipe_ids.append(doc_id)
+            names = recipe_ingredients(recipe)
+            members.extend(seen_names.setdefault(name, len(seen_names)) for name in names)
+            lengths.append(len(names))
+
+        members = np.asarray(members, dtype=np.int64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        owner = np.repeat(np.arange(len(lengths)), lengths)
+        counts = np.bincount(members, minlength=len(seen_names))
+
+        # Most used first; ties by name so IDs don't depend on input order
+        by_name = sorted(seen_names, key=seen_names.get)
+        order = sorted(range(len(by_name)), key=lambda i: (-counts[i], by_name[i]))
+        order = [i for i in order if counts[i] >= min_recipes][:max_ingredients]
+        remap = np.full(len(by_name), -1, dtype=np.int64)
+        remap[order] = np.arange(len(order))
+
+        kept = remap[members] >= 0
+        ingredient = remap[members][kept]
+        recipe = owner[kept]
+        # Posting lists: recipes grouped by ingredient, ascending
+        by_ingredient = np.lexsort((recipe, ingredient))
+        ingredient, recipe = ingredient[by_ingredient], recipe[by_ingredient]
+        starts = np.searchsorted(ingredient, np.arange(len(order) + 1))
+        deltas = np.diff(recipe, prepend=0)
+        first = starts[:-1][starts[:-1] < starts[1:]]
+        deltas[first] = recipe[first]  # each list starts from recipe 0
+
+        # Encode list by list so offsets are byte positions
+        chunks = []
+        offsets = np.zeros(len(order) + 1, dtype=np.uint32)
+        for i in range(len(order)):
+            chunks.append(encode_varints(deltas[starts[i]:starts[i + 1]]))
+            offsets[i + 1] = offsets[i] + len(chunks[-1])
+        postings = np.frombuffer(b"".join(chunks), dtype=np.uint8)
+
+        words = (len(order) + 63) // 64
+        bitsets = np.zeros((len(recipe_ids), words), dtype=np.uint64)
+        np.bitwise_or.at(bitsets, (recipe, ingredient // 64),
+                         np.left_shift(np.uint64(1), (ingredient % 64).astype(np.uint64)))
+        totals = np.minimum(lengths, 0xFFFF).astype(np.uint16)
+        return cls([by_name[i] for i in order], recipe_ids, totals, offsets,
+                   postings, bitsets)
+
+    def recipes_with(self, ingredient_id: int) -> np.ndarray:
+        """Ascending recipe numbers using an ingredient (decoded once, then cached)."""
+        decoded = self._decoded.get(ingredient_id)
+        if decoded is None:
+            start, end = self.offsets[ingredient_id], self.offsets[ingredient_id + 1]
+            decoded = np.cumsum(decode_varints(self.postings[start:end]))
+            self._decoded[ingredient_id] = decoded
+        return decoded
+
+    def ingredients_of(self, recipe: int) -> List[str]:
+        """Indexed ingredient names of a recipe, from its bitset."""
+        bits = np.unpackbits(self.bitsets[recipe].view(np.uint8), bitorder="little")
+        return [self.names[i] for i in np.flatnonzero(bits[:len(self.names)])]
+
+    def inventory_ids(self, items: Iterable[str]) -> List[int]:
+        """Ingredient IDs of inventory item names (unknown names dropped)."""
+        ids = set()
+        for item in items:
+            name = canonical_name(item)
+            if name in self.ids:
+                ids.add(self.ids[name])
+        return sorted(ids)
+
+    def rank(self, items: Iterable[str], k: int = DEFAULT_TOP_K) -> List[Tuple[str, int, int, int]]:
+        """
+        Best recipes for an inventory: (recipe ID, match percent, ingredients
+        available, ingredients needed), by match percent then most available.
+        """
+        ids = self.inventory_ids(items)
+        if not ids:
+            return []
+        candidates, available = np.unique(
+            np.concatenate([self.recipes_with(i) for i in ids]), return_counts=True
+        )
+        needed = self.totals[candidates].astype(np.int64)
+        share = available / np.maximum(needed, 1)
+        # Sort key: share, then available count, then recipe number
+        top = np.lexsort((candidates, -available, -share))[:k]
+        return [(self.recipe_ids[candidates[i]], int(round(100 * share[i])),
+                 int(available[i]), int(needed[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        """Write the binary index (see the module docstring for the layout)."""
+        words = self.bitsets.shape[1]
+        sections = [
+            "\n".join(self.names).encode("utf-8"),
+            b"".join(bytes.fromhex(doc_id) for doc_id in self.recipe_ids),
+            self.totals.astype("<u2").tobytes(),
+            self.offsets.astype("<u4").tobytes(),
+            self.postings.tobytes(),
+            np.ascontiguousarray(self.bitsets, dtype="<u8").tobytes(),
+        ]
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(self.recipe_ids),
+                                 len(self.names), words))
+            for section in sections:
+                f.write(_SECTION.pack(len(section)))
+                f.write(section)
+
+    @classmethod
+    def load(cls, path: str) -> "RecipeIndex":
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, _, num_recipes, num_names, words = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a recipe index")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: index format {version}, expected {FORMAT_VERSION}")
+        sections = []
+        pos = _HEADER.size
+        for _ in range(6):
+            (size,) = _SECTION.unpack_from(data, pos)
+            pos += _SECTION.size
+            sections.append(data[pos:pos + size])
+            pos += size
+        names_blob, ids_blob, totals, offsets, postings, bitsets = sections
+        names = names_blob.decode("utf-8").split("\n") if num_names else []
+        recipe_ids = [ids_blob[i:i + 20].hex() for i in range(0, 20 * num_recipes, 20)]
+        return cls(
+            names, recipe_ids,
+            np.frombuffer(totals, dtype="<u2"),
+            np.frombuffer(offsets, dtype="<u4"),
+            np.frombuffer(postings, dtype=np.uint8),
+            np.frombuffer(bitsets, dtype="<u8").reshape(num_recipes, words),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("inputs", nargs="*", help="Recipe files (JSON array or NDJSON, '-' = stdin).")
+    parser.add_argument("-o", "--output", default="recipe_index.bin", help="Index file to write.")
+    parser.add_argument("--min_recipes", type=int, default=DEFAULT_MIN_RECIPES,
+                        help="Only index ingredients used by at least this many recipes.")
+    parser.add_argument("--max_ingredients", type=int, default=DEFAULT_MAX_INGREDIENTS,
+                        help="Index at most this many (most common) ingredients.")
+    parser.add_argument("--index", help="Load this index instead of building one.")
+    parser.add_argument("--query", help="Comma-separated inventory to rank recipes for.")
+    parser.add_argument("-k", type=int, default=DEFAULT_TOP_K, help="Recipes to show for --query.")
+    args = parser.parse_args()
+    if not args.index and not args.inputs:
+        parser.error("give recipe files to index, or --index")
+
+    print("=" * 60)
+    print("RASHAN RECIPE INDEX")
+    print("=" * 60)
+    start = time.perf_counter()
+    if args.index:
+        index = RecipeIndex.load(args.index)
+        print(f"[*] Loaded {args.index}: {len(index)} recipes, {len(index.names)} ingredients")
+    else:
+        records = (record for path in args.inputs for record in read_records(path))
+        index = RecipeIndex.build(records, args.min_recipes, args.max_ingredients)
+        index.save(args.output)
+        print(f"[✓] Indexed {len(index)} recipes, {len(index.names)} ingredients "
+              f"in {time.perf_counter() - start:.1f}s")
+        print(f"    Postings: {len(index.postings):,} bytes, "
+              f"bitsets: {index.bitsets.nbytes:,} bytes")
+        print(f"    Output file: {args.output}")
+
+    if args.query:
+        items = [item.strip() for item in args.query.split(",") if item.strip()]
+        start = time.perf_counter()
+        ranked = index.rank(items, args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        known = [index.names[i] for i in index.inventory_ids(items)]
+        print(f"\n[*] Inventory: {', '.join(known) or '(nothing indexed)'}")
+        for doc_id, percent, available, needed in ranked:
+            print(f"  {percent:>3}%  {available}/{needed}  {doc_id}")
+        print(f"[✓] Ranked in {elapsed:.2f} ms")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Streaming recipe record I/O shared by every pipeline stage.
+
+Two on-disk formats, picked by file extension:
+
+  - NDJSON (.ndjson / .jsonl): one JSON object per line – the streaming
+    format. A crash loses at most the record being written, and stages can
+    be chained through pipes with constant memory.
+  - JSON array (.json): the original format, still read and written so
+    existing files and tools keep working.
+
+Either may be gzipped (.ndjson.gz, .json.gz). "-" means stdin/stdout:
+
+  python wp_recipe_scraper.py urls.txt -o - \
+    | python nutrition_helper.py - recipes.ndjson.gz
+
+read_records() yields records one at a time – JSON arrays included, which
+iter_json_array() parses incrementally, so memory is bounded by the largest
+record rather than the file; RecordWriter writes and flushes each record as
+soon as it is produced. A stage whose output is also one of its inputs
+(same_file()) writes through RecordWriter(path, replace=True) instead, so
+the input is only replaced once the run has finished.
+"""
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+# Fields whose value identifies a recipe, in order of preference
+ID_FIELDS = ("source_url", "reddit_url")
+
+# Characters read from a JSON-array file at a time
+JSON_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+def _strip_gz(path: str) -> str:
+    return path[:-3] if path.endswith(".gz") else path
+
+
+def is_ndjson_path(path: str) -> bool:
+    """True for .ndjson / .jsonl files (gzipped or not) and for stdin/stdout."""
+    return path == "-" or _strip_gz(path).endswith(NDJSON_EXTENSIONS)
+
+
+def derive_path(path: str, suffix: str) -> str:
+    """Insert suffix before the extension: a.ndjson.gz + '.delta' -> a.delta.ndjson.gz"""
+    gz = ".gz" if path.endswith(".gz") else ""
+    root, ext = os.path.splitext(_strip_gz(path))
+    return f"{root}{suffix}{ext or '.json'}{gz}"
+
+
+def open_text(path: str, mode: str = "r") -> TextIO:
+    """Open a (possibly gzipped) UTF-8 text file; "-" is stdin/stdout."""
+    if path == "-":
+        stream = sys.stdin if "r" in mode else sys.stdout
+        # Don't let callers close the process' own streams
+        return open(stream.fileno(), mode, encoding="utf-8", closefd=False)
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield recipe records from an NDJSON or JSON-array file, in order."""
+    with open_text(path, "r") as f:
+        if is_ndjson_path(path):
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line_no}: invalid JSON record ({e})")
+            return
+
+        yield from iter_json_array(f)
+
+
+def iter_json_array(f: TextIO, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of the JSON array in text file f one at a time.
+
+    The file is read in chunks and each element decoded with the C
+    JSONDecoder.raw_decode() as soon as it is complete; only the current
+    element and one chunk are held in memory.
+    """
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill(need: int) -> bool:
+        """Read at least `need` more characters unless the file ends first."""
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunks = []
+        read = 0
+        while read < need:
+            chunk = f.read(max(chunk_size, need - read))
+            if not chunk:
+                eof = True
+                break
+            chunks.append(chunk)
+            read += len(chunk)
+        buf = buf[pos:] + "".join(chunks)
+        pos = 0
+        return read > 0
+
+    def skip_whitespace() -> str:
+        """Next non-whitespace character ("" at end of file)."""
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE_RE.match(buf, pos).end()
+            if pos < len(buf) or not fill(chunk_size):
+                return buf[pos:pos + 1]
+
+    if skip_whitespace() != "[":
+        raise ValueError("Input JSON must be a list of recipe objects.")
+    pos += 1
+    if skip_whitespace() == "]":
+        pos += 1
+    else:
+        while True:
+            if pos == len(buf):
+                raise ValueError("Unexpected end of JSON array")
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                end = None
+            # An element that fails to decode, runs to the end of the buffer or
+            # is a number stopped by a dangling "." / exponent may be cut off:
+            # read as much again (so a big element is decoded O(log size)
+            # times, not once per chunk) and retry
+            if end is None or end == len(buf) or buf[end] in ".eE":
+                if fill(len(buf) - pos):
+                    continue
+                if end is None:
+                    _decoder.raw_decode(buf, pos)  # raise the real error
+            pos = end
+            yield value
+
+            separator = skip_whitespace()
+            pos += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                raise ValueError(f"Expected ',' or ']' after array element, got {separator!r}")
+            skip_whitespace()
+
+    if skip_whitespace():
+        raise ValueError("Extra data after JSON array")
+
+
+def same_file(path: str, other: str) -> bool:
+    """True when both paths name the same file ("-" never does)."""
+    if path == "-" or other == "-":
+        return False
+    try:
+        return os.path.samefile(path, other)
+    except OSError:
+        return os.path.abspath(path) == os.path.abspath(other)
+
+
+def recipe_doc_id(recipe: Dict[str, Any]) -> str:
+    """Stable document ID: SHA-1 of the recipe's URL (title + source if it has none)."""
+    for field in ID_FIELDS:
+        url = (recipe.get(field) or "").strip()
+        if url:
+            key = url
+            break
+    else:
+        key = f"{recipe.get('source', '')}\n{recipe.get('title', '')}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class RecordWriter:
+    """
+    Write records one by one, flushing after each.
+
+    NDJSON paths get one compact object per line; .json paths get the same
+    indented JSON array json.dump(records, indent=2) used to produce.
+
+    With replace=True the records go to a temporary file next to path,
+    which replaces path only when the writer exits without an error – for
+    rewriting a file that is still being read.
+    """
+
+    def __init__(self, path: str, replace: bool = False):
+        self.path = path
+        self.count = 0
+        self._ndjson = is_ndjson_path(path)
+        self._file: Optional[TextIO] = None
+        self._tmp_path: Optional[str] = None
+        if replace and path != "-":
+            # Same extension, so the temporary file gets the same format
+            head, name = os.path.split(path)
+            self._tmp_path = os.path.join(head, f".tmp{os.getpid()}.{name}")
+
+    def __enter__(self) -> "RecordWriter":
+        self._file = open_text(self._tmp_path or self.path, "w")
+        if not self._ndjson:
+            self._file.write("[")
+        return self
+
+    def write(self, record: Dict[str, Any]) -> None:
+        f = self._file
+        if self._ndjson:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            body = json.dumps(record, indent=2, ensure_ascii=False)
+            f.write(("," if self.count else "") + "\n  " + body.replace("\n", "\n  "))
+        f.flush()
+        self.count += 1
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if not self._ndjson:
+            self._file.write("\n]" if self.count else "]")
+        self._file.flush()
+        self._file.close()
+        if self._tmp_path:
+            if exc_type is None:
+                os.replace(self._tmp_path, self.path)
+            else:
+                os.remove(self._tmp_path)
+
+
+def progress_to_stderr(output_path: str):
+    """
+    When records go to stdout ("-"), send progress prints to stderr instead.
+
+    Open the RecordWriter *before* entering this context so it keeps the
+    real stdout.
+    """
+    if output_path == "-":
+        return contextlib.redirect_stdout(sys.stderr)
+    return contextlib.nullcontext()
@@ -3,13 +3,43 @@
 Reddit Recipe Scraper for Rashan
 Scrapes high-upvote recipes from health/food subreddits
 Saves as JSON with Reddit source credits
+
+Recipes are written out subreddit by subreddit; use an .ndjson / .jsonl
+output (optionally .gz), or "-o -" for NDJSON on stdout, to stream them
+into the next stage.
+
+Incremental mode (--state_file reddit_state.json): the file keeps a
+high-water mark per subreddit (newest post's created_utc and fullname).
+Later runs read only the new() listing down to that mark, and re-fetch
+score and comments just for posts from the last few days (--refresh_days),
+so a daily run costs a handful of requests per subreddit instead of 200+.
+The output then holds only new and refreshed recipes; upsert them by
+reddit_id.
+
+Concurrent mode (--workers N): subreddits are scraped N at a time and
+each post's comment tree is fetched on a pool of N threads. Every thread
+has its own praw.Reddit (PRAW is not thread safe), but all of them draw on
+one shared budget that follows Reddit's X-Ratelimit-Remaining / -Reset
+headers, so together they never exceed the OAuth rate limit. The output is
+the same as a serial run. --oauth_url / --reddit_url point the scraper at
+another server, e.g. the fake Reddit API in bench_reddit_scraper.py.
 """
 
-import praw
+import argparse
 import json
-import re
+import os
+import praw
+import prawcore
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from rate_limit import HeaderRateBudget
+from recipe_io import RecordWriter, progress_to_stderr
+from text_normalize import clean_recipe_text, keyword_pattern, split_sections
+
 # Reddit API credentials
 # Get these from: https://www.reddit.com/prefs/apps
 REDDIT_CONFIG = {
@@ -34,6 +64,11 @@ SUBREDDITS = [
 # Now 0 so we rely mostly on keyword + length filters
 MIN_UPVOTES = 0
 
+# Incremental mode: posts younger than this get their score and comments
+# refreshed on every run
+DEFAULT_REFRESH_DAYS = 3
+STATE_VERSION = 1
+
 # Keywords to identify recipe posts
 # Broadened a bit so we don't miss good recipes
 RECIPE_KEYWORDS = [
@@ -51,95 +86,165 @@ RECIPE_KEYWORDS = [
 ]
 
 
+RECIPE_KEYWORDS_RE = keyword_pattern(RECIPE_KEYWORDS)
+
+
 def is_recipe_post(title):
     """Check if post title contains recipe-related keywords"""
-    title_lower = title.lower()
-    return any(keyword in title_lower for keyword in RECIPE_KEYWORDS)
+    return RECIPE_KEYWORDS_RE.search(title.lower()) is not None
 
 
-def extract_ingredients(text):
-    """Try to extract ingredients section from recipe text"""
-    # Look for "ingredients:" section
-    ingredients_match = re.search(
-        r'ingredients?:?\s*([\s\S]*?)(?:instructions?:|preparation|directions|steps:|$)',
-        text,
-        re.IGNORECASE
-    )
-    if ingredients_match:
-        return ingredients_match.group(1).strip()
+class BudgetedRequestor(prawcore.Requestor):
+    """prawcore Requestor that takes every request from a shared HeaderRateBudget"""
+
+    def __init__(self, *args, budget: HeaderRateBudget, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budget = budget
+
+    def request(self, *args, **kwargs):
+        self.budget.acquire()
+        try:
+            response = super().request(*args, **kwargs)
+        except Exception:
+            self.budget.release()
+            raise
+        remaining = response.headers.get('x-ratelimit-remaining')
+        reset = response.headers.get('x-ratelimit-reset')
+        if remaining is None or reset is None:
+            self.budget.release()  # e.g. the access token request
+        else:
+            self.budget.update(float(remaining), float(reset))
+        return response
+
+
+class RedditClients:
+    """One praw.Reddit per thread, all sharing one rate budget"""
+
+    def __init__(self, **reddit_kwargs):
+        self.budget = HeaderRateBudget()
+        self.reddit_kwargs = reddit_kwargs
+        self._local = threading.local()
+
+    def get(self):
+        reddit = getattr(self._local, 'reddit', None)
+        if reddit is None:
+            reddit = praw.Reddit(
+                client_id=REDDIT_CONFIG['client_id'],
+                client_secret=REDDIT_CONFIG['client_secret'],
+                user_agent=REDDIT_CONFIG['user_agent'],
+                requestor_class=BudgetedRequestor,
+                requestor_kwargs={'budget': self.budget},
+                **self.reddit_kwargs,
+            )
+            self._local.reddit = reddit
+        return reddit
+
+
+def top_comments(post):
+    """Top comments of a post (user tips, variations)"""
+    comments = []
+    try:
+        post.comments.replace_more(limit=0)  # Flatten comment tree
+        for comment in list(post.comments)[:5]:
+            if comment.score > 50 and len(comment.body) > 20:
+                comments.append({
+                    'body': comment.body[:500],
+                    'upvotes': comment.score
+                })
+    except Exception as e:
+        print(f"  [!] Error extracting comments: {e}")
+    return comments
+
+
+def fetch_top_comments(clients, post_id):
+    """top_comments() of a post, loaded through this thread's own client"""
+    return top_comments(clients.get().submission(id=post_id))
+
+
+def post_to_recipe(post, subreddit_name):
+    """Recipe object for a post, or None if the post doesn't pass the filters"""
+    # Skip stickied posts, ads
+    if post.stickied:
+        return None
+    
+    # Filter only by minimum upvotes (which may be 0)
+    if post.score < MIN_UPVOTES:
+        return None
+    
+    # Extract recipe text
+    # For non-text/image posts, selftext may be empty – we still keep them
+    recipe_text = clean_recipe_text(post.selftext or "")
+    if len(recipe_text) < 20 and post.is_self:
+        # For self-posts, require a bit of body text
+        return None
     
-    # Fallback: return first 500 chars (likely contains ingredients)
-    return text[:500] if len(text) > 500 else text
+    sections = split_sections(recipe_text)
 
+    # Build recipe object
+    return {
+        'title': post.title,
+        'recipe_text': recipe_text,
+        'ingredients': sections['ingredients'],
+        'instructions': sections['instructions'],
+        'upvotes': post.score,
+        'subreddit': subreddit_name,
+        'reddit_url': f"https://reddit.com{post.permalink}",
+        'reddit_id': post.name,  # fullname, e.g. t3_abc123
+        'created_utc': post.created_utc,
+        'created_at': datetime.fromtimestamp(post.created_utc).isoformat(),
+        'top_comments': [],      # filled in by collect_recipes
+        'source': f"r/{subreddit_name}",
+        'credit': f"Original post by u/{post.author}" if post.author else "r/" + subreddit_name,
+        # App-level user feedback fields (start empty, filled by your app)
+        'user_likes': 0,
+        'user_dislikes': 0,
+        'user_rating': 0.0,      # average rating (e.g. 0–5 stars)
+        'total_ratings': 0,      # how many ratings contributed to user_rating
+        'user_comments': [],     # list of comment objects your app can append
+    }
 
-def clean_recipe_text(text):
-    """Remove excessive formatting, trim to reasonable length"""
-    # Remove extra whitespace
-    text = re.sub(r'\n\s*\n', '\n', text)
-    # Limit to 3000 characters (most recipes are shorter)
-    return text[:3000]
+
+def collect_recipes(posts, subreddit_name, clients=None, comment_pool=None):
+    """
+    Recipes, with their top comments, for the posts that pass the filters
+
+    With a comment_pool, comment trees are fetched on its threads (each
+    through its own client from `clients`) while the listing is paged.
+    """
+    recipes = []
+    pending = []  # (recipe, future of its top comments), in listing order
+    for post in posts:
+        recipe = post_to_recipe(post, subreddit_name)
+        if recipe is None:
+            continue
+        if comment_pool is None:
+            recipe['top_comments'] = top_comments(post)
+            recipes.append(recipe)
+            print(f"  [+] {post.title[:60]}... ({post.score} upvotes)")
+        else:
+            pending.append(
+                (recipe, comment_pool.submit(fetch_top_comments, clients, post.id))
+            )
+    
+    for recipe, comments in pending:
+        recipe['top_comments'] = comments.result()
+        recipes.append(recipe)
+        print(f"  [+] {recipe['title'][:60]}... ({recipe['upvotes']} upvotes)")
+    return recipes
 
 
-def scrape_subreddit(reddit, subreddit_name):
+def scrape_subreddit(reddit, subreddit_name, clients=None, comment_pool=None):
     """Scrape recipes from a single subreddit"""
     print(f"\n[*] Scraping r/{subreddit_name}...")
-    recipes = []
     
     try:
         subreddit = reddit.subreddit(subreddit_name)
         
         # Get top posts of all time (most reliable)
-        for post in subreddit.top(time_filter='all', limit=200):
-            # Skip stickied posts, ads
-            if post.stickied:
-                continue
-            
-            # Filter only by minimum upvotes (which may be 0)
-            if post.score < MIN_UPVOTES:
-                continue
-            
-            # Extract recipe text
-            # For non-text/image posts, selftext may be empty – we still keep them
-            recipe_text = clean_recipe_text(post.selftext or "")
-            if len(recipe_text) < 20 and post.is_self:
-                # For self-posts, require a bit of body text
-                continue
-            
-            # Extract top comments (user tips, variations)
-            comments = []
-            try:
-                post.comments.replace_more(limit=0)  # Flatten comment tree
-                for comment in list(post.comments)[:5]:
-                    if comment.score > 50 and len(comment.body) > 20:
-                        comments.append({
-                            'body': comment.body[:500],
-                            'upvotes': comment.score
-                        })
-            except Exception as e:
-                print(f"  [!] Error extracting comments: {e}")
-            
-            # Build recipe object
-            recipe = {
-                'title': post.title,
-                'recipe_text': recipe_text,
-                'ingredients': extract_ingredients(recipe_text),
-                'upvotes': post.score,
-                'subreddit': subreddit_name,
-                'reddit_url': f"https://reddit.com{post.permalink}",
-                'created_at': datetime.fromtimestamp(post.created_utc).isoformat(),
-                'top_comments': comments,
-                'source': f"r/{subreddit_name}",
-                'credit': f"Original post by u/{post.author}" if post.author else "r/" + subreddit_name,
-                # App-level user feedback fields (start empty, filled by your app)
-                'user_likes': 0,
-                'user_dislikes': 0,
-                'user_rating': 0.0,      # average rating (e.g. 0–5 stars)
-                'total_ratings': 0,      # how many ratings contributed to user_rating
-                'user_comments': [],     # list of comment objects your app can append
-            }
-            
-            recipes.append(recipe)
-            print(f"  [+] {post.title[:60]}... ({post.score} upvotes)")
+        recipes = collect_recipes(
+            subreddit.top(time_filter='all', limit=200),
+            subreddit_name, clients, comment_pool,
+        )
         
         print(f"[✓] Found {len(recipes)} recipes in r/{subreddit_name}")
         return recipes
@@ -149,24 +254,178 @@ def scrape_subreddit(reddit, subreddit_name):
         return []
 
 
+def load_state(path):
+    """Per-subreddit cursors from a previous incremental run ({} if none)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('subreddits', {})
+
+
+def save_state(path, cursors):
+    """Write the cursors atomically, so an interrupted run keeps the old file"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': STATE_VERSION, 'subreddits': cursors}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def scrape_subreddit_incremental(
+    reddit, subreddit_name, cursor, clients=None, comment_pool=None,
+    refresh_days=DEFAULT_REFRESH_DAYS,
+):
+    """
+    Recipes posted to a subreddit since `cursor`, plus fresh copies of recent ones
+
+    cursor is what the previous run returned (None on the first run, which
+    scrapes the top posts as usual and starts the cursor at the newest
+    post). New posts come from the new() listing, read only down to the
+    cursor. Posts emitted within the last `refresh_days` days are fetched
+    again in batches of 100 through info(), and their comment trees
+    reloaded, to pick up score and comment changes; older posts are left
+    alone.
+
+    Returns (recipes, new cursor). On error it returns ([], cursor), so
+    the next run picks up from the same place.
+    """
+    print(f"\n[*] Scraping r/{subreddit_name} (incremental)...")
+    now = time.time()
+    refresh_after = now - refresh_days * 24 * 60 * 60
+    
+    try:
+        subreddit = reddit.subreddit(subreddit_name)
+        
+        if cursor is None:
+            newest = next(iter(subreddit.new(limit=1)), None)
+            recipes = collect_recipes(
+                subreddit.top(time_filter='all', limit=200),
+                subreddit_name, clients, comment_pool,
+            )
+            refreshed = []
+            cursor = {'last_created_utc': 0.0, 'last_fullname': None, 'recent': {}}
+        else:
+            # new() is newest first: read it down to the high-water mark
+            # (Reddit serves at most ~1000 posts of any listing)
+            newest = None
+            new_posts = []
+            for post in subreddit.new(limit=None):
+                newest = newest or post
+                if (post.name == cursor['last_fullname']
+                        or post.created_utc < cursor['last_created_utc']):
+                    break
+                if post.name not in cursor['recent']:
+                    new_posts.append(post)
+            recipes = collect_recipes(new_posts, subreddit_name, clients, comment_pool)
+            
+            recent = [
+                fullname for fullname, created_utc in cursor['recent'].items()
+                if created_utc >= refresh_after
+            ]
+            refreshed = collect_recipes(
+                reddit.info(fullnames=recent) if recent else [],
+                subreddit_name, clients, comment_pool,
+            )
+        
+        recent = {
+            fullname: created_utc for fullname, created_utc in cursor['recent'].items()
+            if created_utc >= refresh_after
+        }
+        for recipe in recipes:
+            if recipe['created_utc'] >= refresh_after:
+                recent[recipe['reddit_id']] = recipe['created_utc']
+        if newest is not None:
+            cursor = {
+                'last_created_utc': max(cursor['last_created_utc'], newest.created_utc),
+                'last_fullname': newest.name,
+                'recent': recent,
+            }
+        else:
+            cursor = dict(cursor, recent=recent)
+        
+        print(f"[✓] Found {len(recipes)} new recipes in r/{subreddit_name}, "
+              f"refreshed {len(refreshed)}")
+        return recipes + refreshed, cursor
+    
+    except Exception as e:
+        print(f"[!] Error scraping r/{subreddit_name}: {e}")
+        return [], cursor
+
+
 def main():
     """Main scraper pipeline"""
-    print("=" * 60)
-    print("RASHAN REDDIT RECIPE SCRAPER")
-    print("=" * 60)
-    print(f"\nMinimum upvotes: {MIN_UPVOTES}")
-    print(f"Subreddits: {', '.join(SUBREDDITS)}")
-    
-    # Initialize Reddit API
+    parser = argparse.ArgumentParser(description="Scrape recipe posts from Reddit for Rashan.")
+    parser.add_argument(
+        '--output', '-o',
+        help="Output file: .json array, or .ndjson / .jsonl (optionally .gz); "
+             "'-' streams NDJSON to stdout. If not given, a timestamped .json file is created.",
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help="Subreddits scraped, and comment trees fetched, in parallel "
+             "(default: 1, one request at a time). All workers share Reddit's "
+             "rate limit as reported in its response headers.",
+    )
+    parser.add_argument(
+        '--oauth_url',
+        help="Reddit API base URL (default: https://oauth.reddit.com), "
+             "e.g. a local fake API for testing.",
+    )
+    parser.add_argument(
+        '--reddit_url',
+        help="Base URL for access tokens (default: https://www.reddit.com).",
+    )
+    parser.add_argument(
+        '--state_file',
+        help="Incremental mode: JSON file with a cursor per subreddit. Only posts "
+             "newer than the cursor are scraped, plus refreshed copies of recent "
+             "ones; the file is created on the first run and updated after each "
+             "subreddit.",
+    )
+    parser.add_argument(
+        '--refresh_days', type=float, default=DEFAULT_REFRESH_DAYS,
+        help="Incremental mode: re-fetch score and comments of posts younger "
+             "than this many days (default: %(default)s).",
+    )
+    args = parser.parse_args()
+    output_file = args.output or f"reddit_recipes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    reddit_kwargs = {
+        k: v for k, v in (('oauth_url', args.oauth_url), ('reddit_url', args.reddit_url)) if v
+    }
+
+    # Authenticate before the output exists, so bad credentials don't leave
+    # an empty dataset behind for the next stage
+    with progress_to_stderr(output_file):
+        clients = connect_reddit(**reddit_kwargs)
+    if clients is None:
+        sys.exit(1)
+
+    with RecordWriter(output_file) as writer, progress_to_stderr(output_file):
+        scrape_to_writer(
+            writer,
+            clients=clients,
+            workers=args.workers,
+            state_file=args.state_file,
+            refresh_days=args.refresh_days,
+            **reddit_kwargs,
+        )
+
+
+def connect_reddit(**reddit_kwargs):
+    """
+    RedditClients whose credentials were checked against the API, or None
+
+    reddit_kwargs go to praw.Reddit (oauth_url / reddit_url).
+    """
     print("\n[*] Initializing Reddit API...")
+    clients = RedditClients(**reddit_kwargs)
     try:
-        reddit = praw.Reddit(
-            client_id=REDDIT_CONFIG['client_id'],
-            client_secret=REDDIT_CONFIG['client_secret'],
-            user_agent=REDDIT_CONFIG['user_agent']
-        )
-        # Test connection
-        reddit.user.me()
+        reddit = clients.get()
+        # Test connection (a script app without a username is read-only,
+        # where user.me() is not allowed; fetching a token proves the keys)
+        if reddit.read_only:
+            reddit.auth.scopes()
+        else:
+            reddit.user.me()
         print("[✓] Reddit API authenticated")
     except Exception as e:
         print(f"[!] Reddit API error: {e}")
@@ -174,32 +433,75 @@ def main():
         print("1. Installed PRAW: pip install praw")
         print("2. Created Reddit app: https://www.reddit.com/prefs/apps")
         print("3. Added credentials to this script")
-        return
+        return None
+    return clients
+
+
+def scrape_to_writer(
+    writer, clients=None, workers=1, state_file=None, refresh_days=DEFAULT_REFRESH_DAYS,
+    **reddit_kwargs
+):
+    """
+    Scrape every subreddit, writing unique recipes as each one finishes
+
+    With a state_file, runs incrementally (see scrape_subreddit_incremental).
+    Without authenticated clients (see connect_reddit), connects first with
+    reddit_kwargs.
+    """
+    print("=" * 60)
+    print("RASHAN REDDIT RECIPE SCRAPER")
+    print("=" * 60)
+    print(f"\nMinimum upvotes: {MIN_UPVOTES}")
+    print(f"Subreddits: {', '.join(SUBREDDITS)}")
+    print(f"Workers: {workers}")
+    cursors = None
+    if state_file:
+        cursors = load_state(state_file)
+        print(f"Incremental: {state_file} ({len(cursors)} subreddits seen before)")
     
-    # Scrape all subreddits
-    all_recipes = []
-    for subreddit in SUBREDDITS:
-        recipes = scrape_subreddit(reddit, subreddit)
-        all_recipes.extend(recipes)
+    if clients is None:
+        clients = connect_reddit(**reddit_kwargs)
+        if clients is None:
+            return
+    reddit = clients.get()
     
-    # Remove duplicates (same title)
-    seen_titles = set()
-    unique_recipes = []
-    for recipe in all_recipes:
-        if recipe['title'] not in seen_titles:
-            unique_recipes.append(recipe)
-            seen_titles.add(recipe['title'])
+    def scrape(reddit, name, clients=None, comment_pool=None):
+        """(recipes, new cursor or None) for one subreddit"""
+        if cursors is None:
+            return scrape_subreddit(reddit, name, clients, comment_pool), None
+        return scrape_subreddit_incremental(
+            reddit, name, cursors.get(name), clients, comment_pool, refresh_days
+        )
     
-    # Save to JSON
-    output_file = f"reddit_recipes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(unique_recipes, f, indent=2, ensure_ascii=False)
+    # Scrape all subreddits, skipping duplicates (same title)
+    seen_titles = set()
+    with ThreadPoolExecutor(max_workers=workers) as comment_pool, \
+            ThreadPoolExecutor(max_workers=min(workers, len(SUBREDDITS))) as pool:
+        if workers > 1:
+            # map() yields in SUBREDDITS order, so output matches a serial run
+            results = pool.map(
+                lambda name: scrape(clients.get(), name, clients, comment_pool),
+                SUBREDDITS,
+            )
+        else:
+            results = (scrape(reddit, name) for name in SUBREDDITS)
+        for name, (recipes, cursor) in zip(SUBREDDITS, results):
+            for recipe in recipes:
+                if recipe['title'] not in seen_titles:
+                    writer.write(recipe)
+                    seen_titles.add(recipe['title'])
+            # Only advance once the subreddit's recipes are written out
+            if cursor is not None:
+                cursors[name] = cursor
+                save_state(state_file, cursors)
     
     # Summary
     print("\n" + "=" * 60)
     print(f"[✓] SCRAPING COMPLETE")
-    print(f"Total recipes: {len(unique_recipes)}")
-    print(f"Output file: {output_file}")
+    print(f"Total recipes: {writer.count}")
+    print(f"Output file: {writer.path}")
+    print(f"API requests: {clients.budget.requests} "
+          f"({clients.budget.waited_seconds:.1f}s waiting on the rate limit)")
     print("=" * 60)
     print("\nNext steps:")
     print("1. Review recipes manually (check for duplicates, quality)")
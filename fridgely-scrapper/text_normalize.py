@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Text normalisation shared by the Reddit and WordPress scrapers.
+
+Patterns are compiled once at import, and every helper runs in time
+linear in its input:
+
+  - clean_recipe_text(): collapses blank lines and trims to a length limit,
+    looking at only as much of a long post as the limit needs
+  - keyword_pattern(): one alternation regex for a keyword list, so a title
+    is scanned once rather than once per keyword
+  - split_sections(): finds the ingredients and instructions / steps
+    sections of a plain-text recipe with a few str.find() scans for the
+    section markers, instead of a lazy `[\\s\\S]*?` match that retries
+    the end markers at every character
+  - clean_html_text(): entity-unescaped, tag-free, single-spaced text
+
+The WordPress heading patterns (INGREDIENTS_HEADING_RE,
+INSTRUCTIONS_HEADING_RE) live here too, next to the plain-text markers.
+"""
+
+import html as html_lib
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+# Longest recipe_text kept (most recipes are shorter)
+MAX_RECIPE_TEXT = 3000
+
+# Without a marked ingredients section, this much of the text stands in
+INGREDIENTS_FALLBACK_CHARS = 500
+
+BLANK_LINES_RE = re.compile(r"\n\s*\n")
+TAG_RE = re.compile(r"<[^>]+>")
+SPACES_RE = re.compile(r"\s+")
+
+# Section headings on WordPress pages (h2/h3/h4 text)
+INGREDIENTS_HEADING_RE = re.compile("Ingredients", re.IGNORECASE)
+INSTRUCTIONS_HEADING_RE = re.compile(
+    "Instructions|Method|Directions|Preparation", re.IGNORECASE
+)
+
+# Section markers in plain text (Reddit selftext), matched case-insensitively:
+# "ingredient" takes an optional "s" and ":", "instruction" an optional "s"
+# and a required ":". An instructions marker ends the ingredients section
+# and an ingredients marker ends the instructions section.
+INGREDIENTS_MARKER = "ingredient"
+INSTRUCTIONS_MARKER = "instruction"
+OTHER_INSTRUCTIONS_MARKERS = ("preparation", "directions", "steps:")
+
+
+def clean_recipe_text(text: str, limit: int = MAX_RECIPE_TEXT) -> str:
+    """Collapse blank lines and trim to `limit` characters."""
+    # Cleaning only shrinks text, so a prefix whose cleaned form still has
+    # `limit` characters before any trailing whitespace gives the same result
+    if len(text) > 4 * limit:
+        head = BLANK_LINES_RE.sub("\n", text[:4 * limit])
+        if len(head.rstrip()) >= limit:
+            return head[:limit]
+    return BLANK_LINES_RE.sub("\n", text)[:limit]
+
+
+def keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    """Regex matching any of the (lower-case) keywords as a substring."""
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile("|".join(re.escape(k) for k in ordered))
+
+
+def _fold_case(text: str) -> str:
+    """text.lower(), keeping every character at its offset."""
+    # U+0130 is the one character whose lower case is two characters;
+    # long s matches "s" the way re.IGNORECASE does
+    return text.replace("\u0130", "i").replace("\u017f", "s").lower()
+
+
+def _next_marker(folded: str, section: str, pos: int) -> Optional[Tuple[int, int]]:
+    """(start, end) of the first marker of `section` at or after pos."""
+    if section == "ingredients":
+        start = folded.find(INGREDIENTS_MARKER, pos)
+        if start < 0:
+            return None
+        end = start + len(INGREDIENTS_MARKER)
+        end += folded.startswith("s", end)
+        end += folded.startswith(":", end)
+        return start, end
+
+    found = None
+    for marker in OTHER_INSTRUCTIONS_MARKERS:
+        start = folded.find(marker, pos)
+        if start >= 0 and (found is None or start < found[0]):
+            found = (start, start + len(marker))
+    start = folded.find(INSTRUCTIONS_MARKER, pos)
+    while start >= 0 and (found is None or start < found[0]):
+        end = start + len(INSTRUCTIONS_MARKER)
+        end += folded.startswith("s", end)
+        if folded.startswith(":", end):
+            return start, end + 1
+        start = folded.find(INSTRUCTIONS_MARKER, start + 1)
+    return found
+
+
+def _section_spans(text: str) -> Dict[str, Optional[Tuple[int, int]]]:
+    """(start, end) of each marked section, or None where the marker is missing."""
+    folded = _fold_case(text)
+    spans: Dict[str, Optional[Tuple[int, int]]] = {}
+    for section, other in (("ingredients", "instructions"), ("instructions", "ingredients")):
+        marker = _next_marker(folded, section, 0)
+        if marker is None:
+            spans[section] = None
+            continue
+        # A section runs to the first marker of the other kind after it
+        end = _next_marker(folded, other, marker[1])
+        spans[section] = (marker[1], end[0] if end else len(text))
+    return spans
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """
+    The ingredients and instructions sections of a plain-text recipe.
+
+    The ingredients section runs from the first "Ingredients" marker to the
+    next instructions / preparation / directions / steps marker; without
+    that marker the start of the text stands in (posts mostly list the
+    ingredients first). The instructions section runs from the first of
+    the other markers to the next "Ingredients" marker, or is "".
+    """
+    spans = _section_spans(text)
+    sections = {
+        name: text[span[0]:span[1]].strip() if span else ""
+        for name, span in spans.items()
+    }
+    if spans["ingredients"] is None:
+        sections["ingredients"] = text[:INGREDIENTS_FALLBACK_CHARS]
+    return sections
+
+
+def extract_ingredients(text: str) -> str:
+    """Try to extract ingredients section from recipe text"""
+    return split_sections(text)["ingredients"]
+
+
+def clean_html_text(value: str) -> str:
+    """Unescape entities, drop stray tags and collapse whitespace."""
+    text = TAG_RE.sub(" ", html_lib.unescape(value))
+    return SPACES_RE.sub(" ", text).strip()
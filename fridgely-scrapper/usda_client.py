@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Concurrent USDA FoodData Central client for nutrition_helper.py.
+
+nutrition_helper.py makes a pre-pass over its input that collects every
+distinct ingredient name the manual table and the nutrition cache can't
+answer, and resolves them all here before any recipe is estimated:
+
+  - names given with an FDC id are fetched up to 20 at a time through the
+    batch /foods endpoint; the search endpoint takes one query per
+    request, so every other name costs one request (nutrition_helper.py
+    only searches: its INGREDIENT_MAP ids are not reliable)
+  - at most `concurrency` requests are in flight, and a token bucket keeps
+    the request rate within the API key's hourly quota (DEMO_KEY: 30/hour,
+    a registered key: 1,000/hour)
+  - 429 and 5xx responses (and dropped connections) are retried with
+    exponential backoff, honouring Retry-After; a name that still fails is
+    left out of the results, so it is never cached
+
+Use your own key via $FDC_API_KEY (free: https://fdc.nal.usda.gov/api-key-signup).
+"""
+
+import asyncio
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import http_cache
+from rate_limit import TokenBucket
+
+SEARCH_URL = "https://fdc.nal.usda.gov/api/foods/search"
+FOODS_URL = "https://api.nal.usda.gov/fdc/v1/foods"
+
+API_KEY_ENV_VAR = "FDC_API_KEY"
+DEMO_API_KEY = "DEMO_KEY"
+
+# api.data.gov quotas (rolling hour, per key; DEMO_KEY per IP)
+DEMO_HOURLY_LIMIT = 30
+DEFAULT_HOURLY_LIMIT = 1000
+
+# Most ids the /foods endpoint accepts per request
+FOODS_BATCH_SIZE = 20
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_SECONDS = 1.0
+
+# FDC nutrient number -> macro; energy 957/958 (Atwater) only fill a missing 208
+NUTRIENT_NUMBERS = {
+    "203": "protein",
+    "204": "fat",
+    "205": "carbs",
+    "208": "calories",
+    "957": "calories",
+    "958": "calories",
+}
+
+# (query, FDC id or None) for each name to resolve
+Lookup = Tuple[str, Optional[int]]
+
+
+def api_key() -> str:
+    return os.environ.get(API_KEY_ENV_VAR) or DEMO_API_KEY
+
+
+def hourly_limit(key: str) -> int:
+    return DEMO_HOURLY_LIMIT if key == DEMO_API_KEY else DEFAULT_HOURLY_LIMIT
+
+
+def search_params(query: str, key: Optional[str] = None) -> Dict:
+    return {'query': query, 'pageSize': 1, 'api_key': key or api_key()}
+
+
+def foods_params(fdc_ids: Iterable[int], key: Optional[str] = None) -> Dict:
+    return {
+        'fdcIds': ",".join(str(i) for i in sorted(fdc_ids)),
+        'format': 'abridged',
+        'nutrients': ",".join(n for n in NUTRIENT_NUMBERS),
+        'api_key': key or api_key(),
+    }
+
+
+def nutrition_from_search(data: Dict) -> Optional[Dict]:
+    """Per-100 g macros of the top /foods/search hit, or None if there is none."""
+    if not data.get('foods'):
+        return None
+    food = data['foods'][0]
+    nutrients = {n['nutrientName']: n['value']
+                 for n in food.get('foodNutrients', [])}
+
+    return {
+        'name': food['description'],
+        'protein': nutrients.get('Protein', 0),
+        'carbs': nutrients.get('Carbohydrate, by difference', 0),
+        'fat': nutrients.get('Total lipid (fat)', 0),
+        'calories': nutrients.get('Energy', 0) / 4.184  # Convert kJ to kcal
+    }
+
+
+def nutrition_from_food(food: Dict) -> Dict:
+    """Per-100 g macros of one /foods result (abridged or full format)."""
+    values: Dict[str, float] = {}
+    for entry in food.get('foodNutrients', []):
+        number = str(entry.get('number') or (entry.get('nutrient') or {}).get('number'))
+        macro = NUTRIENT_NUMBERS.get(number)
+        amount = entry.get('amount')
+        if macro is None or amount is None:
+            continue
+        if macro == 'calories' and number != '208' and macro in values:
+            continue
+        values[macro] = float(amount)
+    return {
+        'name': food.get('description', ''),
+        'protein': values.get('protein', 0),
+        'carbs': values.get('carbs', 0),
+        'fat': values.get('fat', 0),
+        'calories': values.get('calories', 0),
+    }
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(resp.headers.get('Retry-After', '')))
+    except ValueError:
+        return None  # missing, or an HTTP date
+
+
+class UsdaClient:
+    """Rate-limited, retrying USDA requests run concurrently from asyncio."""
+
+    def __init__(
+        self,
+        key: Optional[str] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        hourly: Optional[int] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+    ):
+        self.key = key or api_key()
+        self.concurrency = concurrency
+        self.hourly = hourly or hourly_limit(self.key)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.requests_made = 0
+        self.retries = 0
+        raw_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        raw_session.mount("http://", adapter)
+        raw_session.mount("https://", adapter)
+        self._session = http_cache.cached_session(raw_session)
+
+    async def _get(self, url: str, params: Dict) -> requests.Response:
+        """GET with retries; raises once 429/5xx persist past max_retries."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            async with self._slots:
+                await self._bucket.acquire()
+                self.requests_made += 1
+                try:
+                    resp = await loop.run_in_executor(
+                        self._executor,
+                        partial(self._session.get, url, params=params, timeout=15),
+                    )
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt == self.max_retries:
+                        raise
+                    resp = None
+            if resp is not None and (
+                resp.status_code != 429 and resp.status_code < 500
+                or attempt == self.max_retries
+            ):
+                resp.raise_for_status()
+                return resp
+
+            delay = _retry_after(resp) if resp is not None else None
+            if delay is None:
+                delay = self.backoff_seconds * 2 ** attempt
+                delay += random.uniform(0, self.backoff_seconds)
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def search(self, query: str) -> Optional[Dict]:
+        resp = await self._get(SEARCH_URL, search_params(query, self.key))
+        return nutrition_from_search(resp.json())
+
+    async def foods(self, fdc_ids: List[int]) -> Dict[int, Dict]:
+        """Macros by FDC id for up to FOODS_BATCH_SIZE ids (unknown ids left out)."""
+        resp = await self._get(FOODS_URL, foods_params(fdc_ids, self.key))
+        return {int(food['fdcId']): nutrition_from_food(food) for food in resp.json()}
+
+    async def resolve(self, lookups: Mapping[str, Lookup]) -> Dict[str, Optional[Dict]]:
+        """
+        Resolve {name: (query, fdc_id)} to {name: macros, or None for "no data"}.
+
+        Names whose requests fail for good are missing from the result.
+        """
+        self._slots = asyncio.Semaphore(self.concurrency)
+        # A full hour's quota may go at once, then it refills steadily
+        self._bucket = TokenBucket(self.hourly / 3600.0, capacity=self.hourly)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        by_id: Dict[int, List[str]] = {}
+        by_query: Dict[str, List[str]] = {}
+        for name, (query, fdc_id) in lookups.items():
+            if fdc_id:
+                by_id.setdefault(fdc_id, []).append(name)
+            else:
+                by_query.setdefault(query, []).append(name)
+
+        results: Dict[str, Optional[Dict]] = {}
+
+        async def fetch_batch(ids: List[int]) -> None:
+            try:
+                found = await self.foods(ids)
+            except Exception as e:
+                print(f"  [!] USDA lookup failed for FDC ids {ids}: {e}")
+                return
+            for fdc_id in ids:
+                for name in by_id[fdc_id]:
+                    results[name] = found.get(fdc_id)
+
+        async def fetch_search(query: str) -> None:
+            try:
+                value = await self.search(query)
+            except Exception as e:
+                print(f"  [!] USDA lookup failed for '{query}': {e}")
+                return
+            for name in by_query[query]:
+                results[name] = value
+
+        ids = sorted(by_id)
+        tasks = [
+            fetch_batch(ids[i:i + FOODS_BATCH_SIZE])
+            for i in range(0, len(ids), FOODS_BATCH_SIZE)
+        ]
+        tasks += [fetch_search(query) for query in by_query]
+        if len(tasks) > self.hourly:
+            hours = (len(tasks) - self.hourly) / self.hourly
+            print(f"  [!] {len(tasks)} USDA requests exceed the key's hourly quota of "
+                  f"{self.hourly}; this will take ~{hours:.1f}h (set ${API_KEY_ENV_VAR})")
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self._executor.shutdown(wait=False)
+        return results
+
+
+def resolve_all(lookups: Mapping[str, Lookup], **kwargs) -> Dict[str, Optional[Dict]]:
+    """Blocking wrapper around UsdaClient(**kwargs).resolve(lookups)."""
+    client = UsdaClient(**kwargs)
+    results = asyncio.run(client.resolve(lookups))
+    print(f"  USDA requests: {client.requests_made} ({client.retries} retried)")
+    return results
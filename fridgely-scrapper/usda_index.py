@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Offline USDA FoodData Central index for nutrition_helper.py.
+
+Imports the FDC bulk download (https://fdc.nal.usda.gov/download-datasets)
+into one small SQLite file: a row of per-100 g macros per food plus an FTS5
+full-text index over the descriptions. Lookups are then local queries –
+no API key, no rate limit, no network – so nutrition_helper.py also works
+in air-gapped batch jobs.
+
+Accepted sources (any mix):
+  - the CSV download, unzipped (a directory with food.csv,
+    food_nutrient.csv) or still zipped
+  - the JSON downloads (Foundation / SR Legacy / FNDDS / Branded), as .json
+    or .zip
+
+Only the nutrients nutrition_helper uses are kept: protein (1003), fat
+(1004), carbohydrate (1005) and energy in kcal (1008, falling back to the
+Atwater energy values 2047 / 2048 that Foundation foods use).
+
+Example:
+  python usda_index.py FoodData_Central_csv_2024-04-18.zip -o usda_fdc.sqlite
+  python usda_index.py --index usda_fdc.sqlite --query "red onion"
+  python nutrition_helper.py recipes.json --usda_index usda_fdc.sqlite
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import zipfile
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ingredient_matcher import tokenize
+
+# Generic foods only by default; Branded adds ~2M noisy product rows
+DEFAULT_DATA_TYPES = ("foundation_food", "sr_legacy_food", "survey_fndds_food")
+
+# JSON downloads use display names for the data type
+JSON_DATA_TYPES = {
+    "Foundation": "foundation_food",
+    "SR Legacy": "sr_legacy_food",
+    "Survey (FNDDS)": "survey_fndds_food",
+    "Branded": "branded_food",
+}
+
+# FDC nutrient id -> column; later energy ids only fill a missing 1008
+NUTRIENT_COLUMNS = {
+    1003: "protein",
+    1004: "fat",
+    1005: "carbs",
+    1008: "calories",
+    2047: "calories",
+    2048: "calories",
+}
+MACROS = ("protein", "carbs", "fat", "calories")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS foods (
+    fdc_id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    data_type TEXT NOT NULL,
+    protein REAL NOT NULL,
+    carbs REAL NOT NULL,
+    fat REAL NOT NULL,
+    calories REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(
+    description, content='foods', content_rowid='fdc_id',
+    tokenize='porter unicode61'
+);
+"""
+
+FoodRow = Tuple[int, str, str, Dict[str, float]]
+
+
+def _set_nutrient(values: Dict[str, float], nutrient_id: int, amount) -> None:
+    column = NUTRIENT_COLUMNS.get(nutrient_id)
+    if column is None or amount in (None, ""):
+        return
+    if column == "calories" and nutrient_id != 1008 and column in values:
+        return
+    values[column] = float(amount)
+
+
+class _Source:
+    """A directory or zip file, opened member by member by base name."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+
+    def names(self) -> List[str]:
+        if self._zip is not None:
+            return [n for n in self._zip.namelist() if not n.endswith("/")]
+        if os.path.isdir(self.path):
+            return [os.path.join(self.path, n) for n in os.listdir(self.path)]
+        return [self.path]
+
+    def find(self, base_name: str) -> Optional[str]:
+        for name in self.names():
+            if os.path.basename(name) == base_name:
+                return name
+        return None
+
+    def open(self, name: str) -> IO[str]:
+        if self._zip is not None:
+            return io.TextIOWrapper(self._zip.open(name), encoding="utf-8", newline="")
+        return open(name, "r", encoding="utf-8", newline="")
+
+
+def iter_csv_foods(source: _Source, data_types: Iterable[str]) -> Iterator[FoodRow]:
+    """Foods from a CSV download, streaming food_nutrient.csv once."""
+    wanted = set(data_types)
+    foods: Dict[int, Tuple[str, str]] = {}
+    with source.open(source.find("food.csv")) as f:
+        for row in csv.DictReader(f):
+            if row["data_type"] in wanted:
+                foods[int(row["fdc_id"])] = (row["description"], row["data_type"])
+
+    values: Dict[int, Dict[str, float]] = {}
+    with source.open(source.find("food_nutrient.csv")) as f:
+        for row in csv.DictReader(f):
+            nutrient_id = int(row["nutrient_id"])
+            if nutrient_id not in NUTRIENT_COLUMNS:
+                continue
+            fdc_id = int(row["fdc_id"])
+            if fdc_id in foods:
+                _set_nutrient(values.setdefault(fdc_id, {}), nutrient_id, row["amount"])
+
+    for fdc_id, (description, data_type) in foods.items():
+        if fdc_id in values:
+            yield fdc_id, description, data_type, values[fdc_id]
+
+
+def iter_json_foods(
+    source: _Source, name: str, data_types: Iterable[str]
+) -> Iterator[FoodRow]:
+    """Foods from one JSON download ({"FoundationFoods": [...]} etc.)."""
+    wanted = set(data_types)
+    with source.open(name) as f:
+        data = json.load(f)
+    for foods in data.values():
+        if not isinstance(foods, list):
+            continue
+        for food in foods:
+            data_type = JSON_DATA_TYPES.get(food.get("dataType"), food.get("dataType"))
+            if data_type not in wanted:
+                continue
+            values: Dict[str, float] = {}
+            for entry in food.get("foodNutrients", []):
+                nutrient = entry.get("nutrient") or {}
+                if "id" in nutrient:
+                    _set_nutrient(values, int(nutrient["id"]), entry.get("amount"))
+            if values:
+                yield int(food["fdcId"]), food["description"], data_type, values
+
+
+def iter_foods(path: str, data_types: Iterable[str]) -> Iterator[FoodRow]:
+    source = _Source(path)
+    if source.find("food.csv") and source.find("food_nutrient.csv"):
+        yield from iter_csv_foods(source, data_types)
+        return
+    json_names = [n for n in source.names() if n.lower().endswith(".json")]
+    if not json_names:
+        raise ValueError(f"No FDC CSV or JSON data found in {path}")
+    for name in json_names:
+        yield from iter_json_foods(source, name, data_types)
+
+
+def build_index(
+    sources: Iterable[str],
+    index_path: str,
+    data_types: Iterable[str] = DEFAULT_DATA_TYPES,
+) -> int:
+    """(Re)build the SQLite index from FDC downloads; returns the food count."""
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    db = sqlite3.connect(index_path)
+    db.executescript(SCHEMA)
+    count = 0
+    with db:
+        for path in sources:
+            rows = (
+                (fdc_id, description, data_type,
+                 *(values.get(m, 0.0) for m in MACROS))
+                for fdc_id, description, data_type, values in iter_foods(path, data_types)
+            )
+            cursor = db.executemany(
+                "INSERT OR REPLACE INTO foods VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            count += cursor.rowcount
+        db.execute("INSERT INTO foods_fts (foods_fts) VALUES ('rebuild')")
+    db.execute("VACUUM")
+    db.close()
+    return count
+
+
+class UsdaIndex:
+    """Read-only lookups in an index written by build_index()."""
+
+    def __init__(self, path: str):
+        path = os.path.expanduser(path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"USDA index not found: {path}")
+        self.path = path
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def search(self, name: str, limit: int = 5) -> List[Dict]:
+        """
+        Best matching foods for an ingredient name.
+
+        All words must match (stemmed, so "onions" finds "Onions, raw");
+        if nothing does, any word may. Ranked by BM25, which favours short
+        generic descriptions over long prepared-food ones.
+        """
+        words = tokenize(name)
+        if not words:
+            return []
+        terms = ['"' + w.replace('"', "") + '"' for w in words]
+        for query in (" AND ".join(terms), " OR ".join(terms)):
+            rows = self._db.execute(
+                "SELECT f.fdc_id, f.description, f.protein, f.carbs, f.fat, f.calories "
+                "FROM foods_fts JOIN foods f ON f.fdc_id = foods_fts.rowid "
+                "WHERE foods_fts MATCH ? ORDER BY bm25(foods_fts) LIMIT ?",
+                (query, limit),
+            ).fetchall()
+            if rows:
+                return [
+                    {
+                        "fdc_id": fdc_id,
+                        "name": description,
+                        "protein": protein,
+                        "carbs": carbs,
+                        "fat": fat,
+                        "calories": calories,
+                    }
+                    for fdc_id, description, protein, carbs, fat, calories in rows
+                ]
+            if len(terms) == 1:
+                break
+        return []
+
+    def lookup(self, name: str) -> Optional[Dict]:
+        """Per-100 g macros of the best match, in search_usda()'s shape, or None."""
+        results = self.search(name, limit=1)
+        return results[0] if results else None
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build / query the offline USDA FoodData Central index."
+    )
+    parser.add_argument(
+        "sources", nargs="*",
+        help="FDC downloads: CSV directory or zip, or JSON file / zip.",
+    )
+    parser.add_argument(
+        "--output", "-o", default="usda_fdc.sqlite",
+        help="Index file to write (default: usda_fdc.sqlite).",
+    )
+    parser.add_argument(
+        "--data_types", nargs="+", default=list(DEFAULT_DATA_TYPES),
+        help="FDC data types to import (add branded_food for products).",
+    )
+    parser.add_argument("--index", help="Existing index to query (with --query).")
+    parser.add_argument("--query", help="Show the best matches for an ingredient name.")
+    args = parser.parse_args()
+
+    if args.sources:
+        print(f"[*] Importing {', '.join(args.sources)} ({', '.join(args.data_types)})")
+        count = build_index(args.sources, args.output, args.data_types)
+        size_mb = os.path.getsize(args.output) / 1024 / 1024
+        print(f"[✓] Indexed {count} foods into {args.output} ({size_mb:.1f} MB)")
+
+    if args.query:
+        index = UsdaIndex(args.index or args.output)
+        for food in index.search(args.query):
+            print(
+                f"{food['fdc_id']:>8}  {food['name'][:60]:<60}  "
+                f"P {food['protein']:.1f}  C {food['carbs']:.1f}  "
+                f"F {food['fat']:.1f}  {food['calories']:.0f} kcal"
+            )
+    elif not args.sources:
+        parser.error("give FDC sources to import and/or --query")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ Generic WordPress Recipe Scraper for Rashan
 
 Goal:
   - Scrape full recipe text + ingredients from WordPress recipe pages
+  - Prefer the page's embedded schema.org Recipe (JSON-LD), which also
+    gives servings, times and nutrition; fall back to HTML markup otherwise
   - Save as JSON, similar shape to reddit_recipe_scraper.py output
   - No database – just timestamped JSON files
 
@@ -18,28 +20,63 @@ Intended usage:
 
   4. Feed the resulting JSON into nutrition_helper.py.
 
+Incremental refresh:
+  Pass the previous output with --previous. A URL is not fetched again if
+  its sitemap lastmod (the optional tab-separated second column written by
+  crawl_wp_recipes.py --discovery sitemap) is unchanged. A re-fetched page
+  whose extracted recipe (title, ingredients, instructions, servings, times,
+  nutrition) hashes the same as last time keeps its previous record, so
+  nonces and timestamps in the HTML don't count as changes. The merged dataset goes
+  to --output; new/changed recipes alone also go to a "<output>.delta.json"
+  file for downstream stages.
+
+        python wp_recipe_scraper.py urls.txt -o recipes_new.json --previous recipes_old.json
+
+Throughput:
+  Fetching and parsing run as a two-stage pipeline. --fetch_concurrency sets
+  how many pages download at once, --workers how many processes parse HTML.
+  Output order always follows the urls file.
+
+        python wp_recipe_scraper.py urls.txt -o recipes.json --fetch_concurrency 4 --workers 14
+
+Streaming output:
+  Recipes are written (and flushed) as they are scraped. With an .ndjson /
+  .jsonl output (optionally .gz) an interrupted run keeps every finished
+  record, and "-o -" streams NDJSON to stdout for the next stage, with
+  progress going to stderr:
+
+        python wp_recipe_scraper.py urls.txt -o - | python nutrition_helper.py - out.ndjson
+
 NOTE:
   - Always check each site's robots.txt and Terms of Service before scraping.
   - Use this script responsibly (low rate, small batches).
 """
 
 import argparse
+import contextlib
+import hashlib
 import json
 import re
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 
-import requests
 from bs4 import BeautifulSoup
 
+import http_cache
+from recipe_io import RecordWriter, derive_path, progress_to_stderr, read_records, same_file
+from text_normalize import INGREDIENTS_HEADING_RE, INSTRUCTIONS_HEADING_RE, clean_html_text
+
 
 def fetch_url(url: str, timeout: int = 15) -> Optional[str]:
-    """Fetch HTML content for a single URL."""
+    """Fetch HTML content for a single URL (through the HTTP cache, if set)."""
     headers = {
         "User-Agent": "RashanRecipeScraper/1.0 (+https://example.com/contact)"
     }
     try:
-        resp = requests.get(url, headers=headers, timeout=timeout)
+        resp = http_cache.http_get(url, headers=headers, timeout=timeout)
         if resp.status_code != 200:
             print(f"[!] {url} returned status {resp.status_code}")
             return None
@@ -49,6 +86,27 @@ def fetch_url(url: str, timeout: int = 15) -> Optional[str]:
         return None
 
 
+# HTML parser backends selectable with --parser. "html.parser" and "lxml" go
+# through BeautifulSoup; "selectolax" uses the much faster lexbor engine.
+PARSER_BACKENDS = ["html.parser", "lxml", "selectolax"]
+
+# Headings checked by the fallback, in priority order
+SECTION_HEADING_TAGS = ["h2", "h3", "h4"]
+
+
+def make_document(html: str, parser: str = "html.parser"):
+    """Parse html with the chosen backend (BeautifulSoup or a lexbor tree)."""
+    if parser == "selectolax":
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+        except ImportError:
+            raise ImportError(
+                "The selectolax parser backend needs: pip install selectolax"
+            )
+        return LexborHTMLParser(html)
+    return BeautifulSoup(html, parser)
+
+
 def extract_text_list(elements: List) -> List[str]:
     """Convert a list of BeautifulSoup elements into clean text lines."""
     lines: List[str] = []
@@ -59,10 +117,43 @@ def extract_text_list(elements: List) -> List[str]:
     return lines
 
 
-def extract_ingredients_and_instructions(soup: BeautifulSoup) -> Dict[str, str]:
+def find_section_by_heading(headings: List, pattern: re.Pattern) -> List[str]:
+    """
+    Collect list items / paragraphs following the first matching heading.
+
+    `headings` are all h2/h3/h4 tags of the page (document order); h2s are
+    tried first, then h3s, then h4s.
+    """
+    for header_tag in SECTION_HEADING_TAGS:
+        for h in headings:
+            if h.name != header_tag or not pattern.search(h.get_text(" ", strip=True)):
+                continue
+            # Look at next siblings for content
+            collected: List[str] = []
+            sib = h.find_next_sibling()
+            # Walk a few siblings until structure clearly changes
+            steps = 0
+            while sib is not None and steps < 6:
+                if sib.name in ("ul", "ol"):
+                    collected.extend(extract_text_list(sib.find_all("li")))
+                elif sib.name == "p":
+                    text = sib.get_text(" ", strip=True)
+                    if text:
+                        collected.append(text)
+                sib = sib.find_next_sibling()
+                steps += 1
+            if collected:
+                return collected
+    return []
+
+
+def extract_ingredients_and_instructions(soup) -> Dict[str, str]:
     """
     Try to extract ingredients and instructions from a WordPress recipe page.
 
+    `soup` is a document from make_document(): a BeautifulSoup tree, or a
+    lexbor tree for the selectolax backend (which gives identical output).
+
     Strategy (in order):
       1. Look for WP Recipe Maker markup:
          - .wprm-recipe-ingredients
@@ -70,6 +161,9 @@ def extract_ingredients_and_instructions(soup: BeautifulSoup) -> Dict[str, str]:
       2. Fallback: search for headings like "Ingredients" / "Instructions"
          and grab the nearest <ul>/<ol>/<p> sections.
     """
+    if not isinstance(soup, BeautifulSoup):
+        return _extract_sections_lexbor(soup)
+
     ingredients_lines: List[str] = []
     instructions_lines: List[str] = []
 
@@ -84,39 +178,17 @@ def extract_ingredients_and_instructions(soup: BeautifulSoup) -> Dict[str, str]:
     if instructions_block:
         instructions_lines = extract_text_list(instructions_block.find_all(["li", "p"]))
 
-    # 2) Fallbacks based on headings
-    def find_section_by_heading(
-        heading_keywords: List[str],
-    ) -> List[str]:
-        pattern = re.compile("|".join(heading_keywords), re.IGNORECASE)
-        for header_tag in ["h2", "h3", "h4"]:
-            for h in soup.find_all(header_tag):
-                if pattern.search(h.get_text(" ", strip=True)):
-                    # Look at next siblings for content
-                    collected: List[str] = []
-                    sib = h.find_next_sibling()
-                    # Walk a few siblings until structure clearly changes
-                    steps = 0
-                    while sib is not None and steps < 6:
-                        if sib.name in ("ul", "ol"):
-                            collected.extend(extract_text_list(sib.find_all("li")))
-                        elif sib.name == "p":
-                            text = sib.get_text(" ", strip=True)
-                            if text:
-                                collected.append(text)
-                        sib = sib.find_next_sibling()
-                        steps += 1
-                    if collected:
-                        return collected
-        return []
-
-    if not ingredients_lines:
-        ingredients_lines = find_section_by_heading(["Ingredients"])
-
-    if not instructions_lines:
-        instructions_lines = find_section_by_heading(
-            ["Instructions", "Method", "Directions", "Preparation"]
-        )
+    # 2) Fallbacks based on headings (one tree walk serves both lookups)
+    if not ingredients_lines or not instructions_lines:
+        headings = soup.find_all(SECTION_HEADING_TAGS)
+
+        if not ingredients_lines:
+            ingredients_lines = find_section_by_heading(headings, INGREDIENTS_HEADING_RE)
+
+        if not instructions_lines:
+            instructions_lines = find_section_by_heading(
+                headings, INSTRUCTIONS_HEADING_RE
+            )
 
     ingredients_text = "\n".join(ingredients_lines).strip()
     instructions_text = "\n".join(instructions_lines).strip()
@@ -127,26 +199,327 @@ def extract_ingredients_and_instructions(soup: BeautifulSoup) -> Dict[str, str]:
     }
 
 
-def scrape_recipe_page(url: str, source_label: str, state: Optional[str]) -> Optional[Dict]:
+def extract_title(soup, url: str) -> str:
+    """Page title – first <h1>, then <title>, then the URL itself."""
+    if not isinstance(soup, BeautifulSoup):
+        h1 = soup.css_first("h1")
+        if h1 is not None:
+            return _lexbor_text(h1)
+        title = soup.css_first("title")
+        return title.text(deep=True).strip() if title is not None else url
+
+    title_tag = soup.find("h1")
+    if title_tag:
+        return title_tag.get_text(" ", strip=True)
+    return (soup.title.string or "").strip() if soup.title else url
+
+
+# --- selectolax (lexbor) backend -------------------------------------------
+# Mirrors the BeautifulSoup code above node for node. lexbor's own
+# text(strip=True) joins text nodes differently from bs4's get_text, so text
+# is collected by hand to keep the output byte-identical.
+
+_LEXBOR_SKIP_TEXT_IN = {"script", "style", "template"}
+
+
+def _lexbor_text(node) -> str:
+    """Equivalent of bs4 get_text(" ", strip=True)."""
+    parts: List[str] = []
+    for child in node.traverse(include_text=True):
+        if child.tag != "-text":
+            continue
+        parent = child.parent
+        if parent is not None and parent.tag in _LEXBOR_SKIP_TEXT_IN:
+            continue
+        text = child.text_content.strip()
+        if text:
+            parts.append(text)
+    return " ".join(parts)
+
+
+def _lexbor_text_list(nodes) -> List[str]:
+    lines: List[str] = []
+    for node in nodes:
+        text = _lexbor_text(node)
+        if text:
+            lines.append(text)
+    return lines
+
+
+def _lexbor_next_element(node):
+    """Next sibling that is an element (skips text and comment nodes)."""
+    sib = node.next
+    while sib is not None and sib.tag.startswith("-"):
+        sib = sib.next
+    return sib
+
+
+def _lexbor_section_by_heading(headings: List, pattern: re.Pattern) -> List[str]:
+    for header_tag in SECTION_HEADING_TAGS:
+        for h in headings:
+            if h.tag != header_tag or not pattern.search(_lexbor_text(h)):
+                continue
+            collected: List[str] = []
+            sib = _lexbor_next_element(h)
+            steps = 0
+            while sib is not None and steps < 6:
+                if sib.tag in ("ul", "ol"):
+                    collected.extend(_lexbor_text_list(sib.css("li")))
+                elif sib.tag == "p":
+                    text = _lexbor_text(sib)
+                    if text:
+                        collected.append(text)
+                sib = _lexbor_next_element(sib)
+                steps += 1
+            if collected:
+                return collected
+    return []
+
+
+def _extract_sections_lexbor(tree) -> Dict[str, str]:
+    ingredients_lines: List[str] = []
+    instructions_lines: List[str] = []
+
+    ingredients_block = tree.css_first(".wprm-recipe-ingredients")
+    instructions_block = tree.css_first(".wprm-recipe-instructions")
+
+    if ingredients_block is not None:
+        ingredients_lines = _lexbor_text_list(ingredients_block.css("li, p"))
+
+    if instructions_block is not None:
+        instructions_lines = _lexbor_text_list(instructions_block.css("li, p"))
+
+    if not ingredients_lines or not instructions_lines:
+        headings = tree.css(", ".join(SECTION_HEADING_TAGS))
+
+        if not ingredients_lines:
+            ingredients_lines = _lexbor_section_by_heading(
+                headings, INGREDIENTS_HEADING_RE
+            )
+
+        if not instructions_lines:
+            instructions_lines = _lexbor_section_by_heading(
+                headings, INSTRUCTIONS_HEADING_RE
+            )
+
+    return {
+        "ingredients": "\n".join(ingredients_lines).strip(),
+        "instructions": "\n".join(instructions_lines).strip(),
+    }
+
+
+# --- schema.org JSON-LD fast path ------------------------------------------
+# Sites using WP Recipe Maker (and most other recipe plugins) embed a
+# schema.org Recipe object in a <script type="application/ld+json"> tag. It
+# is located with a regex and read with json.loads, so pages that have it
+# never need a DOM at all.
+
+JSON_LD_RE = re.compile(
+    r"<script[^>]*type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>",
+    re.IGNORECASE | re.DOTALL,
+)
+ISO_DURATION_RE = re.compile(
+    r"^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$",
+    re.IGNORECASE,
+)
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+# schema.org NutritionInformation field -> our key
+SCHEMA_NUTRITION_FIELDS = {
+    "calories": "calories",
+    "proteinContent": "protein",
+    "carbohydrateContent": "carbs",
+    "fatContent": "fat",
+}
+
+
+def _is_recipe_node(node: Any) -> bool:
+    if not isinstance(node, dict):
+        return False
+    node_type = node.get("@type")
+    if isinstance(node_type, list):
+        return "Recipe" in node_type
+    return node_type == "Recipe"
+
+
+def _find_recipe_node(data: Any) -> Optional[Dict]:
+    """Find the Recipe object in a JSON-LD payload (list, @graph or bare)."""
+    if _is_recipe_node(data):
+        return data
+    if isinstance(data, list):
+        candidates = data
+    elif isinstance(data, dict):
+        candidates = data.get("@graph") or []
+    else:
+        return None
+    for item in candidates:
+        found = _find_recipe_node(item)
+        if found:
+            return found
+    return None
+
+
+def _clean_ld_text(value: Any) -> str:
+    """Unescape entities, drop stray tags and collapse whitespace."""
+    if not isinstance(value, str):
+        return ""
+    return clean_html_text(value)
+
+
+def _ld_instruction_lines(value: Any) -> List[str]:
+    """Flatten recipeInstructions (text, HowToStep, HowToSection) into lines."""
+    if isinstance(value, str):
+        return [line for line in (_clean_ld_text(v) for v in value.split("\n")) if line]
+    if isinstance(value, list):
+        lines: List[str] = []
+        for item in value:
+            lines.extend(_ld_instruction_lines(item))
+        return lines
+    if isinstance(value, dict):
+        if "itemListElement" in value:
+            return _ld_instruction_lines(value["itemListElement"])
+        text = _clean_ld_text(value.get("text") or value.get("name"))
+        return [text] if text else []
+    return []
+
+
+def parse_iso_duration_minutes(value: Any) -> Optional[int]:
+    """'PT1H30M' -> 90; None if missing or not an ISO 8601 duration."""
+    if not isinstance(value, str):
+        return None
+    match = ISO_DURATION_RE.match(value.strip())
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes, seconds = (float(g) if g else 0 for g in match.groups())
+    return round(days * 1440 + hours * 60 + minutes + seconds / 60)
+
+
+def parse_recipe_yield(value: Any) -> Optional[int]:
+    """recipeYield ('4', '4 servings', ['4', '4 people'], 4) -> 4."""
+    if isinstance(value, list):
+        for item in value:
+            servings = parse_recipe_yield(item)
+            if servings:
+                return servings
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if value > 0 else None
+    if isinstance(value, str):
+        match = NUMBER_RE.search(value)
+        if match and float(match.group()) > 0:
+            return int(float(match.group()))
+    return None
+
+
+def _ld_nutrition(value: Any) -> Optional[Dict[str, float]]:
+    if not isinstance(value, dict):
+        return None
+    nutrition: Dict[str, float] = {}
+    for field, key in SCHEMA_NUTRITION_FIELDS.items():
+        match = NUMBER_RE.search(str(value.get(field, "")))
+        if match:
+            nutrition[key] = float(match.group())
+    return nutrition or None
+
+
+def extract_json_ld_recipe(html: str) -> Optional[Dict[str, Any]]:
+    """
+    Pull recipe fields out of an embedded schema.org Recipe, without a DOM.
+
+    Returns None if the page has no usable Recipe object (no ingredients),
+    so callers can fall back to HTML extraction.
+    """
+    for match in JSON_LD_RE.finditer(html):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        node = _find_recipe_node(data)
+        if node is None:
+            continue
+
+        raw_ingredients = node.get("recipeIngredient") or []
+        if isinstance(raw_ingredients, str):
+            raw_ingredients = [raw_ingredients]
+        ingredients = [t for t in (_clean_ld_text(i) for i in raw_ingredients) if t]
+        if not ingredients:
+            continue
+
+        return {
+            "title": _clean_ld_text(node.get("name")),
+            "ingredients": "\n".join(ingredients),
+            "instructions": "\n".join(
+                _ld_instruction_lines(node.get("recipeInstructions"))
+            ),
+            "servings": parse_recipe_yield(node.get("recipeYield")),
+            "total_time": parse_iso_duration_minutes(node.get("totalTime")),
+            "prep_time": parse_iso_duration_minutes(node.get("prepTime")),
+            "cook_time": parse_iso_duration_minutes(node.get("cookTime")),
+            "nutrition": _ld_nutrition(node.get("nutrition")),
+        }
+    return None
+
+
+# Fields taken from the page itself; the rest of a record is run metadata
+RECIPE_CONTENT_FIELDS = (
+    "title",
+    "ingredients",
+    "instructions",
+    "servings",
+    "readyInMinutes",
+    "prep_time_minutes",
+    "cook_time_minutes",
+    "source_nutrition",
+)
+
+
+def content_hash(recipe: Dict) -> str:
+    """Fingerprint of a parsed recipe's content, used to spot unchanged pages."""
+    content = {field: recipe.get(field) for field in RECIPE_CONTENT_FIELDS}
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def scrape_recipe_page(
+    url: str, source_label: str, state: Optional[str], parser: str = "html.parser"
+) -> Optional[Dict]:
     """Scrape a single recipe page into a standardized dict."""
     print(f"[*] Scraping recipe: {url}")
     html = fetch_url(url)
     if not html:
         return None
+    return parse_recipe_html(url, html, source_label, state, parser)
 
-    soup = BeautifulSoup(html, "html.parser")
 
-    # Title – fallback to first <h1>, then <title>
-    title_tag = soup.find("h1")
-    if title_tag:
-        title = title_tag.get_text(" ", strip=True)
+def parse_recipe_html(
+    url: str,
+    html: str,
+    source_label: str,
+    state: Optional[str],
+    parser: str = "html.parser",
+) -> Dict:
+    """
+    Parse a fetched recipe page into a standardized dict.
+
+    The embedded JSON-LD Recipe is tried first; the page is only parsed into
+    a DOM (WPRM markup, then heading heuristics) when that is missing.
+    """
+    structured = extract_json_ld_recipe(html) or {}
+
+    if structured:
+        title = structured["title"] or url
+        ingredients = structured["ingredients"]
+        instructions = structured["instructions"]
     else:
-        title = (soup.title.string or "").strip() if soup.title else url
+        soup = make_document(html, parser)
 
-    sections = extract_ingredients_and_instructions(soup)
+        # Title – fallback to first <h1>, then <title>
+        title = extract_title(soup, url)
 
-    ingredients = sections.get("ingredients", "")
-    instructions = sections.get("instructions", "")
+        sections = extract_ingredients_and_instructions(soup)
+
+        ingredients = sections.get("ingredients", "")
+        instructions = sections.get("instructions", "")
 
     if not ingredients and not instructions:
         print(f"  [!] No clear recipe content found for {url}")
@@ -158,6 +531,12 @@ def scrape_recipe_page(url: str, source_label: str, state: Optional[str]) -> Opt
         "recipe_text": recipe_text,
         "ingredients": ingredients,
         "instructions": instructions,
+        # Only known when the page embeds a schema.org Recipe (JSON-LD)
+        "servings": structured.get("servings"),
+        "readyInMinutes": structured.get("total_time"),  # name the app reads
+        "prep_time_minutes": structured.get("prep_time"),
+        "cook_time_minutes": structured.get("cook_time"),
+        "source_nutrition": structured.get("nutrition"),
         # Kept for shape parity with reddit_recipe_scraper
         "upvotes": 0,
         "subreddit": None,
@@ -179,15 +558,147 @@ def scrape_recipe_page(url: str, source_label: str, state: Optional[str]) -> Opt
     return recipe
 
 
+def _init_parse_worker(stdout_to_stderr: bool) -> None:
+    """
+    Parse worker setup: follow the parent's stdout redirect.
+
+    A spawned (or forkserver) worker starts with the real stdout whatever
+    the parent redirected, so its prints would land in "-o -" NDJSON.
+    """
+    if stdout_to_stderr:
+        sys.stdout = sys.stderr
+
+
+def iter_scrape_results(
+    entries: List[Tuple[str, Optional[str]]],
+    previous: Dict[str, Dict],
+    source_label: str,
+    state: Optional[str],
+    parser: str = "html.parser",
+    workers: int = 0,
+    fetch_concurrency: int = 1,
+) -> Iterator[Tuple[str, str, Optional[Dict]]]:
+    """
+    Fetch and parse every (url, lastmod) entry; yield (url, status, recipe).
+
+    Two stages joined by bounded queues:
+      1. fetch  – `fetch_concurrency` threads download pages (I/O bound)
+      2. parse  – `workers` processes run parse_recipe_html on the raw HTML
+                  (CPU bound; workers=0 parses in this process)
+    At most 2x fetch_concurrency pages wait in stage 1 and 2x workers in
+    stage 2, so a slow stage throttles the other instead of piling up HTML
+    in memory. Results are yielded in `entries` order.
+
+    status is one of:
+      "parsed"            – new or changed page, freshly parsed
+      "unchanged_lastmod" – sitemap lastmod matches `previous`, not fetched
+      "unchanged_hash"    – parsed content hashes the same as `previous`, whose
+                            copy is kept
+      "failed"            – fetch failed (recipe is the previous copy, if any)
+    """
+    fetch_pool = ThreadPoolExecutor(max_workers=max(1, fetch_concurrency))
+    parse_pool = None
+    if workers > 0:
+        parse_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_parse_worker,
+            initargs=(sys.stdout is not sys.__stdout__,),
+        )
+    fetch_window = 2 * max(1, fetch_concurrency)
+    parse_window = 2 * max(1, workers)
+
+    fetches: deque = deque()  # (url, lastmod, prev, Future[html] | None)
+    parses: deque = deque()  # (url, status, Future[recipe] | recipe, prev, lastmod)
+
+    def start_parse(url, lastmod, prev, fetch_future):
+        if fetch_future is None:
+            return url, "unchanged_lastmod", prev, prev, lastmod
+        html = fetch_future.result()
+        if not html:
+            # Keep the last good copy rather than dropping the recipe
+            return url, "failed", prev, None, lastmod
+        args = (url, html, source_label, state, parser)
+        if parse_pool is not None:
+            return url, "parsed", parse_pool.submit(parse_recipe_html, *args), prev, lastmod
+        return url, "parsed", parse_recipe_html(*args), prev, lastmod
+
+    def finish(url, status, recipe, prev, lastmod):
+        if isinstance(recipe, Future):
+            recipe = recipe.result()
+        if status == "parsed":
+            # Hash what was extracted, not the HTML, which changes on every
+            # request (nonces, timestamps, ads) even when the recipe doesn't
+            page_hash = content_hash(recipe)
+            if prev and prev.get("content_hash") == page_hash:
+                return url, "unchanged_hash", dict(prev, source_lastmod=lastmod)
+            recipe["content_hash"] = page_hash
+            recipe["source_lastmod"] = lastmod
+        return url, status, recipe
+
+    pending = iter(entries)
+    exhausted = False
+    try:
+        while True:
+            # Stage 1: keep the fetch window full
+            while not exhausted and len(fetches) < fetch_window:
+                entry = next(pending, None)
+                if entry is None:
+                    exhausted = True
+                    break
+                url, lastmod = entry
+                prev = previous.get(url)
+                if prev and lastmod and prev.get("source_lastmod") == lastmod:
+                    fetches.append((url, lastmod, prev, None))
+                else:
+                    fetches.append((url, lastmod, prev, fetch_pool.submit(fetch_url, url)))
+
+            if not fetches and not parses:
+                break
+
+            # Stage 2: hand the oldest fetched page to the parsers, if room
+            if fetches and len(parses) < parse_window:
+                parses.append(start_parse(*fetches.popleft()))
+                continue
+
+            # Parse queue is full (or fetching is done): emit the oldest result
+            yield finish(*parses.popleft())
+    finally:
+        for _, _, _, future in fetches:
+            if future is not None:
+                future.cancel()
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+        if parse_pool is not None:
+            parse_pool.shutdown(wait=True, cancel_futures=True)
+
+
 def read_urls_file(path: str) -> List[str]:
     """Read a file with one URL per line."""
-    urls: List[str] = []
+    return [url for url, _ in read_urls_with_lastmod(path)]
+
+
+def read_urls_with_lastmod(path: str) -> List[Tuple[str, Optional[str]]]:
+    """Read (url, lastmod) pairs; lastmod is an optional tab-separated column."""
+    entries: List[Tuple[str, Optional[str]]] = []
     with open(path, "r", encoding="utf-8") as f:
         for line in f:
-            url = line.strip()
-            if url and not url.startswith("#"):
-                urls.append(url)
-    return urls
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            url, _, lastmod = line.partition("\t")
+            entries.append((url.strip(), lastmod.strip() or None))
+    return entries
+
+
+def load_previous_recipes(path: str) -> Dict[str, Dict]:
+    """Index a previous scraper output (JSON or NDJSON) by source_url."""
+    return {
+        r["source_url"]: r for r in read_records(path) if r.get("source_url")
+    }
+
+
+def delta_path(output_file: str) -> str:
+    """recipes.json -> recipes.delta.json, recipes.ndjson.gz -> recipes.delta.ndjson.gz"""
+    return derive_path(output_file, ".delta")
 
 
 def main():
@@ -200,7 +711,9 @@ def main():
     parser.add_argument(
         "--output",
         "-o",
-        help="Output JSON file. If not given, a timestamped file is created.",
+        help="Output file: .json array, or .ndjson / .jsonl (optionally .gz) "
+        "written record by record; '-' streams NDJSON to stdout. If not given, "
+        "a timestamped .json file is created.",
     )
     parser.add_argument(
         "--source_label",
@@ -212,46 +725,141 @@ def main():
         default=None,
         help="Optional Indian state label to tag all recipes with (e.g. Karnataka).",
     )
+    parser.add_argument(
+        "--http_cache",
+        default=None,
+        help="SQLite file for the shared HTTP cache (default: $RASHAN_HTTP_CACHE, "
+        "or no caching).",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=PARSER_BACKENDS,
+        default="html.parser",
+        help="HTML parser backend (lxml / selectolax are much faster; "
+        "see bench_parsers.py).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Processes parsing HTML in parallel (0 = parse in the main process).",
+    )
+    parser.add_argument(
+        "--fetch_concurrency",
+        "--fetch-concurrency",
+        type=int,
+        default=1,
+        help="Pages downloaded at once (keep it low – be polite!).",
+    )
+    parser.add_argument(
+        "--previous",
+        default=None,
+        help="Previous output (JSON or NDJSON); unchanged pages are reused "
+        "instead of re-scraped, and new/changed recipes also go to "
+        "<output>.delta.<ext>.",
+    )
 
     args = parser.parse_args()
-
-    urls = read_urls_file(args.urls_file)
-    if not urls:
-        print(f"[!] No URLs found in {args.urls_file}")
+    output_file = (
+        args.output
+        if args.output
+        else f"wp_recipes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    if args.previous and output_file == "-":
+        parser.error("--previous needs a file --output to put the delta next to")
+
+    http_cache.configure(args.http_cache)
+    make_document("", args.parser)  # fail early if the backend isn't installed
+
+    # Inputs are read before any output file is opened, so a failed run
+    # leaves no empty output behind
+    entries = read_urls_with_lastmod(args.urls_file)
+    if not entries:
+        with progress_to_stderr(output_file):
+            print(f"[!] No URLs found in {args.urls_file}")
         return
 
+    previous: Dict[str, Dict] = {}
+    if args.previous:
+        previous = load_previous_recipes(args.previous)
+
+    with contextlib.ExitStack() as stack:
+        # --previous X -o X: X is only replaced once the scrape has finished
+        replace = bool(args.previous) and same_file(args.previous, output_file)
+        writer = stack.enter_context(RecordWriter(output_file, replace))
+        delta_writer = (
+            stack.enter_context(RecordWriter(delta_path(output_file)))
+            if args.previous
+            else None
+        )
+        stack.enter_context(progress_to_stderr(output_file))
+        scrape_to_writers(args, entries, previous, writer, delta_writer)
+
+
+def scrape_to_writers(
+    args: argparse.Namespace,
+    entries: List[Tuple[str, Optional[str]]],
+    previous: Dict[str, Dict],
+    writer: RecordWriter,
+    delta_writer: Optional[RecordWriter],
+) -> None:
+    """Run the scrape, writing each recipe out as soon as it is ready."""
     print("=" * 60)
     print("RASHAN WORDPRESS RECIPE SCRAPER")
     print("=" * 60)
-    print(f"Total URLs to scrape: {len(urls)}")
+    print(f"Total URLs to scrape: {len(entries)}")
+    print(f"Fetch concurrency: {args.fetch_concurrency}, parse workers: {args.workers}")
     print(f"Source label: {args.source_label}")
     if args.state:
         print(f"State tag: {args.state}")
-
-    recipes: List[Dict] = []
-    for i, url in enumerate(urls, 1):
-        print(f"\n[{i}/{len(urls)}]")
-        recipe = scrape_recipe_page(url, args.source_label, args.state)
+    if args.previous:
+        print(f"Previous output: {args.previous} ({len(previous)} recipes)")
+
+    changed = 0
+    skipped_fetch = 0
+    skipped_parse = 0
+    results = iter_scrape_results(
+        entries,
+        previous,
+        args.source_label,
+        args.state,
+        parser=args.parser,
+        workers=args.workers,
+        fetch_concurrency=args.fetch_concurrency,
+    )
+    for i, (url, status, recipe) in enumerate(results, 1):
+        progress = f"[{i}/{len(entries)}]"
+        if status == "unchanged_lastmod":
+            print(f"{progress} [=] Unchanged (sitemap lastmod): {url}")
+            skipped_fetch += 1
+        elif status == "unchanged_hash":
+            print(f"{progress} [=] Recipe content unchanged, keeping previous copy: {url}")
+            skipped_parse += 1
+        elif status == "failed":
+            print(f"{progress} [!] Could not fetch: {url}")
+        else:
+            print(f"{progress} [+] {recipe['title'][:60]}")
+            changed += 1
+            if delta_writer is not None:
+                delta_writer.write(recipe)
         if recipe:
-            recipes.append(recipe)
+            writer.write(recipe)
 
-    if not recipes:
+    if not writer.count:
         print("\n[!] No recipes scraped successfully.")
         return
 
-    output_file = (
-        args.output
-        if args.output
-        else f"wp_recipes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    )
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(recipes, f, indent=2, ensure_ascii=False)
-
     print("\n" + "=" * 60)
     print("[✓] SCRAPING COMPLETE")
-    print(f"Recipes scraped: {len(recipes)}")
-    print(f"Output file: {output_file}")
+    print(f"Recipes scraped: {writer.count}")
+    print(f"Output file: {writer.path}")
+    if args.previous:
+        current = {url for url, _ in entries}
+        removed = sum(1 for url in previous if url not in current)
+        print(f"New/changed: {changed} (delta file: {delta_writer.path})")
+        print(f"Unchanged: {skipped_fetch} by lastmod, {skipped_parse} by content hash")
+        print(f"Dropped (no longer in urls file): {removed}")
+    http_cache.print_stats()
     print("=" * 60)
     print("\nNext steps:")
     print("1. Spot-check a few recipes in the JSON for quality.")
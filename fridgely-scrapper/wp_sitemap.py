@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Sitemap-based URL discovery for WordPress recipe sites.
+
+Most WP sites publish a sitemap index, either the core one
+(/wp-sitemap.xml) or Yoast's (/sitemap_index.xml). The post sitemaps it
+points to already list every post URL with its lastmod date, so recipe
+candidates can be collected without downloading a single HTML page.
+
+Sitemaps are streamed: each response (plain or gzipped) is fed chunk by
+chunk into an incremental XML parser and every <url>/<sitemap> element is
+dropped as soon as it has been read, so even huge sitemaps use little memory.
+
+Used by crawl_wp_recipes.py (--discovery sitemap), which falls back to the
+BFS crawl when a site has no sitemap.
+"""
+
+import re
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import requests
+
+# Where WordPress / Yoast / Rank Math usually put the sitemap index
+SITEMAP_PATHS = ["/wp-sitemap.xml", "/sitemap_index.xml", "/sitemap.xml"]
+
+# Child sitemaps that list posts (core WP, Yoast, and WPRM's "recipe" type)
+POST_SITEMAP_RE = re.compile(
+    r"(wp-sitemap-posts-(post|recipe)-\d+|(post|recipe)-sitemap\d*)\.xml(\.gz)?$",
+    re.IGNORECASE,
+)
+
+# Child sitemaps that never hold recipes
+SKIP_SITEMAP_RE = re.compile(
+    r"(taxonomies|users|author|category|tag|page|attachment|web-stor)",
+    re.IGNORECASE,
+)
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from a tag ('{ns}loc' -> 'loc')."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_sitemap(
+    url: str, session: requests.Session, timeout: int = 15
+) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    Stream one sitemap and yield (kind, loc, lastmod) per entry.
+
+    kind is "sitemap" for entries of a sitemap index and "url" for entries
+    of a URL set. Gzipped sitemaps are detected by their magic bytes.
+    """
+    resp = session.get(url, timeout=timeout, stream=True)
+    try:
+        if resp.status_code != 200:
+            return
+
+        parser = XMLPullParser(events=("end",))
+        inflater = None
+        first = True
+
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            if not chunk:
+                continue
+            if first:
+                first = False
+                if chunk.startswith(GZIP_MAGIC):
+                    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if inflater is not None:
+                chunk = inflater.decompress(chunk)
+            parser.feed(chunk)
+
+            for _, elem in parser.read_events():
+                kind = _local_name(elem.tag)
+                if kind not in ("url", "sitemap"):
+                    continue
+                loc = lastmod = None
+                for child in elem:
+                    name = _local_name(child.tag)
+                    if name == "loc":
+                        loc = (child.text or "").strip()
+                    elif name == "lastmod":
+                        lastmod = (child.text or "").strip() or None
+                elem.clear()
+                if loc:
+                    yield kind, loc, lastmod
+    except ParseError as e:
+        print(f"  [!] Could not parse sitemap {url}: {e}")
+    finally:
+        resp.close()
+
+
+def find_sitemap_roots(
+    start_url: str, session: requests.Session, timeout: int = 15
+) -> List[str]:
+    """Return sitemap URLs advertised in robots.txt, else the usual WP paths."""
+    roots: List[str] = []
+    try:
+        resp = session.get(urljoin(start_url, "/robots.txt"), timeout=timeout)
+        if resp.status_code == 200:
+            for line in resp.text.splitlines():
+                key, _, value = line.partition(":")
+                if key.strip().lower() == "sitemap" and value.strip():
+                    roots.append(value.strip())
+    except Exception as e:
+        print(f"  [!] Error fetching robots.txt: {e}")
+
+    if roots:
+        return roots
+    return [urljoin(start_url, path) for path in SITEMAP_PATHS]
+
+
+def discover_sitemap_urls(
+    start_url: str,
+    domain: str,
+    max_urls: int,
+    session: Optional[requests.Session] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Collect candidate recipe post URLs from the site's sitemaps.
+
+    Returns an ordered {url: lastmod} dict (lastmod may be None). An empty
+    dict means no usable sitemap was found.
+    """
+    session = session or requests.Session()
+    found: Dict[str, Optional[str]] = {}
+    seen_sitemaps = set()
+
+    def walk(sitemap_url: str) -> bool:
+        """Walk one sitemap (recursing into indexes). True once max_urls hit."""
+        if sitemap_url in seen_sitemaps:
+            return False
+        seen_sitemaps.add(sitemap_url)
+        print(f"[*] Reading sitemap: {sitemap_url}")
+
+        children: List[str] = []
+        for kind, loc, lastmod in iter_sitemap(sitemap_url, session):
+            if kind == "sitemap":
+                children.append(loc)
+                continue
+            if not urlparse(loc).netloc.endswith(domain):
+                continue
+            if loc not in found:
+                found[loc] = lastmod
+                if len(found) >= max_urls:
+                    return True
+
+        # Prefer the post sitemaps of an index; only if none are recognised,
+        # fall back to everything that isn't obviously a taxonomy/page list.
+        post_children = [c for c in children if POST_SITEMAP_RE.search(c)]
+        if not post_children:
+            post_children = [c for c in children if not SKIP_SITEMAP_RE.search(c)]
+        for child in post_children:
+            if walk(child):
+                return True
+        return False
+
+    for root in find_sitemap_roots(start_url, session):
+        try:
+            walk(root)
+        except Exception as e:
+            print(f"  [!] Error reading sitemap {root}: {e}")
+        if found:
+            break
+
+    return found